@@ -1,4 +1,6 @@
 import signal
+import sqlite3
+from typing import List, Optional
 
 from colored import attr, fg
 from tealprint import TealPrint
@@ -10,10 +12,17 @@ from .app.show.show import Show
 from .app.update.update import Update
 from .config import config
 from .core.entities.actions import Actions
+from .core.entities.mod import ModArg
+from .core.entities.sites import Sites
+from .gateways.api.curse_api import InvalidApiKey
 from .gateways.api.mod_finder import ModFinder
 from .gateways.arg_parser import parse_args
 from .gateways.http import Http
+from .gateways.http_stats import http_stats
 from .gateways.jar_parser import JarParser
+from .gateways.jar_store import JarStore
+from .gateways.project_index import ProjectIndex
+from .gateways.response_cache import ResponseCache
 from .gateways.sqlite import Sqlite
 
 
@@ -21,22 +30,71 @@ def signal_handler(signal, frame):
     TealPrint.error("Exiting...", color=fg("yellow") + attr("bold"), exit=True)
 
 
-def main():
-    signal.signal(signal.SIGINT, signal_handler)
+def create_response_cache() -> Optional[ResponseCache]:
+    """The persistent cache is only opened when it's used or cleared"""
+    if not config.cache and not config.clear_cache:
+        return None
+
+    response_cache = ResponseCache()
+    if config.clear_cache:
+        response_cache.clear()
+    if not config.cache:
+        response_cache.close()
+        return None
+
+    response_cache.prune(config.response_cache_max_age)
+    return response_cache
+
+
+def create_project_index() -> Optional[ProjectIndex]:
+    if not config.project_index:
+        return None
+
+    try:
+        return ProjectIndex(config.project_index)
+    except sqlite3.OperationalError as e:
+        TealPrint.warning(f"Can't use the project index, your SQLite doesn't support full-text search: {e}")
+        return None
 
-    TealPrint.warning(
-        "CurseForge has been disabled! See https://github.com/Senth/minecraft-mod-manager for more information."
+
+def warn_when_curse_is_disabled(repo: RepoImpl) -> None:
+    """Warn when a mod would be installed or updated from CurseForge, which is disabled without an API key"""
+    if config.curse_api_key:
+        return
+
+    message = (
+        "CurseForge is disabled without an API key, set it with --curse-api-key or CURSEFORGE_API_KEY. "
+        + "See https://github.com/Senth/minecraft-mod-manager for more information."
     )
+    mods: List[ModArg] = [*config.arg_mods, *repo.get_all_mods()]
+    uses_curse = any(Sites.curse in (mod.sites or {}) for mod in mods)
+    if uses_curse and config.action in [Actions.install, Actions.update]:
+        TealPrint.warning(message)
+    else:
+        TealPrint.verbose(message)
+
+
+def main():
+    signal.signal(signal.SIGINT, signal_handler)
 
     args = parse_args()
     config.add_arg_settings(args)
+    # The statistics are global, only summarize the requests of this run
+    http_stats.clear()
 
     sqlite = Sqlite()
+    response_cache = create_response_cache()
     jar_parser = JarParser(config.dir)
-    http = Http()
+    jar_store = JarStore(config.jar_store) if config.jar_store else None
+    http = Http(response_cache, jar_store)
     repo = RepoImpl(jar_parser, sqlite, http)
-    finder = ModFinder.create(http)
+    warn_when_curse_is_disabled(repo)
+    index = create_project_index()
+    finder = ModFinder.create(http, index)
     try:
+        if index and not config.offline and config.action in [Actions.install, Actions.update]:
+            finder.refresh_index()
+
         if config.action == Actions.update:
             update = Update(repo, finder)
             update.execute(config.arg_mods)
@@ -52,8 +110,19 @@ def main():
         elif config.action == Actions.list:
             show = Show(repo)
             show.execute()
+    except InvalidApiKey as e:
+        TealPrint.error(str(e), exit=True)
     finally:
+        TealPrint.debug(f"Memory cache: {http.cache}")
+        http_stats.print_summary()
+        if config.stats_json:
+            http_stats.write_json(config.stats_json)
+        finder.close()
         sqlite.close()
+        if response_cache:
+            response_cache.close()
+        if index:
+            index.close()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import Dict, List, Mapping, Optional, Sequence
 
 from tealprint import TealPrint
 
@@ -9,9 +9,14 @@ from ..app.show.show_repo import ShowRepo
 from ..app.update.update_repo import UpdateRepo
 from ..config import config
 from ..core.entities.mod import Mod
+from ..core.entities.mod_loaders import ModLoaders
+from ..core.entities.sites import Site, Sites
 from ..core.entities.version_info import VersionInfo
+from ..core.utils.latest_version_finder import LatestVersionFinder
 from ..gateways.api.api import Api
+from ..gateways.api.curse_api import CurseApi
 from ..gateways.api.modrinth_api import ModrinthApi
+from ..gateways.file_hasher import FileHasher
 from ..gateways.http import Http
 from ..gateways.jar_parser import JarParser
 from ..gateways.sqlite import Sqlite
@@ -26,9 +31,12 @@ class RepoImpl(ConfigureRepo, UpdateRepo, InstallRepo, ShowRepo):
         self.jar_parser = jar_parser
         self.mods = self.db.sync_with_dir(jar_parser.mods)
         self.http = http
+        self._sha1s: Dict[str, Optional[str]] = {}
         self.apis: List[Api] = [
             ModrinthApi(http),
         ]
+        if config.curse_api_key:
+            self.apis.append(CurseApi(http))
 
     def get_mod(self, id: str) -> Optional[Mod]:
         for installed_mod in self.mods:
@@ -63,17 +71,114 @@ class RepoImpl(ConfigureRepo, UpdateRepo, InstallRepo, ShowRepo):
         path = Path(config.dir).joinpath(filename)
         path.unlink(missing_ok=True)
 
-    def get_versions(self, mod: Mod) -> List[VersionInfo]:
+    def get_versions(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
         versions: List[VersionInfo] = []
 
         for api in self.apis:
             if mod.matches_site(api.site_name):
-                versions.extend(api.get_all_versions(mod))
+                versions.extend(api.get_all_versions(mod, filter))
 
         return versions
 
-    def download(self, url: str, filename: str = "") -> Path:
-        return Path(self.http.download(url, filename))
+    def find_sites_by_hash(self, mods: Sequence[Mod]) -> Dict[str, Dict[Sites, Site]]:
+        hashes = self._get_sha1s(mods)
+
+        sites: Dict[str, Dict[Sites, Site]] = {}
+        for api in self.apis:
+            files = {
+                hashes[mod.file]: mod.file for mod in mods if mod.file in hashes and mod.matches_site(api.site_name)
+            }
+            if not files:
+                continue
+
+            for hash, site in api.find_mods_by_hash(list(files.keys())).items():
+                if hash in files:
+                    sites.setdefault(files[hash], {})[api.site_name] = site
+
+        return sites
+
+    def get_latest_version(self, mod: Mod) -> Optional[VersionInfo]:
+        latest_versions: List[VersionInfo] = []
+
+        for api in self.apis:
+            if mod.matches_site(api.site_name):
+                latest = LatestVersionFinder.find_newest_version(mod, api.iter_versions(mod))
+                if latest:
+                    latest_versions.append(latest)
+
+        return LatestVersionFinder.find_latest_version(mod, latest_versions, filter=False)
+
+    def get_latest_versions_by_hash(self, mods: Sequence[Mod]) -> Dict[str, VersionInfo]:
+        hashes = self._get_sha1s(mods)
+
+        versions: Dict[str, VersionInfo] = {}
+        for api in self.apis:
+            # The loader filter applies to all hashes in a request, so mods are looked up once per loader
+            files_by_loader: Dict[ModLoaders, Dict[str, str]] = {}
+            for mod in mods:
+                if mod.file in hashes and mod.file not in versions and mod.matches_site(api.site_name):
+                    loader = config.filter.loader if config.filter.loader != ModLoaders.unknown else mod.mod_loader
+                    files_by_loader.setdefault(loader, {})[hashes[mod.file]] = mod.file
+
+            for loader, files in files_by_loader.items():
+                found = api.get_latest_versions_by_hash(list(files.keys()), loader, config.filter.version)
+                for hash, version in found.items():
+                    if hash in files:
+                        versions[files[hash]] = version
+
+        return versions
+
+    def get_latest_versions(self, mods: Sequence[Mod]) -> Dict[str, VersionInfo]:
+        site_versions: Dict[Sites, Dict[str, List[VersionInfo]]] = {}
+        for api in self.apis:
+            site_ids = [mod.sites[api.site_name].id or "" for mod in mods if api.site_name in mod.sites]
+            site_ids = [site_id for site_id in site_ids if site_id]
+            if site_ids:
+                site_versions[api.site_name] = api.get_latest_versions(site_ids)
+
+        versions: Dict[str, VersionInfo] = {}
+        for mod in mods:
+            if not mod.file or not mod.sites:
+                continue
+
+            # Leave out mods that would miss the versions of a site, they're compared when updating the mod
+            mod_versions: List[VersionInfo] = []
+            for site in mod.sites.values():
+                found = site_versions.get(site.name, {}).get(site.id or "")
+                if not found:
+                    break
+                mod_versions.extend(found)
+            else:
+                latest = LatestVersionFinder.find_latest_version(mod, mod_versions, filter=True)
+                if latest:
+                    latest.name = mod.name
+                    versions[mod.file] = latest
+
+        return versions
+
+    def _get_sha1s(self, mods: Sequence[Mod]) -> Dict[str, str]:
+        """sha1 hashes of the installed files by filename. Each file is only hashed once"""
+        hashes: Dict[str, str] = {}
+        for mod in mods:
+            if mod.file:
+                if mod.file not in self._sha1s:
+                    self._sha1s[mod.file] = RepoImpl._get_sha1(mod.file)
+                hash = self._sha1s[mod.file]
+                if hash:
+                    hashes[mod.file] = hash
+        return hashes
+
+    @staticmethod
+    def _get_sha1(filename: str) -> Optional[str]:
+        hasher = FileHasher(["sha1"])
+        try:
+            hasher.update_from_file(Path(config.dir).joinpath(filename))
+        except OSError:
+            return None
+        return hasher.hexdigests()["sha1"]
+
+    def download(self, url: str, filename: str = "", hashes: Mapping[str, str] = {}) -> Path:
+        return Path(self.http.download(url, filename, hashes))
 
     @staticmethod
     def _print_found():
@@ -1,9 +1,12 @@
+import hashlib
+from pathlib import Path
 from typing import Any, List, Union
 
 import pytest
 from mockito import mock, unstub, verifyStubbedInvocationsAreUsed, when
 
 from ..adapters.repo_impl import RepoImpl
+from ..config import config
 from ..core.entities.mod import Mod
 from ..core.entities.mod_loaders import ModLoaders
 from ..core.entities.sites import Site, Sites
@@ -162,6 +165,23 @@ def test_get_versions(test: TestGetVersions, repo_impl: RepoImpl):
     unstub()
 
 
+def test_get_latest_version_from_newest_versions_of_each_site(repo_impl: RepoImpl):
+    input = Mod("", "", sites={Sites.modrinth: Site(Sites.modrinth), Sites.curse: Site(Sites.curse)})
+    curse = version(site=Sites.curse)
+    curse.upload_time = 10
+    modrinth = version(site=Sites.modrinth)
+    modrinth.upload_time = 20
+    when(repo_impl.apis[0]).iter_versions(input).thenReturn(iter([curse]))
+    when(repo_impl.apis[1]).iter_versions(input).thenReturn(iter([modrinth, curse]))
+
+    result = repo_impl.get_latest_version(input)
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert modrinth == result
+
+
 def mock_get_all_versions(api: Any, result: Union[List[VersionInfo], ModNotFoundException, None]) -> None:
     if type(result) == list:
         when(api).get_all_versions(...).thenReturn(result)
@@ -224,3 +244,84 @@ def test_get_mod(test_name: str, mods: List[Mod], input: str, expected: Union[Mo
     result = repo_impl.get_mod(input)
 
     assert expected == result
+
+
+def test_get_latest_versions_by_hash_once_per_mod_loader(repo_impl: RepoImpl, tmp_path: Path):
+    config.dir = tmp_path
+    files = {"carpet.jar": b"carpet", "lithium.jar": b"lithium", "jei.jar": b"jei"}
+    for filename, content in files.items():
+        tmp_path.joinpath(filename).write_bytes(content)
+    sha1 = {filename: hashlib.sha1(content).hexdigest() for filename, content in files.items()}
+    mods = [
+        Mod("carpet", "Carpet", file="carpet.jar", mod_loader=ModLoaders.fabric),
+        Mod("lithium", "Lithium", file="lithium.jar", mod_loader=ModLoaders.fabric),
+        Mod("jei", "JEI", file="jei.jar", mod_loader=ModLoaders.forge),
+        Mod("removed", "Removed", file="removed.jar", mod_loader=ModLoaders.fabric),
+    ]
+    carpet = VersionInfo(Stabilities.release, set(), Sites.modrinth, 1, [], "", "2.0.0")
+    modrinth = mock(ModrinthApi)
+    modrinth.site_name = Sites.modrinth  # type:ignore
+    repo_impl.apis = [modrinth]
+    when(modrinth).get_latest_versions_by_hash(
+        [sha1["carpet.jar"], sha1["lithium.jar"]], ModLoaders.fabric, None
+    ).thenReturn({sha1["carpet.jar"]: carpet})
+    when(modrinth).get_latest_versions_by_hash([sha1["jei.jar"]], ModLoaders.forge, None).thenReturn({})
+
+    actual = repo_impl.get_latest_versions_by_hash(mods)
+
+    config.dir = Path(".")
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {"carpet.jar": carpet}
+
+
+def test_find_sites_by_hash(repo_impl: RepoImpl, tmp_path: Path):
+    config.dir = tmp_path
+    files = {"carpet.jar": b"carpet", "unknown.jar": b"unknown"}
+    for filename, content in files.items():
+        tmp_path.joinpath(filename).write_bytes(content)
+    sha1 = {filename: hashlib.sha1(content).hexdigest() for filename, content in files.items()}
+    mods = [
+        Mod("carpet", "Carpet", file="carpet.jar"),
+        Mod("unknown", "Unknown", file="unknown.jar"),
+        Mod("removed", "Removed", file="removed.jar"),
+    ]
+    carpet = Site(Sites.modrinth, "AAAAAAAA", "carpet")
+    modrinth = mock(ModrinthApi)
+    modrinth.site_name = Sites.modrinth  # type:ignore
+    repo_impl.apis = [modrinth]
+    when(modrinth).find_mods_by_hash([sha1["carpet.jar"], sha1["unknown.jar"]]).thenReturn(
+        {sha1["carpet.jar"]: carpet}
+    )
+
+    actual = repo_impl.find_sites_by_hash(mods)
+
+    config.dir = Path(".")
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {"carpet.jar": {Sites.modrinth: carpet}}
+
+
+def test_get_latest_versions_of_mods_that_all_their_sites_returned(repo_impl: RepoImpl):
+    carpet = Mod("carpet", "Carpet", sites={Sites.curse: Site(Sites.curse, "1")}, file="carpet.jar")
+    sodium = Mod(
+        "sodium",
+        "Sodium",
+        sites={Sites.curse: Site(Sites.curse, "2"), Sites.modrinth: Site(Sites.modrinth, "AA")},
+        file="sodium.jar",
+    )
+    missing = Mod("missing", "Missing", sites={Sites.curse: Site(Sites.curse, "3")}, file="missing.jar")
+    older = version(site=Sites.curse)
+    newer = version(site=Sites.curse)
+    newer.upload_time = 10
+    when(repo_impl.apis[0]).get_latest_versions(["1", "2", "3"]).thenReturn({"1": [older, newer], "2": [newer]})
+
+    actual = repo_impl.get_latest_versions([carpet, sodium, missing])
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {"carpet.jar": newer}
+    assert newer.name == "Carpet"
@@ -1,17 +1,21 @@
-from typing import List, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Sequence, Set
 
 from tealprint import TealPrint
 
 from ...config import config
 from ...core.entities.mod import Mod, ModArg
+from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import VersionInfo
 from ...core.errors.download_failed import DownloadFailed
 from ...core.errors.mod_file_invalid import ModFileInvalid
 from ...core.errors.mod_not_found_exception import ModNotFoundException
 from ...core.utils.latest_version_finder import LatestVersionFinder
 from ...gateways.api.mod_finder import ModFinder
-from ...gateways.http import MaxRetriesExceeded
+from ...gateways.http import DeadlineExceeded, Http, MaxRetriesExceeded, NotCached
+from ...gateways.http_stats import http_stats
 from ...utils.log_colors import LogColors
+from ...utils.threaded_print import ThreadedPrint
 from .download_repo import DownloadRepo
 
 
@@ -19,23 +23,109 @@ class Download:
     def __init__(self, repo: DownloadRepo, finder: ModFinder):
         self._repo = repo
         self._finder = finder
+        self._known_versions: Dict[str, VersionInfo] = {}
+        """Latest versions by the filename of the installed mod, found without searching for the mod"""
+        self._identified_files: Set[str] = set()
+        """Filenames of installed mods whose sites were found by their file hash, no need to search for them"""
 
     def find_download_and_install(self, mods: Sequence[Mod]) -> None:
         mods_not_found: List[ModNotFoundException] = []
         corrupt_mods: List[Mod] = []
+        skipped_mods: List[Mod] = []
 
-        download_queue: List[Mod] = []
-        download_queue.extend(mods)
+        if config.jobs > 1:
+            self._find_download_and_install_concurrently(mods, mods_not_found, corrupt_mods, skipped_mods)
+        else:
+            download_queue: List[Mod] = []
+            download_queue.extend(mods)
 
-        # Find latest version of mod
-        while len(download_queue) > 0:
-            mod = download_queue.pop()
+            while len(download_queue) > 0:
+                mod = download_queue.pop()
+                download_queue.extend(
+                    self._find_download_and_install_mod(mod, mods_not_found, corrupt_mods, skipped_mods)
+                )
+
+        self._print_errors(mods_not_found, corrupt_mods, skipped_mods)
+
+    def _find_download_and_install_concurrently(
+        self,
+        mods: Sequence[Mod],
+        mods_not_found: List[ModNotFoundException],
+        corrupt_mods: List[Mod],
+        skipped_mods: List[Mod],
+    ) -> None:
+        """Same as the download queue, but runs config.jobs mods at the same time.
+        Dependencies are added to the pool as soon as the mod requiring them has been downloaded.
+        A dependency that several mods require is only added once, so it's never downloaded by two workers at once"""
+        with ThreadedPrint(), ThreadPoolExecutor(max_workers=config.jobs) as executor:
+            # Keys of all mods that have been added to the pool, see _queue_keys()
+            queued: Set[str] = set()
+            submitted: Dict["Future[List[Mod]]", Mod] = {}
+
+            def submit(mod: Mod) -> "Future[List[Mod]]":
+                queued.update(Download._queue_keys(mod))
+                future = executor.submit(
+                    self._find_download_and_install_buffered, mod, mods_not_found, corrupt_mods, skipped_mods
+                )
+                submitted[future] = mod
+                return future
+
+            running: Set["Future[List[Mod]]"] = set(submit(mod) for mod in mods)
+            while len(running) > 0:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # The sites of the mod are known now, so a dependency on it isn't added again
+                    queued.update(Download._queue_keys(submitted.pop(future)))
+                    for dependency in future.result():
+                        if queued.isdisjoint(Download._queue_keys(dependency)):
+                            running.add(submit(dependency))
+
+    @staticmethod
+    def _queue_keys(mod: Mod) -> Set[str]:
+        """Identifiers of the mod on each site where its site id is known"""
+        return set(f"{site.name.value}:{site.id}" for site in (mod.sites or {}).values() if site.id)
+
+    def _find_download_and_install_buffered(
+        self,
+        mod: Mod,
+        mods_not_found: List[ModNotFoundException],
+        corrupt_mods: List[Mod],
+        skipped_mods: List[Mod],
+    ) -> List[Mod]:
+        with ThreadedPrint.buffer():
+            return self._find_download_and_install_mod(mod, mods_not_found, corrupt_mods, skipped_mods)
+
+    def _find_download_and_install_mod(
+        self,
+        mod: Mod,
+        mods_not_found: List[ModNotFoundException],
+        corrupt_mods: List[Mod],
+        skipped_mods: List[Mod],
+    ) -> List[Mod]:
+        """Find, download, and install the latest version of a mod.
+
+        Returns:
+            Dependencies of the downloaded version that should be downloaded as well
+        """
+        dependencies: List[Mod] = []
+        # Don't start on more mods when the deadline has passed, they're listed at the end
+        if Http.is_past_deadline():
+            skipped_mods.append(mod)
+            return dependencies
+
+        # Time spent on the mod, and its requests, are shown in the request summary
+        with http_stats.mod(mod.id):
             try:
                 TealPrint.info(mod.id, color=LogColors.header, push_indent=True)
-                mod.sites = self._finder.find_mod(mod)
-
-                versions = self._repo.get_versions(mod)
-                latest_version = LatestVersionFinder.find_latest_version(mod, versions, filter=True)
+                known_version = self._known_versions.get(mod.file) if mod.file else None
+                if known_version:
+                    TealPrint.verbose("🔍 Found by file hash")
+                    mod.sites = Download._add_site(mod.sites, known_version)
+                    latest_version = LatestVersionFinder.find_latest_version(mod, [known_version], filter=True)
+                else:
+                    if mod.file not in self._identified_files:
+                        mod.sites = self._finder.find_mod(mod)
+                    latest_version = self._repo.get_latest_version(mod)
 
                 if latest_version:
                     # Different version
@@ -44,11 +134,11 @@ class Download:
 
                         # Add possible dependencies to download queue
                         if ok:
-                            download_queue.extend(self._get_dependencies(latest_version))
+                            dependencies = self._get_dependencies(latest_version)
                     else:
                         self.on_no_change(mod)
                 else:
-                    self.on_version_not_found(mod, versions)
+                    self.on_version_not_found(mod)
 
             except ModNotFoundException as e:
                 TealPrint.warning("🔺 Mod not found on any site...")
@@ -56,13 +146,27 @@ class Download:
             except MaxRetriesExceeded:
                 TealPrint.warning("🔺 Max retries exceeded. Skipping...")
                 mods_not_found.append(ModNotFoundException(mod))
+            except NotCached as e:
+                TealPrint.warning(f"🔺 Not cached, skipping when offline: {e.url}")
+                mods_not_found.append(ModNotFoundException(mod))
+            except DeadlineExceeded:
+                TealPrint.warning("⏰ Skipped due to deadline")
+                skipped_mods.append(mod)
             except ModFileInvalid:
                 TealPrint.error("❌ Corrupted file.")
                 corrupt_mods.append(mod)
             finally:
-                TealPrint.pop_indent()
+                # Indents pushed by the finder aren't popped when it raises, every mod starts at the top level
+                TealPrint.clear_indent()
+
+        return dependencies
 
-        self._print_errors(mods_not_found, corrupt_mods)
+    @staticmethod
+    def _add_site(sites: Dict[Sites, Site], version: VersionInfo) -> Dict[Sites, Site]:
+        """Add the site of the version to the sites of the mod, keeping the slug if it's already known"""
+        existing = sites.get(version.site_name) if sites else None
+        slug = existing.slug if existing else None
+        return {**(sites or {}), version.site_name: Site(version.site_name, version.site_id, slug)}
 
     def _download_latest_version(self, mod: Mod, latest_version: VersionInfo) -> bool:
         """Downloads and saves the latest version of the mod."""
@@ -73,7 +177,7 @@ class Download:
             self._repo.update_mod(downloaded_mod)
             self.on_new_version_downloaded(mod, downloaded_mod)
             return True
-        except (DownloadFailed, MaxRetriesExceeded) as e:
+        except (DownloadFailed, MaxRetriesExceeded, NotCached) as e:
             TealPrint.error(
                 f"🔺 Download failed from {latest_version.site_name}",
             )
@@ -85,25 +189,28 @@ class Download:
             raise e
 
     def _get_dependencies(self, latest_version: VersionInfo) -> List[Mod]:
-        if latest_version.dependencies:
-            TealPrint.info("Add dependencies to download queue", push_indent=True)
-
         mods: List[Mod] = []
+        if not latest_version.dependencies and not latest_version.dependency_versions:
+            return mods
 
-        for site, site_ids in latest_version.dependencies.items():
+        TealPrint.info("Add dependencies to download queue", push_indent=True)
+
+        # Only the downloaded version's dependencies are looked up, all of them in as few requests as possible
+        dependencies = self._finder.get_dependencies(latest_version)
+        for site, site_ids in dependencies.items():
+            found = self._finder.get_mods_info(site, site_ids)
             for site_id in site_ids:
-                mod = self._finder.get_mod_info(site, site_id)
+                mod = found.get(site_id)
                 if mod:
                     TealPrint.info(f"➕ {mod.name}")
                     mods.append(mod)
                 else:
                     TealPrint.warning(f"Dependency with id '{site_id}' not found on {site.value}")
 
-        if latest_version.dependencies:
-            TealPrint.pop_indent()
+        TealPrint.pop_indent()
         return mods
 
-    def _print_errors(self, mods_not_found, corrupt_mods) -> None:
+    def _print_errors(self, mods_not_found, corrupt_mods, skipped_mods) -> None:
         if len(mods_not_found) > 0:
             TealPrint.warning(
                 f"🔺 {len(mods_not_found)} mods not found",
@@ -124,13 +231,23 @@ class Download:
                 TealPrint.info(f"{mod.name}")
             TealPrint.pop_indent()
 
+        if len(skipped_mods) > 0:
+            TealPrint.warning(
+                f"⏰ {len(skipped_mods)} mods skipped due to deadline",
+                push_indent=True,
+                color=LogColors.skip + LogColors.header,
+            )
+            for mod in skipped_mods:
+                TealPrint.info(f"{mod.name or mod.id}")
+            TealPrint.pop_indent()
+
     def on_new_version_downloaded(self, old: Mod, new: Mod) -> None:
         raise NotImplementedError("Not implemented in subclass")
 
     def on_no_change(self, mod: Mod) -> None:
         raise NotImplementedError("Not implemented in subclass")
 
-    def on_version_not_found(self, mod: Mod, versions: List[VersionInfo]) -> None:
+    def on_version_not_found(self, mod: Mod) -> None:
         raise NotImplementedError("Not implemented in subclass")
 
     def _update_mod_from_file(self, mod: Mod) -> None:
@@ -142,7 +259,9 @@ class Download:
                 mod.version = installed_mod.version
 
     def _download(self, mod: ModArg, latest_version: VersionInfo) -> Mod:
-        downloaded_file = self._repo.download(latest_version.download_url, latest_version.filename)
+        downloaded_file = self._repo.download(
+            latest_version.download_url, latest_version.filename, latest_version.hashes
+        )
         sites = mod.sites
         if not sites:
             sites = {}
@@ -1,15 +1,19 @@
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Mapping, Optional
 
 from ...core.entities.mod import Mod
 from ...core.entities.version_info import VersionInfo
 
 
 class DownloadRepo:
-    def get_versions(self, mod: Mod) -> List[VersionInfo]:
+    def get_versions(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
         raise NotImplementedError()
 
-    def download(self, url: str, filename: str = "") -> Path:
+    def get_latest_version(self, mod: Mod) -> Optional[VersionInfo]:
+        """Latest version of the mod on all sites that isn't filtered out, None if all versions were filtered out"""
+        raise NotImplementedError()
+
+    def download(self, url: str, filename: str = "", hashes: Mapping[str, str] = {}) -> Path:
         raise NotImplementedError()
 
     def update_mod(self, mod: Mod) -> None:
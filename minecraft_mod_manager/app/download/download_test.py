@@ -1,15 +1,18 @@
+import time
 from pathlib import Path
 from typing import Any, List
 
 import pytest
-from mockito import mock, unstub, verifyStubbedInvocationsAreUsed, when
+from mockito import mock, unstub, verify, verifyStubbedInvocationsAreUsed, when
 
+from ...config import config
 from ...core.entities.mod import Mod
 from ...core.entities.mod_loaders import ModLoaders
 from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import Stabilities, VersionInfo
 from ...core.errors.mod_file_invalid import ModFileInvalid
 from ...gateways.api.mod_finder import ModFinder
+from ...gateways.http_stats import http_stats
 from .download import Download
 from .download_repo import DownloadRepo
 
@@ -36,6 +39,27 @@ class T:
         T.input = input
 
 
+@pytest.fixture(params=[1, 4])
+def jobs(request):
+    """Run the test both one mod at a time and concurrently"""
+    config.jobs = request.param
+    yield request.param
+    config.jobs = 1
+
+
+@pytest.fixture
+def deadline():
+    yield
+    config.deadline = None
+
+
+@pytest.fixture(autouse=True)
+def stats():
+    """Don't leak the time spent on the mods to the other tests"""
+    yield
+    http_stats.clear()
+
+
 @pytest.mark.parametrize(
     "name,prepare_function",
     [
@@ -43,7 +67,7 @@ class T:
             "Call on_new_version_downloaded() when found",
             lambda: (
                 when(T.mock_repo).download(...).thenReturn(Path("mod.jar")),
-                when(T.mock_repo).get_versions(...).thenReturn([T.version_info]),
+                when(T.mock_repo).get_latest_version(...).thenReturn(T.version_info),
                 when(T.mock_repo).get_mod_from_file(...).thenReturn(Mod("found", "")),
                 when(T.mock_repo).update_mod(...),
                 when(T.download).on_new_version_downloaded(...),
@@ -53,7 +77,7 @@ class T:
             "Remove downloaded file when invalid mod file",
             lambda: (
                 when(T.mock_repo).download(...).thenReturn(Path("mod.jar")),
-                when(T.mock_repo).get_versions(...).thenReturn([T.version_info]),
+                when(T.mock_repo).get_latest_version(...).thenReturn(T.version_info),
                 when(T.mock_repo).get_mod_from_file(...).thenRaise(ModFileInvalid(Path("mod.jar"))),
                 when(T.mock_repo).remove_mod_file(...),
             ),
@@ -62,7 +86,7 @@ class T:
             "Update mod_id after download",
             lambda: (
                 when(T.mock_repo).download(...).thenReturn(Path("mod.jar")),
-                when(T.mock_repo).get_versions(...).thenReturn([T.version_info]),
+                when(T.mock_repo).get_latest_version(...).thenReturn(T.version_info),
                 when(T.mock_repo).update_mod(
                     Mod(
                         "validid",
@@ -82,28 +106,28 @@ class T:
             lambda: (
                 when(T.mock_repo).download(...).thenReturn(Path("mod.jar")),
                 when(T.mock_repo)
-                .get_versions(T.input[0])
+                .get_latest_version(T.input[0])
                 .thenReturn(
-                    [
-                        VersionInfo(
-                            stability=Stabilities.release,
-                            mod_loaders=set([ModLoaders.fabric]),
-                            site=Sites.curse,
-                            upload_time=100,
-                            minecraft_versions=[],
-                            download_url="",
-                            dependencies={Sites.curse: ["123", "456"]},
-                            filename="parent.jar",
-                            number="1.0.1",
-                        )
-                    ]
+                    VersionInfo(
+                        stability=Stabilities.release,
+                        mod_loaders=set([ModLoaders.fabric]),
+                        site=Sites.curse,
+                        upload_time=100,
+                        minecraft_versions=[],
+                        download_url="",
+                        dependencies={Sites.curse: ["123", "456"]},
+                        filename="parent.jar",
+                        number="1.0.1",
+                    )
                 ),
                 when(T.mock_repo)
-                .get_versions(Mod("123", "123 Name", {Sites.curse: Site(Sites.curse, "", "")}))
-                .thenReturn([T.version_info]),
-                when(T.mock_finder).get_mod_info(Sites.curse, "123").thenReturn(Mod("123", "123 Name")),
-                when(T.mock_finder).get_mod_info(Sites.curse, "456").thenReturn(None),
-                when(T.mock_repo).download("", "parent.jar").thenReturn(Path("parent.jar")),
+                .get_latest_version(Mod("123", "123 Name", {Sites.curse: Site(Sites.curse, "", "")}))
+                .thenReturn(T.version_info),
+                when(T.mock_finder).get_dependencies(...).thenReturn({Sites.curse: ["123", "456"]}),
+                when(T.mock_finder)
+                .get_mods_info(Sites.curse, ["123", "456"])
+                .thenReturn({"123": Mod("123", "123 Name")}),
+                when(T.mock_repo).download("", "parent.jar", {}).thenReturn(Path("parent.jar")),
                 when(T.mock_repo).get_mod_from_file("mod.jar").thenReturn(Mod("123", "123 Name")),
                 when(T.mock_repo).get_mod_from_file("parent.jar").thenReturn(T.input[0]),
                 when(T.mock_repo).update_mod(...),
@@ -114,7 +138,7 @@ class T:
             "Skip downloading if the upload date is same as the current version",
             lambda: (
                 T.set_input([Mod("123", "", upload_time=100)]),
-                when(T.mock_repo).get_versions(...).thenReturn([T.version_info]),
+                when(T.mock_repo).get_latest_version(...).thenReturn(T.version_info),
                 when(T.download).on_no_change(...),
             ),
         ),
@@ -123,7 +147,7 @@ class T:
             lambda: (
                 T.set_input([Mod("123", "", upload_time=200)]),
                 when(T.mock_repo).download(...).thenReturn(Path("mod.jar")),
-                when(T.mock_repo).get_versions(...).thenReturn([T.version_info]),
+                when(T.mock_repo).get_latest_version(...).thenReturn(T.version_info),
                 when(T.mock_repo).get_mod_from_file(...).thenReturn(Mod("found", "", upload_time=200)),
                 when(T.mock_repo).update_mod(...),
                 when(T.download).on_new_version_downloaded(...),
@@ -131,7 +155,7 @@ class T:
         ),
     ],
 )
-def test_find_download_and_install(name, prepare_function):
+def test_find_download_and_install(name, prepare_function, jobs):
     print(name)
 
     T.mock_repo = mock(DownloadRepo)
@@ -144,3 +168,55 @@ def test_find_download_and_install(name, prepare_function):
 
     verifyStubbedInvocationsAreUsed()
     unstub()
+
+
+def test_skip_mods_when_past_deadline(jobs, deadline):
+    config.deadline = time.monotonic() - 1
+    mock_repo = mock(DownloadRepo)
+    mock_finder = mock(ModFinder)
+    download = Download(mock_repo, mock_finder)
+
+    download.find_download_and_install([Mod("carpet", "Carpet"), Mod("litematica", "Litematica")])
+
+    verify(mock_finder, times=0).find_mod(...)
+    verify(mock_repo, times=0).get_latest_version(...)
+    unstub()
+
+
+def test_dependency_of_several_mods_is_only_downloaded_once_concurrently(jobs):
+    mock_repo = mock(DownloadRepo)
+    mock_finder = mock(ModFinder)
+    download = Download(mock_repo, mock_finder)
+    parent = VersionInfo(
+        stability=Stabilities.release,
+        mod_loaders=set([ModLoaders.fabric]),
+        site=Sites.curse,
+        upload_time=100,
+        minecraft_versions=[],
+        download_url="",
+        dependencies={Sites.curse: ["123"]},
+        number="1.0.0",
+    )
+    looked_up: List[str] = []
+
+    def get_latest_version(mod: Mod) -> VersionInfo:
+        looked_up.append(mod.name)
+        return T.version_info if mod.name == "Dependency" else parent
+
+    when(mock_finder).find_mod(...).thenReturn({Sites.curse: Site(Sites.curse, "", "")})
+    when(mock_finder).get_dependencies(...).thenReturn({Sites.curse: ["123"]})
+    when(mock_finder).get_mods_info(Sites.curse, ["123"]).thenAnswer(
+        lambda *args: {"123": Mod("", "Dependency", {Sites.curse: Site(Sites.curse, "123", "dependency")})}
+    )
+    when(mock_repo).get_latest_version(...).thenAnswer(get_latest_version)
+    when(mock_repo).download(...).thenReturn(Path("mod.jar"))
+    when(mock_repo).get_mod_from_file(...).thenReturn(Mod("found", ""))
+    when(mock_repo).update_mod(...)
+    when(download).on_new_version_downloaded(...)
+
+    download.find_download_and_install([Mod("carpet", "Carpet"), Mod("litematica", "Litematica")])
+
+    unstub()
+    if jobs > 1:
+        assert looked_up.count("Dependency") == 1
+    assert sorted(set(looked_up)) == ["Carpet", "Dependency", "Litematica"]
@@ -79,9 +79,12 @@ class Install(Download):
     def on_no_change(self, mod: Mod) -> None:
         TealPrint.verbose("🔵 Already installed and up-to-date")
 
-    def on_version_not_found(self, mod: Mod, versions: List[VersionInfo]) -> None:
+    def on_version_not_found(self, mod: Mod) -> None:
         TealPrint.info("🟨 All versions were filtered out", color=LogColors.skip, push_indent=True)
 
+        # Get all versions, without letting the site filter them, to tell why they were filtered out
+        versions = self._install_repo.get_versions(mod, filter=False)
+
         latest_unfiltered = LatestVersionFinder.find_latest_version(mod, versions, filter=False)
         if latest_unfiltered:
             Install._print_latest_unfiltered(mod, latest_unfiltered)
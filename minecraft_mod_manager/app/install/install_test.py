@@ -1,5 +1,5 @@
 import pytest
-from mockito import mock, unstub, verifyStubbedInvocationsAreUsed, when
+from mockito import mock, unstub, verify, verifyStubbedInvocationsAreUsed, when
 
 from ...core.entities.mod import Mod, ModArg
 from ...core.entities.mod_loaders import ModLoaders
@@ -96,3 +96,14 @@ def test_dont_set_mod_loader_when_no_majority(mock_repo, mock_finder):
 
     verifyStubbedInvocationsAreUsed()
     unstub()
+
+
+def test_get_unfiltered_versions_when_all_versions_were_filtered_out(mock_repo, mock_finder):
+    mod = Mod("carpet", "Carpet")
+    install = Install(mock_repo, mock_finder)
+    when(mock_repo).get_versions(mod, filter=False).thenReturn([])
+
+    install.on_version_not_found(mod)
+
+    verify(mock_repo).get_versions(mod, filter=False)
+    unstub()
@@ -1,11 +1,13 @@
-from typing import List, Sequence
+from typing import Dict, List, Sequence
 
 from tealprint import TealPrint
 
 from ...config import config
 from ...core.entities.mod import Mod, ModArg
 from ...core.entities.version_info import VersionInfo
+from ...core.utils.latest_version_finder import LatestVersionFinder
 from ...gateways.api.mod_finder import ModFinder
+from ...gateways.http import DeadlineExceeded, MaxRetriesExceeded, NotCached
 from ...utils.log_colors import LogColors
 from ..download.download import Download
 from .update_repo import UpdateRepo
@@ -28,8 +30,82 @@ class Update(Download):
                 if mod:
                     mods_to_update.append(mod)
 
+        self._identify_by_hash(mods_to_update)
+        self._find_versions_by_hash(mods_to_update)
+        self._find_versions_in_bulk(mods_to_update)
         self.find_download_and_install(mods_to_update)
 
+    def _identify_by_hash(self, mods: Sequence[Mod]) -> None:
+        """Find the sites of all mods that haven't been found before, at once by their file hashes.
+        Only mods that aren't found this way are searched for by their name"""
+        unknown_mods = [mod for mod in mods if mod.file and not mod.sites]
+        if len(unknown_mods) == 0:
+            return
+
+        try:
+            sites = self._update_repo.find_sites_by_hash(unknown_mods)
+        except (MaxRetriesExceeded, NotCached, DeadlineExceeded) as e:
+            TealPrint.verbose(f"Couldn't identify mods by their file hashes, searching for each mod instead: {e}")
+            return
+
+        for mod in unknown_mods:
+            mod_sites = sites.get(mod.file) if mod.file else None
+            if mod_sites:
+                mod.sites = mod_sites
+                self._identified_files.add(mod.file)
+                self._update_repo.update_mod(mod)
+
+        TealPrint.verbose(f"Identified {len(self._identified_files)} of {len(unknown_mods)} mods by their file hashes")
+
+    def _find_versions_by_hash(self, mods: Sequence[Mod]) -> None:
+        """Look up the latest versions of all mods at once by their file hashes.
+        Mods that aren't found this way are searched for one by one"""
+        try:
+            versions = self._update_repo.get_latest_versions_by_hash(mods)
+        except (MaxRetriesExceeded, NotCached, DeadlineExceeded) as e:
+            TealPrint.verbose(f"Couldn't look up mods by their file hashes, searching for each mod instead: {e}")
+            return
+
+        found = self._add_known_versions(mods, versions)
+        TealPrint.verbose(f"Found {found} of {len(mods)} mods by their file hashes")
+
+    def _find_versions_in_bulk(self, mods: Sequence[Mod]) -> None:
+        """Look up the latest versions of the remaining mods with known sites, several mods per request
+        on the sites that support it. Mods that aren't found this way are searched for one by one"""
+        remaining = [mod for mod in mods if mod.file and mod.sites and mod.file not in self._known_versions]
+        if len(remaining) == 0:
+            return
+
+        try:
+            versions = self._update_repo.get_latest_versions(remaining)
+        except (MaxRetriesExceeded, NotCached, DeadlineExceeded) as e:
+            TealPrint.verbose(f"Couldn't look up several mods at once, searching for each mod instead: {e}")
+            return
+
+        found = self._add_known_versions(remaining, versions)
+        TealPrint.verbose(f"Found {found} of {len(remaining)} remaining mods by looking up several at once")
+
+    def _add_known_versions(self, mods: Sequence[Mod], versions: Dict[str, VersionInfo]) -> int:
+        """Use the versions instead of searching for the mods.
+
+        Returns:
+            Number of mods that got a known version
+        """
+        found = 0
+        for mod in mods:
+            version = versions.get(mod.file) if mod.file else None
+            if not version:
+                continue
+
+            # Only use the version if it's what searching for the mod would have found
+            if LatestVersionFinder.is_filtered(mod, version) or version.upload_time < mod.upload_time:
+                continue
+
+            version.name = mod.name
+            self._known_versions[mod.file] = version
+            found += 1
+        return found
+
     def on_new_version_downloaded(self, old: Mod, new: Mod) -> None:
         if new.file:
             if Update._has_downloaded_new_file(old, new):
@@ -41,7 +117,7 @@ class Update(Download):
     def on_no_change(self, mod: Mod) -> None:
         TealPrint.verbose("🔵 Already up-to-date")
 
-    def on_version_not_found(self, mod: Mod, versions: List[VersionInfo]) -> None:
+    def on_version_not_found(self, mod: Mod) -> None:
         TealPrint.verbose("🟨 No new version found", color=LogColors.skip)
 
     @staticmethod
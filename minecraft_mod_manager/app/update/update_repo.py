@@ -1,12 +1,35 @@
-from typing import Optional, Sequence
+from typing import Dict, Optional, Sequence
 
 from ...core.entities.mod import Mod
+from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import VersionInfo
 from ..download.download_repo import DownloadRepo
 
 
 class UpdateRepo(DownloadRepo):
-    def get_latest_version(self, mod: Mod) -> VersionInfo:
+    def find_sites_by_hash(self, mods: Sequence[Mod]) -> Dict[str, Dict[Sites, Site]]:
+        """Identify the installed mods by the hashes of their files.
+
+        Returns:
+            Sites of the mod by the filename of the installed mod. Mods that aren't recognized are left out
+        """
+        raise NotImplementedError()
+
+    def get_latest_versions_by_hash(self, mods: Sequence[Mod]) -> Dict[str, VersionInfo]:
+        """Look up the latest versions of the installed mods by the hashes of their files.
+
+        Returns:
+            Latest version by the filename of the installed mod. Mods that aren't recognized are left out
+        """
+        raise NotImplementedError()
+
+    def get_latest_versions(self, mods: Sequence[Mod]) -> Dict[str, VersionInfo]:
+        """Look up the latest versions of mods with known site ids, several mods at once.
+        Only mods whose sites all support it are looked up this way.
+
+        Returns:
+            Latest version by the filename of the installed mod. Mods that aren't looked up are left out
+        """
         raise NotImplementedError()
 
     def get_all_mods(self) -> Sequence[Mod]:
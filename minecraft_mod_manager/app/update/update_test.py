@@ -1,11 +1,13 @@
+from pathlib import Path
 from typing import List, Union
 
 import pytest
-from mockito import mock, unstub, verifyStubbedInvocationsAreUsed, when
+from mockito import mock, unstub, verify, verifyStubbedInvocationsAreUsed, when
 
 from ...config import config
 from ...core.entities.mod import Mod
-from ...core.entities.sites import Sites
+from ...core.entities.mod_loaders import ModLoaders
+from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import Stabilities, VersionInfo
 from ...gateways.api.mod_finder import ModFinder
 from .update import Update
@@ -26,6 +28,7 @@ def test_use_all_installed_mods_when_no_mods_are_specified(mock_repo, mock_finde
     mods: List[Mod] = [Mod("1", "one"), Mod("2", "two")]
     update = Update(mock_repo, mock_finder)
     when(mock_repo, mock_finder).get_all_mods().thenReturn(mods)
+    when(mock_repo).get_latest_versions_by_hash(...).thenReturn({})
     when(update).find_download_and_install(...)
 
     update.execute([])
@@ -36,6 +39,7 @@ def test_use_all_installed_mods_when_no_mods_are_specified(mock_repo, mock_finde
 
 def test_call_find_download_and_install(mock_repo, mock_finder):
     when(mock_repo, mock_finder).get_all_mods().thenReturn([])
+    when(mock_repo).get_latest_versions_by_hash(...).thenReturn({})
     update = Update(mock_repo, mock_finder)
     when(update).find_download_and_install(...)
 
@@ -122,3 +126,136 @@ def test_on_version_found(
     config.pretend = False
     verifyStubbedInvocationsAreUsed()
     unstub()
+
+
+def modrinth_version(stability: Stabilities, upload_time: int) -> VersionInfo:
+    return VersionInfo(
+        stability=stability,
+        mod_loaders=set([ModLoaders.fabric]),
+        site=Sites.modrinth,
+        site_id="AAAAAAAA",
+        upload_time=upload_time,
+        minecraft_versions=[],
+        download_url="",
+        filename="carpet-2.0.0.jar",
+        number="2.0.0",
+    )
+
+
+def test_mods_found_by_file_hash_are_not_searched_for(mock_repo, mock_finder):
+    mod = Mod("carpet", "Carpet", file="carpet-1.0.0.jar", upload_time=1)
+    when(mock_repo).get_all_mods().thenReturn([mod])
+    when(mock_repo).find_sites_by_hash([mod]).thenReturn({})
+    when(mock_repo).get_latest_versions_by_hash([mod]).thenReturn(
+        {"carpet-1.0.0.jar": modrinth_version(Stabilities.release, 2)}
+    )
+    when(mock_repo).download(...).thenReturn(Path("carpet-2.0.0.jar"))
+    when(mock_repo).get_mod_from_file(...).thenReturn(None)
+    when(mock_repo).update_mod(...)
+    when(mock_repo).remove_mod_file("carpet-1.0.0.jar")
+    update = Update(mock_repo, mock_finder)
+
+    update.execute([])
+
+    verify(mock_finder, times=0).find_mod(...)
+    verify(mock_repo, times=0).get_latest_version(...)
+    verify(mock_repo).update_mod(
+        Mod(
+            "carpet",
+            "carpet",
+            sites={Sites.modrinth: Site(Sites.modrinth, "AAAAAAAA")},
+            version="2.0.0",
+            file="carpet-2.0.0.jar",
+            upload_time=2,
+        )
+    )
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+
+@pytest.mark.parametrize(
+    "name,version",
+    [
+        ("Not found by hash", None),
+        ("Filtered by stability", modrinth_version(Stabilities.beta, 2)),
+        ("Older than the installed version", modrinth_version(Stabilities.release, 0)),
+    ],
+)
+def test_search_for_mods_not_found_by_file_hash(name, version, mock_repo, mock_finder):
+    print(name)
+    mod = Mod("carpet", "Carpet", file="carpet-1.0.0.jar", upload_time=1)
+    versions = {"carpet-1.0.0.jar": version} if version else {}
+    when(mock_repo).get_all_mods().thenReturn([mod])
+    when(mock_repo).find_sites_by_hash([mod]).thenReturn({})
+    when(mock_repo).get_latest_versions_by_hash([mod]).thenReturn(versions)
+    when(mock_finder).find_mod(mod).thenReturn({})
+    when(mock_repo).get_latest_version(mod).thenReturn(None)
+    update = Update(mock_repo, mock_finder)
+
+    update.execute([])
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+
+def test_mods_identified_by_file_hash_are_saved_and_not_searched_for(mock_repo, mock_finder):
+    mod = Mod("carpet", "Carpet", file="carpet-1.0.0.jar", upload_time=1)
+    sites = {Sites.modrinth: Site(Sites.modrinth, "AAAAAAAA", "carpet")}
+    when(mock_repo).get_all_mods().thenReturn([mod])
+    when(mock_repo).find_sites_by_hash([mod]).thenReturn({"carpet-1.0.0.jar": sites})
+    when(mock_repo).update_mod(...)
+    when(mock_repo).get_latest_versions_by_hash([mod]).thenReturn({})
+    when(mock_repo).get_latest_versions([mod]).thenReturn({})
+    when(mock_repo).get_latest_version(mod).thenReturn(None)
+    update = Update(mock_repo, mock_finder)
+
+    update.execute([])
+
+    verify(mock_finder, times=0).find_mod(...)
+    verify(mock_repo).update_mod(Mod("carpet", "Carpet", sites=sites, file="carpet-1.0.0.jar", upload_time=1))
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+
+def test_only_identify_mods_by_file_hash_that_have_not_been_found_before(mock_repo, mock_finder):
+    mod = Mod(
+        "carpet",
+        "Carpet",
+        sites={Sites.modrinth: Site(Sites.modrinth, "AAAAAAAA", "carpet")},
+        file="carpet-1.0.0.jar",
+        upload_time=1,
+    )
+    when(mock_repo).get_all_mods().thenReturn([mod])
+    when(mock_repo).get_latest_versions_by_hash([mod]).thenReturn({})
+    when(mock_repo).get_latest_versions([mod]).thenReturn({})
+    when(mock_finder).find_mod(mod).thenReturn(mod.sites)
+    when(mock_repo).get_latest_version(mod).thenReturn(None)
+    update = Update(mock_repo, mock_finder)
+
+    update.execute([])
+
+    verify(mock_repo, times=0).find_sites_by_hash(...)
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+
+def test_mods_found_in_bulk_are_not_searched_for(mock_repo, mock_finder):
+    sites = {Sites.curse: Site(Sites.curse, "349239", "carpet")}
+    found = Mod("carpet", "Carpet", sites=sites, file="carpet-1.0.0.jar", upload_time=1)
+    not_found = Mod("minimap", "Minimap", sites={Sites.curse: Site(Sites.curse, "1", "minimap")}, file="minimap.jar")
+    latest = version_info("carpet-2.0.0.jar")
+    latest.upload_time = 2
+    when(mock_repo).get_all_mods().thenReturn([found, not_found])
+    when(mock_repo).get_latest_versions_by_hash(...).thenReturn({})
+    when(mock_repo).get_latest_versions([found, not_found]).thenReturn({"carpet-1.0.0.jar": latest})
+    when(mock_finder).find_mod(not_found).thenReturn(not_found.sites)
+    when(mock_repo).get_latest_version(not_found).thenReturn(None)
+    update = Update(mock_repo, mock_finder)
+    when(update)._download_latest_version(found, latest).thenReturn(False)
+
+    update.execute([])
+
+    verify(mock_finder, times=0).find_mod(found)
+    verify(mock_repo, times=0).get_latest_version(found)
+    verifyStubbedInvocationsAreUsed()
+    unstub()
@@ -1,6 +1,8 @@
+import os
+import time
 from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
-from typing import Any, List, Literal, Union
+from typing import Any, Dict, List, Literal, Union
 
 from tealprint import TealConfig, TealLevel
 
@@ -20,6 +22,46 @@ class Config:
         self.action: Literal["install", "update", "configure", "list"]
         self.arg_mods: List[ModArg] = []
         self.filter = Filter()
+        self.jobs: int = 1
+        """How many mods to find and download at the same time"""
+        self.pool_size: int = 10
+        """Max number of keep-alive connections per host"""
+        self.rate_limits: Dict[str, int] = {"api.modrinth.com": 300}
+        """Max requests per minute for each host"""
+        self.connect_timeout: float = 10
+        """Seconds to wait for a connection to a host"""
+        self.read_timeout: float = 60
+        """Seconds to wait for data from a host before retrying the request"""
+        self.deadline: Union[float, None] = None
+        """time.monotonic() when the run has to be finished. Mods that haven't completed by then are skipped"""
+        self.url_overrides: Dict[str, str] = {}
+        """Send requests for these base URLs to another base URL instead, e.g. to a local stand-in server"""
+        self.cache: bool = True
+        """Use the persistent API response cache"""
+        self.clear_cache: bool = False
+        self.offline: bool = False
+        """Only use cached API responses and the jar store, never send any requests"""
+        self.jar_store: Union[Path, None] = None
+        """Directory of jars shared between several mods directories"""
+        self.stats_json: Union[Path, None] = None
+        """File to write request statistics of the run to"""
+        self.memory_cache_size: int = 64 * 1024 * 1024
+        """Max approximate size in bytes of API responses kept in memory"""
+        self.memory_cache_ttl: float = 60 * 60
+        """Seconds before an API response kept in memory expires"""
+        self.project_cache_ttl: float = 24 * 60 * 60
+        """Seconds before a project, or that a project doesn't exist, is looked up again in the next run"""
+        self.response_cache_max_age: float = 30 * 24 * 60 * 60
+        """Seconds before an API response that hasn't been used is removed from the persistent cache"""
+        self.curse_api_key: Union[str, None] = None
+        """Key for the CurseForge API, mods are only searched for and updated on CurseForge when it's set"""
+        self.project_index: Union[Path, None] = None
+        """Directory of the local index of popular Modrinth projects, mods are found in it before searching online.
+        Shared between all mods directories, in the user's cache directory by default"""
+        self.project_index_size: int = 5000
+        """Number of the most downloaded projects to put in the index when it's built"""
+        self.project_index_ttl: float = 24 * 60 * 60
+        """Seconds before the index is refreshed with the projects that have been updated since"""
 
         try:
             self.app_version: str = version(self.app_name)
@@ -56,6 +98,40 @@ class Config:
         if args.mod_loader:
             self.filter.loader = ModLoaders.from_name(args.mod_loader)
 
+        if args.jobs:
+            self.jobs = args.jobs
+
+        if args.pool_size:
+            self.pool_size = args.pool_size
+        else:
+            self.pool_size = max(self.pool_size, self.jobs)
+
+        if args.connect_timeout:
+            self.connect_timeout = args.connect_timeout
+        if args.read_timeout:
+            self.read_timeout = args.read_timeout
+        if args.deadline:
+            self.deadline = time.monotonic() + args.deadline
+
+        self.cache = not args.no_cache
+
+        if args.jar_store:
+            self.jar_store = Path(args.jar_store)
+        self.clear_cache = args.clear_cache
+        self.offline = args.offline
+        if args.project_index is not None:
+            self.project_index = Path(args.project_index) if args.project_index else Config.user_cache_dir()
+        self.curse_api_key = args.curse_api_key or os.environ.get("CURSEFORGE_API_KEY") or None
+
+        if args.stats_json:
+            self.stats_json = Path(args.stats_json)
+
+    @staticmethod
+    def user_cache_dir() -> Path:
+        """$XDG_CACHE_HOME/minecraft-mod-manager, or ~/.cache/minecraft-mod-manager"""
+        cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home().joinpath(".cache")
+        return Path(cache_home).joinpath(config.app_name)
+
 
 class Filter:
     def __init__(self) -> None:
@@ -33,7 +33,10 @@ class VersionInfo:
         number: str,
         filename: str = "",
         mod_name: str = "",
+        site_id: str = "",
         dependencies: Dict[Sites, List[str]] = {},
+        dependency_versions: Dict[Sites, List[str]] = {},
+        hashes: Dict[str, str] = {},
     ) -> None:
         self.stability = stability
         self.mod_loaders = mod_loaders
@@ -44,7 +47,15 @@ class VersionInfo:
         self.number = number
         self.filename = filename
         self.name = mod_name
+        self.site_id = site_id
+        """Id of the mod on the site"""
         self.dependencies = dependencies
+        """Mod ids of the required dependencies"""
+        self.dependency_versions = dependency_versions
+        """Version ids of required dependencies that don't specify their mod id.
+        Only looked up when the version is downloaded, see Api.get_dependencies()"""
+        self.hashes = hashes
+        """Hashes of the file by algorithm, e.g. sha1 and sha512"""
 
     def __str__(self) -> str:
         return f"{self.minecraft_versions}; uploaded {self.upload_time}"
@@ -63,7 +74,10 @@ class VersionInfo:
             self.number,
             self.filename,
             self.name,
+            self.site_id,
             self.dependencies,
+            self.dependency_versions,
+            self.hashes,
         )
 
     def __eq__(self, other) -> bool:
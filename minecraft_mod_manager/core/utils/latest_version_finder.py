@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Iterable, List, Union
 
 from ...config import config
 from ..entities.mod import Mod
@@ -18,6 +18,15 @@ class LatestVersionFinder:
 
         return latest_version
 
+    @staticmethod
+    def find_newest_version(mod: Mod, versions: Iterable[VersionInfo]) -> Union[VersionInfo, None]:
+        """Find the latest version that isn't filtered out, from versions that are sorted newest first.
+        Stops at the first version that is kept, so the rest of the versions don't have to be created"""
+        for version in versions:
+            if not LatestVersionFinder.is_filtered(mod, version):
+                return version
+        return None
+
     @staticmethod
     def is_filtered(mod: Mod, version: VersionInfo) -> bool:
         if LatestVersionFinder.is_filtered_by_stability(version):
@@ -343,3 +343,31 @@ def test_find_latest_version_unfiltered():
     result = LatestVersionFinder.find_latest_version(mod(), versions, filter=False)
     reset_filter()
     assert expected == result
+
+
+def test_find_newest_version_stops_at_first_unfiltered_version():
+    set_filter(Filter(loader=ModLoaders.fabric))
+    versions = [
+        version_info(uploaded=40, mod_loaders=[ModLoaders.forge]),
+        version_info(uploaded=30, mod_loaders=[ModLoaders.fabric]),
+        version_info(uploaded=20, mod_loaders=[ModLoaders.fabric]),
+    ]
+    created: List[VersionInfo] = []
+
+    def iterate():
+        for version in versions:
+            created.append(version)
+            yield version
+
+    result = LatestVersionFinder.find_newest_version(mod(), iterate())
+    reset_filter()
+    assert versions[1] == result
+    assert len(created) == 2
+
+
+def test_find_newest_version_when_all_are_filtered_out():
+    set_filter(Filter(loader=ModLoaders.fabric))
+    versions = [version_info(uploaded=40, mod_loaders=[ModLoaders.forge])]
+    result = LatestVersionFinder.find_newest_version(mod(), iter(versions))
+    reset_filter()
+    assert result is None
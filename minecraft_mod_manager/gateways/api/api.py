@@ -1,29 +1,114 @@
+import asyncio
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterator, List, Optional
 
 from ...core.entities.mod import Mod
+from ...core.entities.mod_loaders import ModLoaders
 from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import VersionInfo
+from ...core.errors.mod_not_found_exception import ModNotFoundException
+from ..async_http import AsyncHttp
 from ..http import Http
 
 
 class Api:
-    def __init__(self, http: Http, site_name: Sites) -> None:
+    def __init__(self, http: Http, site_name: Sites, async_http: Optional[AsyncHttp] = None) -> None:
         self.http = http
+        self.async_http = async_http or AsyncHttp(http)
         self.site_name = site_name
 
-    def get_all_versions(self, mod: Mod) -> List[VersionInfo]:
+    def get_all_versions(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
+        """Get the versions of the mod.
+
+        Args:
+            filter: Let the site leave out versions that don't match the mod loader and minecraft version filters,
+                if it supports it. Versions still have to be filtered by LatestVersionFinder
+        """
         raise NotImplementedError()
 
+    def iter_versions(self, mod: Mod) -> Iterator[VersionInfo]:
+        """Same versions as get_all_versions(), newest first. Versions are only created when iterated to,
+        so nothing more than needed is created when stopping at the first version that isn't filtered out"""
+        versions = self.get_all_versions(mod)
+        return iter(sorted(versions, key=lambda version: version.upload_time, reverse=True))
+
     def search_mod(self, search: str) -> List[Site]:
         raise NotImplementedError()
 
+    def search_index(self, search: str) -> List[Site]:
+        """Search the local project index, if the site has one. Never sends any requests.
+        Projects that aren't in the index can still be found by search_mod()"""
+        return []
+
+    def refresh_index(self) -> None:
+        """Build the local project index, or add the projects that have been updated since it was last refreshed"""
+        pass
+
     def get_mod_info(self, site_id: str) -> Mod:
         """Get mod info from the id.
         Throws ModNotFoundException if it's not found.
         """
         raise NotImplementedError()
 
+    def get_mods_info(self, site_ids: List[str]) -> Dict[str, Mod]:
+        """Get the mod info of several mods at once.
+
+        Returns:
+            Found mods by their site id, mods that aren't found are left out
+        """
+        mods: Dict[str, Mod] = {}
+        for site_id in site_ids:
+            try:
+                mods[site_id] = self.get_mod_info(site_id)
+            except ModNotFoundException:
+                pass
+        return mods
+
+    def find_mods_by_hash(self, hashes: List[str]) -> Dict[str, Site]:
+        """Identify several installed files at once, from the sha1 hashes of the files.
+
+        Returns:
+            Site of the mod, with both id and slug, by the hash of the installed file.
+            Files that the site doesn't recognize are left out
+        """
+        return {}
+
+    def get_latest_versions_by_hash(
+        self, hashes: List[str], loader: ModLoaders, minecraft_version: Optional[str]
+    ) -> Dict[str, VersionInfo]:
+        """Get the latest version of several installed files at once, from the sha1 hashes of the files.
+
+        Returns:
+            Latest version by the hash of the installed file. Files that the site doesn't recognize are left out
+        """
+        return {}
+
+    def get_latest_versions(self, site_ids: List[str]) -> Dict[str, List[VersionInfo]]:
+        """Get the latest versions of several mods at once, for sites that can do it in a few requests.
+        The newest version of each minecraft version, mod loader, and stability is included,
+        so LatestVersionFinder finds the same version as among all versions.
+
+        Returns:
+            Versions by the site id of the mod. Mods that aren't found are left out,
+            and the site returns nothing if it can't get several mods at once
+        """
+        return {}
+
+    def get_dependencies(self, version: VersionInfo) -> Dict[Sites, List[str]]:
+        """Mod ids of the required dependencies of the version, including those only specified by a version id"""
+        return version.dependencies
+
+    # Async variants run the sync version in a thread unless the API implements them natively
+
+    async def get_all_versions_async(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_all_versions, mod, filter)
+
+    async def search_mod_async(self, search: str) -> List[Site]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.search_mod, search)
+
+    async def get_mod_info_async(self, site_id: str) -> Mod:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_mod_info, site_id)
+
     @staticmethod
     def _to_epoch_time(date_string: str) -> int:
         # Has milliseconds
@@ -1,62 +1,204 @@
 import re
 from enum import Enum
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, Iterator, List, Optional, Set
 
+from tealprint import TealPrint
+
+from ...config import config
 from ...core.entities.mod import Mod, ModArg
 from ...core.entities.mod_loaders import ModLoaders
 from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import Stabilities, VersionInfo
 from ...core.errors.mod_not_found_exception import ModNotFoundException
-from ..http import Http
+from ..async_http import AsyncHttp
+from ..http import Http, Unauthorized
 from .api import Api
 
-_base_url = "https://addons-ecs.forgesvc.net/api/v2/addon"
+_base_url = "https://api.curseforge.com/v1"
+_minecraft_game_id = 432
+_mods_class_id = 6
 
 
 class DependencyTypes(Enum):
     required = 3
 
 
+class HashAlgorithms(Enum):
+    sha1 = 1
+    md5 = 2
+
+
+class ModLoaderTypes(Enum):
+    """CurseForge's ids of the mod loaders"""
+
+    forge = 1
+    fabric = 4
+    quilt = 5
+
+
+class InvalidApiKey(Exception):
+    """CurseForge refused the API key"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+    def __str__(self) -> str:
+        return (
+            f"CurseForge refused the API key ({self.status_code}), "
+            + "check --curse-api-key or the CURSEFORGE_API_KEY environment variable"
+        )
+
+
 class CurseApi(Api):
+    """CurseForge Core API v1. Every request needs an API key, see config.curse_api_key"""
+
     _filename_to_version_regex = re.compile(r"((\d{2}w\d{2}[a-f]-)?\d+\.\d+(\.\d+)?.*).*\.jar")
     _starts_with_number_regex = re.compile(r"^\d+.*")
+    bulk_size = 100
+    """Max number of ids in each bulk POST /mods and /mods/files request"""
+    page_size = 50
+    """Max number of files in each /mods/{id}/files request, the most that CurseForge allows"""
 
-    def __init__(self, http: Http) -> None:
-        super().__init__(http, Sites.curse)
+    def __init__(self, http: Http, async_http: Optional[AsyncHttp] = None) -> None:
+        super().__init__(http, Sites.curse, async_http)
 
-    def get_all_versions(self, mod: Mod) -> List[VersionInfo]:
+    def get_all_versions(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
         versions: List[VersionInfo] = []
-        files = self.http.get(CurseApi._make_files_url(mod))
-        for file in files:
+        for file in self._get_pages(CurseApi._make_files_url(mod, filter)):
             version = CurseApi._file_to_version_info(file)
-            version.name = mod.name
-            versions.append(version)
+            if version:
+                version.name = mod.name
+                versions.append(version)
 
         return versions
 
     @staticmethod
-    def _make_files_url(mod: Mod) -> str:
-        if mod.sites:
-            return f"{_base_url}/{mod.sites[Sites.curse].id}/files"
-        raise RuntimeError("No site id found")
+    def _make_files_url(mod: Mod, filter: bool = True) -> str:
+        if Sites.curse not in mod.sites:
+            raise RuntimeError("No site id found")
+
+        url = f"{_base_url}/mods/{mod.sites[Sites.curse].id}/files"
+        if not filter:
+            return url
+
+        # Same filters as Modrinth, the loader of the installed version by default
+        loader = config.filter.loader if config.filter.loader != ModLoaders.unknown else mod.mod_loader
+        return url + CurseApi._make_filter_query(loader, "?")
+
+    @staticmethod
+    def _make_filter_query(loader: ModLoaders, separator: str) -> str:
+        """Query of the mod loader and minecraft version filters, empty when there are none"""
+        filters: List[str] = []
+        loader_type = CurseApi._to_mod_loader_type(loader)
+        if loader_type:
+            filters.append(f"modLoaderType={loader_type.value}")
+        if config.filter.version:
+            filters.append(f"gameVersion={config.filter.version}")
+
+        if filters:
+            return separator + "&".join(filters)
+        return ""
+
+    def _get_pages(self, url: str) -> Iterator[Any]:
+        """All data of a paginated endpoint"""
+        separator = "&" if "?" in url else "?"
+        index = 0
+        while True:
+            json = self._get(f"{url}{separator}index={index}&pageSize={CurseApi.page_size}")
+            data = CurseApi._get_data(json)
+            if not isinstance(data, list):
+                return
+
+            yield from data
+            index += len(data)
+            total = json.get("pagination", {}).get("totalCount", 0)
+            if len(data) == 0 or index >= total:
+                return
+
+    def get_latest_versions(self, site_ids: List[str]) -> Dict[str, List[VersionInfo]]:
+        # Each mod lists the ids of its latest files by minecraft version, mod loader, and release type.
+        # All those files are then fetched in a single request
+        file_ids: List[int] = []
+        for json_mod in self._post_bulk("mods", "modIds", CurseApi._to_mod_ids(site_ids)):
+            for index in json_mod.get("latestFilesIndexes", []):
+                if config.filter.version and index.get("gameVersion") != config.filter.version:
+                    continue
+                if "fileId" in index:
+                    file_ids.append(index["fileId"])
+
+        versions: Dict[str, List[VersionInfo]] = {}
+        for file in self._post_bulk("mods/files", "fileIds", list(dict.fromkeys(file_ids))):
+            version = CurseApi._file_to_version_info(file)
+            if version:
+                versions.setdefault(version.site_id, []).append(version)
+        return versions
+
+    def _post_bulk(self, endpoint: str, key: str, ids: List[int]) -> List[Any]:
+        """Post all ids to a bulk endpoint, e.g. POST /mods {"modIds": [...]}, in as few requests as possible"""
+        results: List[Any] = []
+        for start in range(0, len(ids), CurseApi.bulk_size):
+            chunk = ids[start : start + CurseApi.bulk_size]
+            data = CurseApi._get_data(self._post(f"{_base_url}/{endpoint}", {key: chunk}))
+            if isinstance(data, list):
+                results.extend(data)
+        return results
 
     def search_mod(self, search: str) -> List[Site]:
         mods: List[Site] = []
-        json = self.http.get(CurseApi._make_search_url(search))
-        for curse_mod in json:
-            if "slug" in curse_mod and "id" in curse_mod:
-                slug = curse_mod["slug"]
-                site_id = curse_mod["id"]
-                mods.append(Site(Sites.curse, str(site_id), slug))
+        json = self._get(CurseApi._make_search_url(search))
+        data = CurseApi._get_data(json)
+        if isinstance(data, list):
+            for curse_mod in data:
+                if "slug" in curse_mod and "id" in curse_mod:
+                    slug = curse_mod["slug"]
+                    site_id = curse_mod["id"]
+                    mods.append(Site(Sites.curse, str(site_id), slug))
         return mods
 
     @staticmethod
     def _make_search_url(search: str) -> str:
-        return f"{_base_url}/search?gameId=432&sectionId=6&searchFilter={search}"
+        url = f"{_base_url}/mods/search?gameId={_minecraft_game_id}&classId={_mods_class_id}&searchFilter={search}"
+        return url + CurseApi._make_filter_query(config.filter.loader, "&")
 
     def get_mod_info(self, site_id: str) -> Mod:
-        json = self.http.get(self._make_get_mod_url(site_id))
-        if json and "id" in json and "slug" in json and "name" in json:
+        # Mods can only be looked up by their numeric id, slugs are found by searching for them
+        if site_id.isdigit():
+            json = self._get(f"{_base_url}/mods/{site_id}")
+            return CurseApi._json_to_mod(CurseApi._get_data(json), site_id)
+
+        json = self._get(CurseApi._make_slug_url(site_id))
+        data = CurseApi._get_data(json)
+        if isinstance(data, list):
+            for json_mod in data:
+                if isinstance(json_mod, dict) and json_mod.get("slug") == site_id:
+                    return CurseApi._json_to_mod(json_mod, site_id)
+        raise ModNotFoundException(ModArg(site_id))
+
+    @staticmethod
+    def _make_slug_url(slug: str) -> str:
+        return f"{_base_url}/mods/search?gameId={_minecraft_game_id}&classId={_mods_class_id}&slug={slug}"
+
+    def get_mods_info(self, site_ids: List[str]) -> Dict[str, Mod]:
+        mods: Dict[str, Mod] = {}
+        for json_mod in self._post_bulk("mods", "modIds", CurseApi._to_mod_ids(site_ids)):
+            try:
+                mod = CurseApi._json_to_mod(json_mod, "")
+            except ModNotFoundException:
+                continue
+            mods[mod.sites[Sites.curse].id or ""] = mod
+
+        # Slugs can't be looked up in bulk
+        for site_id in site_ids:
+            if not site_id.isdigit():
+                try:
+                    mods[site_id] = self.get_mod_info(site_id)
+                except ModNotFoundException:
+                    pass
+        return mods
+
+    @staticmethod
+    def _json_to_mod(json: Any, site_id: str) -> Mod:
+        if isinstance(json, dict) and {"id", "slug", "name"}.issubset(json):
             return Mod(
                 id="",
                 name=json["name"],
@@ -64,35 +206,69 @@ class CurseApi(Api):
             )
         raise ModNotFoundException(ModArg(site_id))
 
+    def _get(self, url: str) -> Any:
+        try:
+            return self.http.get(url, CurseApi._headers())
+        except Unauthorized as e:
+            raise InvalidApiKey(e.status_code) from e
+
+    def _post(self, url: str, body: Any) -> Any:
+        try:
+            return self.http.post(url, body, CurseApi._headers())
+        except Unauthorized as e:
+            raise InvalidApiKey(e.status_code) from e
+
+    @staticmethod
+    def _get_data(json: Any) -> Any:
+        """All responses have their content in data, errors don't. Refused API keys raise InvalidApiKey before"""
+        if isinstance(json, dict):
+            return json.get("data")
+        return None
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        return {"x-api-key": config.curse_api_key or ""}
+
     @staticmethod
-    def _make_get_mod_url(site_id: str) -> str:
-        return f"{_base_url}/{site_id}"
+    def _to_mod_ids(site_ids: List[str]) -> List[int]:
+        return [int(site_id) for site_id in dict.fromkeys(site_ids) if site_id.isdigit()]
 
     @staticmethod
-    def _file_to_version_info(file_data: Any) -> VersionInfo:
+    def _file_to_version_info(file_data: Any) -> Optional[VersionInfo]:
+        """Convert the file to a version. None if the author doesn't allow downloading it from other apps"""
+        if not file_data.get("downloadUrl"):
+            TealPrint.debug(f"{file_data.get('fileName')} can only be downloaded from the CurseForge website")
+            return None
+
         # Find required dependencies
         dependencyList: List[str] = []
         for dependency in file_data["dependencies"]:
-            if {"addonId", "type"}.issubset(dependency):
-                t = dependency["type"]
-                if t == DependencyTypes.required.value:
-                    dependencyList.append(str(dependency["addonId"]))
+            if {"modId", "relationType"}.issubset(dependency):
+                if dependency["relationType"] == DependencyTypes.required.value:
+                    dependencyList.append(str(dependency["modId"]))
 
         dependencyMap: Dict[Sites, List[str]] = {}
         if dependencyList:
             dependencyMap[Sites.curse] = dependencyList
 
+        hashes: Dict[str, str] = {}
+        for hash in file_data.get("hashes", []):
+            if hash.get("algo") == HashAlgorithms.sha1.value:
+                hashes["sha1"] = hash["value"]
+
         # Create VersionInfo
         return VersionInfo(
             stability=CurseApi._to_release_type(file_data["releaseType"]),
-            mod_loaders=CurseApi._to_mod_loaders(file_data["gameVersion"]),
+            mod_loaders=CurseApi._to_mod_loaders(file_data["gameVersions"]),
             site=Sites.curse,
+            site_id=str(file_data["modId"]),
             upload_time=Api._to_epoch_time(file_data["fileDate"]),
-            minecraft_versions=file_data["gameVersion"],
+            minecraft_versions=file_data["gameVersions"],
             download_url=file_data["downloadUrl"],
             number=CurseApi._get_version_from_filename(file_data["fileName"]),
             filename=file_data["fileName"],
             dependencies=dependencyMap,
+            hashes=hashes,
         )
 
     @staticmethod
@@ -116,8 +292,18 @@ class CurseApi(Api):
     def _to_mod_loaders(loaders: List[str]) -> Set[ModLoaders]:
         mod_loaders: Set[ModLoaders] = set()
 
+        # Game versions also contain minecraft versions, and tags such as Client, Server, and Java 17
         for loader in loaders:
             if not CurseApi._starts_with_number_regex.match(loader):
-                mod_loaders.add(ModLoaders.from_name(loader))
+                mod_loader = ModLoaders.from_name(loader)
+                if mod_loader != ModLoaders.unknown:
+                    mod_loaders.add(mod_loader)
 
         return mod_loaders
+
+    @staticmethod
+    def _to_mod_loader_type(loader: ModLoaders) -> Optional[ModLoaderTypes]:
+        for loader_type in ModLoaderTypes:
+            if loader_type.name == loader.value:
+                return loader_type
+        return None
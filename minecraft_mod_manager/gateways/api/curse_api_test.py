@@ -1,17 +1,19 @@
+import copy
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import pytest
-from mockito import mock, unstub, verifyStubbedInvocationsAreUsed, when
+from mockito import mock, unstub, verify, verifyStubbedInvocationsAreUsed, when
 
+from ...config import config
 from ...core.entities.mod import Mod
 from ...core.entities.mod_loaders import ModLoaders
 from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import Stabilities, VersionInfo
 from ...core.errors.mod_not_found_exception import ModNotFoundException
 from ..http import Http
-from .curse_api import CurseApi
+from .curse_api import CurseApi, _base_url
 
 testdata_dir = Path(__file__).parent.joinpath("testdata").joinpath("curse_api")
 search_carpet_file = testdata_dir.joinpath("search_carpet.json")
@@ -46,7 +48,12 @@ def http():
 
 @pytest.fixture
 def api(http):
-    return CurseApi(http)
+    config.curse_api_key = "key"
+    yield CurseApi(http)
+    config.curse_api_key = None
+
+
+headers = {"x-api-key": "key"}
 
 
 site_id = "349239"
@@ -97,6 +104,19 @@ def test_get_mod_info(api: CurseApi, mod_info):
     assert expected == actual
 
 
+def test_get_mod_info_by_slug(api: CurseApi, carpet_search):
+    when(api.http).get(f"{_base_url}/mods/search?gameId=432&classId=6&slug=carpet-extra", headers).thenReturn(
+        carpet_search
+    )
+
+    actual = api.get_mod_info("carpet-extra")
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual.sites == {Sites.curse: Site(Sites.curse, "349240", "carpet-extra")}
+
+
 def test_get_mod_info_not_found(api: CurseApi):
     when(api.http).get(...).thenReturn({"error": "not found"})
 
@@ -121,6 +141,8 @@ def test_get_all_versions(api: CurseApi, carpet_files):
             filename="fabric-carpet-20w13b-1.3.17+v200401.jar",
             dependencies={Sites.curse: ["1337", "1338"]},
             number="20w13b-1.3.17+v200401",
+            site_id="349239",
+            hashes={"sha1": "fbfeb4338ade527d400728735487ee8b3ae21574"},
         ),
         VersionInfo(
             stability=Stabilities.alpha,
@@ -132,6 +154,8 @@ def test_get_all_versions(api: CurseApi, carpet_files):
             download_url="https://edge.forgecdn.net/files/2815/968/fabric-carpet-1.14.4-1.2.0+v191024.jar",
             filename="fabric-carpet-1.14.4-1.2.0+v191024.jar",
             number="1.14.4-1.2.0+v191024",
+            site_id="349239",
+            hashes={"sha1": "d95175f6fb19ebe6e5866ddf62bd6c21a1a82219"},
         ),
         VersionInfo(
             stability=Stabilities.release,
@@ -143,6 +167,8 @@ def test_get_all_versions(api: CurseApi, carpet_files):
             download_url="https://edge.forgecdn.net/files/3276/129/fabric-carpet-1.16.5-1.4.32+v210414.jar",
             filename="fabric-carpet-1.16.5-1.4.32+v210414.jar",
             number="1.16.5-1.4.32+v210414",
+            site_id="349239",
+            hashes={"sha1": "64d32afbaa712f935b9766681963d9c8a710a72b"},
         ),
         VersionInfo(
             stability=Stabilities.release,
@@ -154,6 +180,8 @@ def test_get_all_versions(api: CurseApi, carpet_files):
             download_url="https://edge.forgecdn.net/files/3276/130/fabric-carpet-21w15a-1.4.32+v210414.jar",
             filename="fabric-carpet-21w15a-1.4.32+v210414.jar",
             number="21w15a-1.4.32+v210414",
+            site_id="349239",
+            hashes={"sha1": "cd81bed0455caa015ecb24d8b8a968af8854385b"},
         ),
     ]
 
@@ -163,3 +191,133 @@ def test_get_all_versions(api: CurseApi, carpet_files):
     unstub()
 
     assert expected == actual
+
+
+def test_get_all_versions_of_all_pages(api: CurseApi, carpet_files):
+    first_page = copy.deepcopy(carpet_files)
+    first_page["pagination"] = {"index": 0, "pageSize": 4, "resultCount": 4, "totalCount": 5}
+    second_page = {"data": [carpet_files["data"][0]], "pagination": {"index": 4, "resultCount": 1, "totalCount": 5}}
+    url = f"{_base_url}/mods/{site_id}/files"
+    when(api.http).get(f"{url}?index=0&pageSize=50", headers).thenReturn(first_page)
+    when(api.http).get(f"{url}?index=4&pageSize=50", headers).thenReturn(second_page)
+
+    actual = api.get_all_versions(mod(), filter=False)
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert len(actual) == 5
+
+
+def test_get_all_versions_skips_files_without_download_url(api: CurseApi, carpet_files):
+    carpet_files["data"][0]["downloadUrl"] = None
+    when(api.http).get(...).thenReturn(carpet_files)
+
+    actual = api.get_all_versions(mod())
+
+    unstub()
+
+    assert [version.filename for version in actual] == [
+        "fabric-carpet-1.14.4-1.2.0+v191024.jar",
+        "fabric-carpet-1.16.5-1.4.32+v210414.jar",
+        "fabric-carpet-21w15a-1.4.32+v210414.jar",
+    ]
+
+
+@pytest.mark.parametrize(
+    "name,mod_loader,filter_loader,version,filter,expected",
+    [
+        ("No filters", ModLoaders.unknown, ModLoaders.unknown, None, True, ""),
+        ("Installed loader", ModLoaders.fabric, ModLoaders.unknown, None, True, "?modLoaderType=4"),
+        ("Filter loader first", ModLoaders.fabric, ModLoaders.forge, None, True, "?modLoaderType=1"),
+        ("Loader not on CurseForge", ModLoaders.bukkit, ModLoaders.unknown, None, True, ""),
+        ("Minecraft version", ModLoaders.quilt, ModLoaders.unknown, "1.19", True, "?modLoaderType=5&gameVersion=1.19"),
+        ("Without filters", ModLoaders.fabric, ModLoaders.unknown, "1.19", False, ""),
+    ],
+)
+def test_make_files_url(name, mod_loader, filter_loader, version, filter, expected):
+    print(name)
+    config.filter.loader = filter_loader
+    config.filter.version = version
+    installed = mod()
+    installed.mod_loader = mod_loader
+
+    actual = CurseApi._make_files_url(installed, filter)
+
+    config.filter.loader = ModLoaders.unknown
+    config.filter.version = None
+    assert actual == f"{_base_url}/mods/{site_id}/files{expected}"
+
+
+def test_make_search_url():
+    config.filter.loader = ModLoaders.fabric
+    config.filter.version = "1.19"
+
+    actual = CurseApi._make_search_url("carpet")
+
+    config.filter.loader = ModLoaders.unknown
+    config.filter.version = None
+    assert (
+        actual == f"{_base_url}/mods/search?gameId=432&classId=6&searchFilter=carpet&modLoaderType=4&gameVersion=1.19"
+    )
+
+
+def test_get_latest_versions_of_all_mods_in_two_requests(api: CurseApi, mod_info, carpet_files):
+    litematica: Any = mod_info["data"]
+    carpet: Any = {
+        "id": 349239,
+        "name": "Carpet",
+        "slug": "carpet",
+        "latestFilesIndexes": [
+            {"gameVersion": "1.16.5", "fileId": 3276129, "releaseType": 1, "modLoader": 4},
+            {"gameVersion": "1.16.4", "fileId": 3276129, "releaseType": 1, "modLoader": 4},
+            {"gameVersion": "1.17", "fileId": 3276130, "releaseType": 1, "modLoader": 4},
+        ],
+    }
+    when(api.http).post(f"{_base_url}/mods", {"modIds": [349239, 308892]}, headers).thenReturn(
+        {"data": [carpet, litematica]}
+    )
+    file_ids = [3276129, 3276130] + list(dict.fromkeys(index["fileId"] for index in litematica["latestFilesIndexes"]))
+    when(api.http).post(f"{_base_url}/mods/files", {"fileIds": file_ids}, headers).thenReturn(
+        {"data": carpet_files["data"][2:]}
+    )
+
+    actual = api.get_latest_versions(["349239", "308892", "349239"])
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert list(actual.keys()) == ["349239"]
+    assert [version.number for version in actual["349239"]] == ["1.16.5-1.4.32+v210414", "21w15a-1.4.32+v210414"]
+
+
+def test_get_latest_versions_only_gets_files_of_filtered_minecraft_version(api: CurseApi, mod_info):
+    config.filter.version = "1.18.2"
+    when(api.http).post(f"{_base_url}/mods", {"modIds": [308892]}, headers).thenReturn({"data": [mod_info["data"]]})
+    when(api.http).post(f"{_base_url}/mods/files", {"fileIds": [3751645]}, headers).thenReturn({"data": []})
+
+    api.get_latest_versions(["308892"])
+
+    config.filter.version = None
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+
+def test_get_mods_info_in_one_request(api: CurseApi, mod_info):
+    when(api.http).post(f"{_base_url}/mods", {"modIds": [308892, 1]}, headers).thenReturn({"data": [mod_info["data"]]})
+
+    actual = api.get_mods_info(["308892", "1"])
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {"308892": Mod("", "Litematica", sites={Sites.curse: Site(Sites.curse, "308892", "litematica")})}
+
+
+def test_requests_send_api_key(api: CurseApi, carpet_search):
+    when(api.http).get(...).thenReturn(carpet_search)
+
+    api.search_mod("carpet")
+
+    verify(api.http).get(CurseApi._make_search_url("carpet"), {"x-api-key": "key"})
+    unstub()
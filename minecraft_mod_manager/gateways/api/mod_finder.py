@@ -1,14 +1,22 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-from tealprint import TealPrint
+from tealprint import TealPrint, TealPrintBuffer
 
+from ...config import config
 from ...core.entities.mod import Mod
 from ...core.entities.sites import Site, Sites
+from ...core.entities.version_info import VersionInfo
 from ...core.errors.mod_not_found_exception import ModNotFoundException
-from ..http import Http
+from ...utils.threaded_print import ThreadedPrint
+from ..async_http import AsyncHttp
+from ..http import DeadlineExceeded, Http, MaxRetriesExceeded, NotCached
+from ..project_index import ProjectIndex
 from .api import Api
+from .curse_api import CurseApi
 from .modrinth_api import ModrinthApi
 from .word_splitter_api import WordSplitterApi
 
@@ -17,37 +25,57 @@ class ModFinder:
     """Search and find mods on various sites"""
 
     @staticmethod
-    def create(http: Http) -> ModFinder:
+    def create(http: Http, index: Optional[ProjectIndex] = None) -> ModFinder:
+        async_http = AsyncHttp(http)
+        mod_apis: List[Api] = [ModrinthApi(http, async_http, index)]
+        if config.curse_api_key:
+            mod_apis.append(CurseApi(http, async_http))
         return ModFinder(
-            mod_apis=[ModrinthApi(http)],
-            word_splitter_api=WordSplitterApi(http),
+            mod_apis=mod_apis,
+            word_splitter_api=WordSplitterApi(http, async_http),
         )
 
     def __init__(self, mod_apis: List[Api], word_splitter_api: WordSplitterApi) -> None:
         self.apis = mod_apis
         self.word_splitter = word_splitter_api
+        self._executor = ThreadPoolExecutor(max_workers=config.pool_size, thread_name_prefix="search")
+        """Runs the searches of all mods, so searches of concurrent mods share the same connection limit"""
+
+    def close(self) -> None:
+        """Wait for the searches that are still running and stop their threads"""
+        self._executor.shutdown()
+
+    def refresh_index(self) -> None:
+        """Build or refresh the local project indexes of the sites. Continues without them if it fails"""
+        for api in self.apis:
+            try:
+                api.refresh_index()
+            except (MaxRetriesExceeded, NotCached, DeadlineExceeded) as e:
+                TealPrint.warning(f"Couldn't refresh the project index of {api.site_name.value}: {e}")
 
     def find_mod(self, mod: Mod) -> Dict[Sites, Site]:
         """Find a mod. This differs from search in that it will only return found matches.
         It will also try with various search string until it finds a match.
+        All search strings of a step are searched for at the same time.
         Throws an exception if no match is found."""
 
         TealPrint.info("🔍 Searching for mod", push_indent=True)
 
-        found_sites: Dict[Sites, Site] = {}
-
         # Already specified a site slug
+        slugs: Dict[Sites, str] = {}
         for api in self.apis:
             if mod.sites and api.site_name in mod.sites:
                 existing_site = mod.sites[api.site_name]
                 if existing_site.slug:
                     TealPrint.verbose(f"🔍 Searching for {existing_site.slug} on {api.site_name}")
-                    infos = api.search_mod(existing_site.slug)
-                    for info in infos:
-                        if info.slug == existing_site.slug:
-                            TealPrint.verbose(f"🟢 Found {existing_site.slug} on {api.site_name}")
-                            found_sites[api.site_name] = info
-                            break
+                    slugs[api.site_name] = existing_site.slug
+
+        found_sites = self._search(
+            [(api, slugs[api.site_name]) for api in self.apis if api.site_name in slugs],
+            lambda site, info: info.slug == slugs[site],
+        )
+        for site in found_sites.values():
+            TealPrint.verbose(f"🟢 Found {site.slug} on {site.name}")
 
         if len(found_sites) > 0:
             TealPrint.pop_indent()
@@ -55,20 +83,18 @@ class ModFinder:
 
         # Search by various possible slug names
         possible_names = mod.get_possible_slugs()
+        searches: List[Tuple[Api, str]] = []
         for api in self.apis:
             TealPrint.verbose(f"🔍 Searching on {api.site_name}", push_indent=True)
-            for possible_name in possible_names:
+            for possible_name in ModFinder._by_priority(mod, possible_names):
                 TealPrint.debug(f"🔍 Search string: {possible_name}")
-                infos = api.search_mod(possible_name)
-                for info in infos:
-                    if info.slug in possible_names:
-                        TealPrint.debug(f"🟢 Found with slug: {info.slug}")
-                        found_sites[api.site_name] = info
-                        break
-                if api.site_name in found_sites:
-                    break
+                searches.append((api, possible_name))
             TealPrint.pop_indent()
 
+        found_sites = self._search(searches, lambda _, info: info.slug in possible_names)
+        for site in found_sites.values():
+            TealPrint.debug(f"🟢 Found with slug: {site.slug}")
+
         if len(found_sites) > 0:
             TealPrint.pop_indent()
             return found_sites
@@ -78,12 +104,11 @@ class ModFinder:
         if split_word != mod.id:
             for api in self.apis:
                 TealPrint.verbose(f"🔍 Searching on {api.site_name} by splitting word: {split_word}")
-                infos = api.search_mod(split_word)
-                for info in infos:
-                    if info.slug in possible_names:
-                        TealPrint.debug(f"🟢 Found with slug: {info.slug}")
-                        found_sites[api.site_name] = info
-                        break
+            found_sites = self._search(
+                [(api, split_word) for api in self.apis], lambda _, info: info.slug in possible_names
+            )
+            for site in found_sites.values():
+                TealPrint.debug(f"🟢 Found with slug: {site.slug}")
 
         TealPrint.pop_indent()
         if len(found_sites) > 0:
@@ -91,6 +116,100 @@ class ModFinder:
 
         raise ModNotFoundException(mod)
 
+    def _search(self, searches: List[Tuple[Api, str]], accept: Callable[[Sites, Site], bool]) -> Dict[Sites, Site]:
+        """Search for all search strings at the same time.
+        The local project indexes are searched first, sites that have an accepted result there aren't searched online.
+
+        Args:
+            searches: APIs and search strings, in priority order
+            accept: Whether the search result is the mod
+
+        Returns:
+            The first accepted result of each site. A result is only used when all searches before it on the same site
+            have been checked, so it's the same result as when searching one at a time.
+            Searches that haven't started when all sites have a result are cancelled
+        """
+        found_sites: Dict[Sites, Site] = {}
+        for api, search in searches:
+            if api.site_name not in found_sites:
+                for info in api.search_index(search):
+                    if accept(api.site_name, info):
+                        found_sites[api.site_name] = info
+                        break
+
+        searches = [(api, search) for api, search in searches if api.site_name not in found_sites]
+        if len(searches) == 0:
+            return found_sites
+
+        futures: Dict[Sites, List["Future[List[Site]]"]] = {}
+        output = ThreadedPrint.current()
+        try:
+            for api, search in searches:
+                # Keep attributing the requests to the mod in the request statistics
+                context = contextvars.copy_context()
+                future = self._executor.submit(context.run, ModFinder._search_buffered, api, search, output)
+                futures.setdefault(api.site_name, []).append(future)
+
+            undecided = dict(futures)
+            while len(undecided) > 0:
+                for site_name, site_futures in list(undecided.items()):
+                    decided, info = ModFinder._first_accepted(site_futures, lambda info: accept(site_name, info))
+                    if decided:
+                        del undecided[site_name]
+                        if info:
+                            found_sites[site_name] = info
+
+                running = [
+                    future for site_futures in undecided.values() for future in site_futures if not future.done()
+                ]
+                if len(running) > 0:
+                    wait(running, return_when=FIRST_COMPLETED)
+        finally:
+            # Don't wait for searches that aren't needed anymore
+            for site_futures in futures.values():
+                for future in site_futures:
+                    future.cancel()
+
+        return found_sites
+
+    @staticmethod
+    def _search_buffered(api: Api, search: str, output: Optional[TealPrintBuffer]) -> List[Site]:
+        """Print the messages of the search together with the ones of the mod it's searching for"""
+        with ThreadedPrint.buffer(output):
+            return api.search_mod(search)
+
+    @staticmethod
+    def _first_accepted(
+        futures: List["Future[List[Site]]"], accept: Callable[[Site], bool]
+    ) -> Tuple[bool, Optional[Site]]:
+        """Returns whether the searches are decided, and the first accepted result.
+        Raises the exception of a failed search if it's checked before an accepted result"""
+        for future in futures:
+            if not future.done():
+                return False, None
+            for info in future.result():
+                if accept(info):
+                    return True, info
+        return True, None
+
+    @staticmethod
+    def _by_priority(mod: Mod, possible_names: Set[str]) -> List[str]:
+        """The mod id first, then longer names before shorter, e.g. 'fabric-api' before 'fabric' and 'api'"""
+        id = mod.id.replace("_", "-")
+        return sorted(possible_names, key=lambda name: (name != id, -len(name), name))
+
+    def get_dependencies(self, version: VersionInfo) -> Dict[Sites, List[str]]:
+        for api in self.apis:
+            if api.site_name == version.site_name:
+                return api.get_dependencies(version)
+        return version.dependencies
+
+    def get_mods_info(self, site: Sites, site_ids: List[str]) -> Dict[str, Mod]:
+        for api in self.apis:
+            if api.site_name == site:
+                return api.get_mods_info(site_ids)
+        return {}
+
     def get_mod_info(self, site: Sites, site_id: str) -> Optional[Mod]:
         for api in self.apis:
             if api.site_name == site:
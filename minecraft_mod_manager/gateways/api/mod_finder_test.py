@@ -1,9 +1,14 @@
+import time
+from typing import List
+
 import pytest
-from mockito import mock, unstub, when
+from mockito import mock, unstub, verify, when
+from tealprint import TealPrint
 
 from ...core.entities.mod import Mod
 from ...core.entities.sites import Site, Sites
 from ...core.errors.mod_not_found_exception import ModNotFoundException
+from ...utils.threaded_print import ThreadedPrint
 from .api import Api
 from .mod_finder import ModFinder
 from .word_splitter_api import WordSplitterApi
@@ -13,6 +18,7 @@ from .word_splitter_api import WordSplitterApi
 def curse():
     mocked = mock(Api)
     mocked.site_name = Sites.curse  # type: ignore
+    when(mocked).search_index(...).thenReturn([])
     yield mocked
     unstub()
 
@@ -21,6 +27,7 @@ def curse():
 def modrinth():
     mocked = mock(Api)
     mocked.site_name = Sites.modrinth  # type: ignore
+    when(mocked).search_index(...).thenReturn([])
     yield mocked
     unstub()
 
@@ -147,3 +154,96 @@ def test_find_mod(
         assert expected == actual
 
     unstub()
+
+
+def delayed(seconds: float, result: List[Site]):
+    def search(*args):
+        time.sleep(seconds)
+        return result
+
+    return search
+
+
+def test_find_mod_searches_all_names_at_the_same_time(curse, modrinth, word_splitter):
+    finder = ModFinder([curse, modrinth], word_splitter)
+    mod = Mod(id="fabric-api", name="Fabric API")
+    for api in [curse, modrinth]:
+        when(api).search_mod(...).thenAnswer(delayed(0.2, []))
+    when(word_splitter).split_words(...).thenReturn("fabric-api")
+
+    start = time.perf_counter()
+    with pytest.raises(ModNotFoundException):
+        finder.find_mod(mod)
+
+    # 6 searches, one at a time would take 1.2 seconds
+    assert time.perf_counter() - start < 0.6
+    unstub()
+
+
+def test_find_mod_uses_first_match_in_priority_order(modrinth, word_splitter):
+    finder = ModFinder([modrinth], word_splitter)
+    mod = Mod(id="fabric-api", name="Fabric API")
+    when(modrinth).search_mod("fabric-api").thenAnswer(delayed(0.1, [Site(Sites.modrinth, "a", "fabric-api")]))
+    when(modrinth).search_mod("fabric").thenReturn([Site(Sites.modrinth, "b", "fabric")])
+    when(modrinth).search_mod("api").thenReturn([Site(Sites.modrinth, "c", "api")])
+
+    actual = finder.find_mod(mod)
+
+    assert actual == {Sites.modrinth: Site(Sites.modrinth, "a", "fabric-api")}
+    unstub()
+
+
+def test_find_mod_uses_index_before_searching_online(curse, modrinth, word_splitter):
+    finder = ModFinder([curse, modrinth], word_splitter)
+    mod = Mod(id="fabric-api", name="Fabric API")
+    when(modrinth).search_index("fabric-api").thenReturn([Site(Sites.modrinth, "a", "fabric-api")])
+    when(curse).search_mod(...).thenReturn([Site(Sites.curse, "1", "fabric-api")])
+
+    actual = finder.find_mod(mod)
+
+    assert actual == {
+        Sites.curse: Site(Sites.curse, "1", "fabric-api"),
+        Sites.modrinth: Site(Sites.modrinth, "a", "fabric-api"),
+    }
+    verify(modrinth, times=0).search_mod(...)
+    unstub()
+
+
+def test_find_mod_searches_online_when_not_accepted_in_index(modrinth, word_splitter):
+    finder = ModFinder([modrinth], word_splitter)
+    mod = Mod(id="carpet", name="Carpet")
+    when(modrinth).search_index("carpet").thenReturn([Site(Sites.modrinth, "b", "carpet-extra")])
+    when(modrinth).search_mod("carpet").thenReturn([Site(Sites.modrinth, "a", "carpet")])
+
+    actual = finder.find_mod(mod)
+
+    assert actual == {Sites.modrinth: Site(Sites.modrinth, "a", "carpet")}
+    unstub()
+
+
+def test_possible_names_by_priority():
+    mod = Mod(id="fabric_api", name="Fabric API")
+
+    actual = ModFinder._by_priority(mod, {"api", "fabric", "fabric-api", "fapi"})
+
+    assert actual == ["fabric-api", "fabric", "fapi", "api"]
+
+
+def test_find_mod_prints_search_output_together_with_the_mod(modrinth, word_splitter, capsys):
+    finder = ModFinder([modrinth], word_splitter)
+    mod = Mod(id="fabric-api", name="Fabric API")
+
+    def search(*args):
+        TealPrint.warning("Retrying search")
+        return [Site(Sites.modrinth, "a", "fabric-api")]
+
+    when(modrinth).search_mod(...).thenAnswer(search)
+
+    with ThreadedPrint():
+        with ThreadedPrint.buffer():
+            finder.find_mod(mod)
+            assert capsys.readouterr().out == ""
+
+    assert "Retrying search" in capsys.readouterr().out
+    finder.close()
+    unstub()
@@ -1,5 +1,8 @@
+import asyncio
+import time
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from json import dumps
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 from tealprint import TealPrint
 
@@ -9,10 +12,12 @@ from ...core.entities.mod_loaders import ModLoaders
 from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import Stabilities, VersionInfo
 from ...core.errors.mod_not_found_exception import ModNotFoundException
+from ..async_http import AsyncHttp
 from ..http import Http
+from ..project_index import IndexedProject, ProjectIndex
 from .api import Api
 
-_base_url = "https://api.modrinth.com/api/v1"
+_base_url = "https://api.modrinth.com/v2"
 
 
 class DependencyTypes(Enum):
@@ -22,33 +27,70 @@ class DependencyTypes(Enum):
 
 
 class ModrinthApi(Api):
-    def __init__(self, http: Http) -> None:
-        super().__init__(http, Sites.modrinth)
+    bulk_size = 100
+    """Max number of ids in each /versions and /projects request, keeps the URLs at a reasonable length"""
+    index_page_size = 100
+    """Max number of projects in each /search request when building the project index"""
 
-    def get_all_versions(self, mod: Mod) -> List[VersionInfo]:
-        versions: List[VersionInfo] = []
+    def __init__(
+        self, http: Http, async_http: Optional[AsyncHttp] = None, index: Optional[ProjectIndex] = None
+    ) -> None:
+        super().__init__(http, Sites.modrinth, async_http)
+        self.index = index
+        """Local index of projects, all search results are added to it"""
+
+    def get_all_versions(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
+        json = self.http.get(ModrinthApi._make_versions_url(mod, filter))
+        return ModrinthApi._json_to_versions(json, mod)
+
+    async def get_all_versions_async(self, mod: Mod, filter: bool = True) -> List[VersionInfo]:
+        json = await self.async_http.get(ModrinthApi._make_versions_url(mod, filter))
+        return ModrinthApi._json_to_versions(json, mod)
+
+    def iter_versions(self, mod: Mod) -> Iterator[VersionInfo]:
+        # Modrinth already sorts the versions newest first
         json = self.http.get(ModrinthApi._make_versions_url(mod))
+        return ModrinthApi._iter_json_versions(json, mod)
+
+    @staticmethod
+    def _json_to_versions(json: Any, mod: Mod) -> List[VersionInfo]:
+        return list(ModrinthApi._iter_json_versions(json, mod))
+
+    @staticmethod
+    def _iter_json_versions(json: Any, mod: Mod) -> Iterator[VersionInfo]:
         for json_version in json:
             try:
                 version = ModrinthApi._json_to_version_info(json_version)
-                version.dependencies = self._find_dependencies_for_version(json_version)
                 version.name = mod.name
-                versions.append(version)
+                yield version
             except IndexError:
                 # Skip this version
                 pass
 
-        return versions
-
     @staticmethod
-    def _make_versions_url(mod: Mod) -> str:
-        if Sites.modrinth in mod.sites:
-            return f"{_base_url}/mod/{mod.sites[Sites.modrinth].id}/version"
-        raise RuntimeError("No site id found")
+    def _make_versions_url(mod: Mod, filter: bool = True) -> str:
+        if Sites.modrinth not in mod.sites:
+            raise RuntimeError("No site id found")
 
-    def search_mod(self, search: str) -> List[Site]:
-        sites: List[Site] = []
+        url = f"{_base_url}/project/{mod.sites[Sites.modrinth].id}/version"
+        if not filter:
+            return url
+
+        # Only get the versions that LatestVersionFinder would keep, same loader as the installed version by default.
+        # Modrinth leaves out versions without loaders as well,
+        # they're rare enough to not be worth getting all versions
+        filters: List[str] = []
+        loader = config.filter.loader if config.filter.loader != ModLoaders.unknown else mod.mod_loader
+        if loader != ModLoaders.unknown:
+            filters.append(f"loaders={ModrinthApi._to_json_list([loader.value])}")
+        if config.filter.version:
+            filters.append(f"game_versions={ModrinthApi._to_json_list([config.filter.version])}")
 
+        if filters:
+            url += "?" + "&".join(filters)
+        return url
+
+    def search_mod(self, search: str) -> List[Site]:
         # Search by query
         mods = self._search_mod(search)
 
@@ -60,21 +102,109 @@ class ModrinthApi(Api):
             # Not found by slug
             pass
 
-        # Convert to site
+        return ModrinthApi._to_sites(mods)
+
+    async def search_mod_async(self, search: str) -> List[Site]:
+        # Search by query and slug at the same time
+        search_json, mod = await asyncio.gather(
+            self.async_http.get(ModrinthApi._make_search_url(search)),
+            self.get_mod_info_async(search),
+            return_exceptions=True,
+        )
+        if isinstance(search_json, BaseException):
+            raise search_json
+
+        self._add_to_index(search_json)
+        mods = ModrinthApi._json_to_mods(search_json)
+        self._remember_mods(mods)
+        if isinstance(mod, Mod):
+            mods.append(mod)
+        elif not isinstance(mod, ModNotFoundException):
+            raise mod
+
+        return ModrinthApi._to_sites(mods)
+
+    @staticmethod
+    def _to_sites(mods: List[Mod]) -> List[Site]:
+        sites: List[Site] = []
         for mod in mods:
             sites.append(mod.sites[Sites.modrinth])
-
         return sites
 
     def _search_mod(self, search: str) -> List[Mod]:
-        mods: List[Mod] = []
         json = self.http.get(ModrinthApi._make_search_url(search))
+        self._add_to_index(json)
+        mods = ModrinthApi._json_to_mods(json)
+        self._remember_mods(mods)
+        return mods
+
+    def search_index(self, search: str) -> List[Site]:
+        if not self.index:
+            return []
+
+        loader = config.filter.loader.value if config.filter.loader != ModLoaders.unknown else None
+        projects = self.index.search(search, loader, config.filter.version)
+        return [Site(Sites.modrinth, project.id, project.slug) for project in projects]
+
+    def refresh_index(self) -> None:
+        if not self.index:
+            return
+
+        last_refresh = self.index.last_refresh
+        if last_refresh and time.time() - last_refresh < config.project_index_ttl:
+            return
+
+        started = time.time()
+        # Build the index from the most downloaded projects, then only add the projects that have been updated since
+        if last_refresh:
+            TealPrint.verbose("Refreshing the project index")
+            sort = "updated"
+        else:
+            TealPrint.info(f"Building the project index of the {config.project_index_size} most downloaded projects")
+            sort = "downloads"
+
+        for offset in range(0, config.project_index_size, ModrinthApi.index_page_size):
+            limit = min(ModrinthApi.index_page_size, config.project_index_size - offset)
+            json = self.http.get(f"{_base_url}/search?index={sort}&offset={offset}&limit={limit}")
+            self._add_to_index(json)
+
+            hits = json.get("hits", []) if isinstance(json, dict) else []
+            if len(hits) < limit:
+                break
+            # Sorted by when they were updated, the rest haven't been updated since the last refresh
+            updated = [Api._to_epoch_time(hit["date_modified"]) for hit in hits if "date_modified" in hit]
+            if last_refresh and min(updated, default=0) < last_refresh:
+                break
+
+        self.index.last_refresh = started
+
+    def _add_to_index(self, search_json: Any) -> None:
+        if not self.index or not isinstance(search_json, dict):
+            return
+
+        projects: List[IndexedProject] = []
+        for hit in search_json.get("hits", []):
+            if {"slug", "project_id", "title"}.issubset(hit):
+                projects.append(
+                    IndexedProject(
+                        id=str(hit["project_id"]),
+                        slug=hit["slug"],
+                        title=hit["title"],
+                        categories=hit.get("categories", []),
+                        game_versions=hit.get("versions", []),
+                        downloads=hit.get("downloads", 0),
+                    )
+                )
+        self.index.add(projects)
+
+    @staticmethod
+    def _json_to_mods(json: Any) -> List[Mod]:
+        mods: List[Mod] = []
         if "hits" in json:
             for mod_info in json["hits"]:
-                if {"slug", "mod_id", "title"}.issubset(mod_info):
+                if {"slug", "project_id", "title"}.issubset(mod_info):
                     slug = mod_info["slug"]
-                    site_id = str(mod_info["mod_id"])
-                    site_id = site_id.replace("local-", "")
+                    site_id = str(mod_info["project_id"])
                     name = mod_info["title"]
                     mods.append(Mod(id="", name=name, sites={Sites.modrinth: Site(Sites.modrinth, site_id, slug)}))
 
@@ -82,17 +212,93 @@ class ModrinthApi(Api):
 
     @staticmethod
     def _make_search_url(search: str) -> str:
-        filter = ""
+        # Each inner list is OR:ed, and the lists are AND:ed together
+        facets: List[List[str]] = []
         if config.filter.loader != ModLoaders.unknown:
-            filter += f'&filters=categories="{config.filter.loader.value}"'
+            facets.append([f"categories:{config.filter.loader.value}"])
         if config.filter.version:
-            filter += f'&version=versions="{config.filter.version}"'
+            facets.append([f"versions:{config.filter.version}"])
 
-        return f"{_base_url}/mod?query={search}{filter}"
+        filter = ""
+        if facets:
+            filter = f"&facets={ModrinthApi._to_json_list(facets)}"
+
+        return f"{_base_url}/search?query={search}{filter}"
 
     def get_mod_info(self, site_id: str) -> Mod:
-        json = self.http.get(f"{_base_url}/mod/{site_id}")
-        if {"id", "slug", "title"}.issubset(json):
+        cached = self.http.project_cache.get(Sites.modrinth, site_id)
+        if cached:
+            return ModrinthApi._json_to_mod(cached.json, site_id)
+
+        json = self.http.get(f"{_base_url}/project/{site_id}")
+        return self._remember_project(site_id, json)
+
+    async def get_mod_info_async(self, site_id: str) -> Mod:
+        cached = self.http.project_cache.get(Sites.modrinth, site_id)
+        if cached:
+            return ModrinthApi._json_to_mod(cached.json, site_id)
+
+        json = await self.async_http.get(f"{_base_url}/project/{site_id}")
+        return self._remember_project(site_id, json)
+
+    def get_mods_info(self, site_ids: List[str]) -> Dict[str, Mod]:
+        mods: Dict[str, Mod] = {}
+        not_cached: List[str] = []
+        for site_id in site_ids:
+            cached = self.http.project_cache.get(Sites.modrinth, site_id)
+            if not cached:
+                not_cached.append(site_id)
+            elif cached.found:
+                mods[site_id] = ModrinthApi._json_to_mod(cached.json, site_id)
+
+        projects, failed = self._get_bulk("projects", not_cached)
+        for json in projects:
+            try:
+                mod = ModrinthApi._json_to_mod(json, "")
+            except ModNotFoundException:
+                continue
+            self._remember_mod(mod)
+            # Projects can be requested by both id and slug
+            site = mod.sites[Sites.modrinth]
+            for site_id in [site.id, site.slug]:
+                if site_id in not_cached:
+                    mods[site_id] = mod
+
+        # Projects that weren't returned in a successful response don't exist
+        for site_id in not_cached:
+            if site_id not in mods and site_id not in failed:
+                self.http.project_cache.put(Sites.modrinth, [site_id], None)
+
+        return mods
+
+    def _remember_project(self, site_id: str, json: Any) -> Mod:
+        """Convert the project JSON to a mod, and remember it by the site id as well as its id and slug.
+        Projects that don't exist are remembered too, so they aren't looked up again"""
+        try:
+            mod = ModrinthApi._json_to_mod(json, site_id)
+        except ModNotFoundException:
+            self.http.project_cache.put(Sites.modrinth, [site_id], None)
+            raise
+
+        self._remember_mod(mod, site_id)
+        return mod
+
+    def _remember_mods(self, mods: List[Mod]) -> None:
+        # E.g. a slug that was found by searching doesn't have to be looked up
+        for mod in mods:
+            self._remember_mod(mod)
+
+    def _remember_mod(self, mod: Mod, site_id: str = "") -> None:
+        """Remember the mod by its id and slug, and the site id it was looked up by"""
+        site = mod.sites[Sites.modrinth]
+        keys = [key for key in [site_id, site.id, site.slug] if key]
+        # Only the fields that _json_to_mod() uses
+        json = {"id": site.id, "slug": site.slug, "title": mod.name}
+        self.http.project_cache.put(Sites.modrinth, keys, json)
+
+    @staticmethod
+    def _json_to_mod(json: Any, site_id: str) -> Mod:
+        if isinstance(json, dict) and {"id", "slug", "title"}.issubset(json):
             return Mod(
                 id="",
                 name=json["title"],
@@ -102,18 +308,84 @@ class ModrinthApi(Api):
 
     @staticmethod
     def _json_to_version_info(data: Any) -> VersionInfo:
+        dependency_projects, dependency_versions = ModrinthApi._split_dependencies(data)
         return VersionInfo(
             stability=Stabilities.from_name(data["version_type"]),
             mod_loaders=ModrinthApi._to_mod_loaders(data["loaders"]),
             site=Sites.modrinth,
+            site_id=str(data["project_id"]),
             upload_time=Api._to_epoch_time(data["date_published"]),
             minecraft_versions=data["game_versions"],
             number=data["version_number"],
             download_url=data["files"][0]["url"],
             filename=data["files"][0]["filename"],
+            dependencies=ModrinthApi._to_dependency_map(dependency_projects),
+            dependency_versions=ModrinthApi._to_dependency_map(dependency_versions),
+            hashes=data["files"][0].get("hashes", {}),
         )
 
-    def _find_dependencies_for_version(self, json_version: Any) -> Dict[Sites, List[str]]:
+    def find_mods_by_hash(self, hashes: List[str]) -> Dict[str, Site]:
+        json = self.http.post(f"{_base_url}/version_files", {"hashes": hashes, "algorithm": "sha1"})
+        if not isinstance(json, dict):
+            return {}
+
+        project_ids: Dict[str, str] = {}
+        for hash, json_version in json.items():
+            project_id = ModrinthApi._json_to_mod_id(json_version)
+            if project_id:
+                project_ids[hash] = project_id
+
+        # The versions only have the project id, the slugs are looked up in a single /projects request
+        mods = self.get_mods_info(list(dict.fromkeys(project_ids.values())))
+        sites: Dict[str, Site] = {}
+        for hash, project_id in project_ids.items():
+            mod = mods.get(project_id)
+            if mod:
+                sites[hash] = mod.sites[Sites.modrinth]
+        return sites
+
+    def get_latest_versions_by_hash(
+        self, hashes: List[str], loader: ModLoaders, minecraft_version: Optional[str]
+    ) -> Dict[str, VersionInfo]:
+        body: Dict[str, Any] = {"hashes": hashes, "algorithm": "sha1"}
+        if loader != ModLoaders.unknown:
+            body["loaders"] = [loader.value]
+        if minecraft_version:
+            body["game_versions"] = [minecraft_version]
+        if config.filter.stability == Stabilities.release:
+            body["version_types"] = [Stabilities.release.value]
+        elif config.filter.stability == Stabilities.beta:
+            body["version_types"] = [Stabilities.release.value, Stabilities.beta.value]
+
+        json = self.http.post(f"{_base_url}/version_files/update", body)
+
+        versions: Dict[str, VersionInfo] = {}
+        if isinstance(json, dict):
+            for hash, json_version in json.items():
+                try:
+                    versions[hash] = ModrinthApi._json_to_version_info(json_version)
+                except (IndexError, KeyError, TypeError):
+                    # Not a version, e.g. an error response
+                    pass
+        return versions
+
+    def get_dependencies(self, version: VersionInfo) -> Dict[Sites, List[str]]:
+        """Project ids of the required dependencies.
+        Dependencies that only specify a version are looked up with a single /versions request"""
+        dependencies = list(version.dependencies.get(Sites.modrinth, []))
+        version_ids = version.dependency_versions.get(Sites.modrinth, [])
+        json_versions, _ = self._get_bulk("versions", version_ids)
+        for json in json_versions:
+            project_id = ModrinthApi._json_to_mod_id(json)
+            if project_id and project_id not in dependencies:
+                dependencies.append(project_id)
+
+        return ModrinthApi._to_dependency_map(dependencies)
+
+    @staticmethod
+    def _split_dependencies(json_version: Any) -> Tuple[List[str], List[str]]:
+        """Split the required dependencies into project ids and version ids.
+        Version ids are only used when the dependency doesn't have a project id"""
         dependencyVersions: List[str] = []
         dependencyProjects: List[str] = []
 
@@ -128,22 +400,43 @@ class ModrinthApi(Api):
                 else:
                     TealPrint.debug(f"No project or version id found for dependency, {dependency}")
 
-        # Get the actual project id from the version id
-        for version_id in dependencyVersions:
-            project_id = self._version_id_to_mod_id(version_id)
-            if project_id:
-                dependencyProjects.append(project_id)
+        return dependencyProjects, dependencyVersions
 
+    @staticmethod
+    def _to_dependency_map(dependencyProjects: List[str]) -> Dict[Sites, List[str]]:
         dependencyMap: Dict[Sites, List[str]] = {}
         if dependencyProjects:
             dependencyMap[Sites.modrinth] = dependencyProjects
 
         return dependencyMap
 
-    def _version_id_to_mod_id(self, version_id: str) -> Optional[str]:
-        json = self.http.get(f"{_base_url}/version/{version_id}")
-        if json and "mod_id" in json:
-            return str(json["mod_id"])
+    def _get_bulk(self, endpoint: str, ids: List[str]) -> Tuple[List[Any], Set[str]]:
+        """Get all ids from a bulk endpoint, e.g. /versions?ids=[...], in as few requests as possible
+
+        Returns:
+            All results, and the ids of the requests that failed, e.g. with an error response.
+            Ids that aren't in either don't exist
+        """
+        results: List[Any] = []
+        failed: Set[str] = set()
+        for start in range(0, len(ids), ModrinthApi.bulk_size):
+            chunk = ids[start : start + ModrinthApi.bulk_size]
+            json = self.http.get(f"{_base_url}/{endpoint}?ids={ModrinthApi._to_json_list(chunk)}")
+            if isinstance(json, list):
+                results.extend(json)
+            else:
+                TealPrint.verbose(f"Failed to get {len(chunk)} {endpoint} from Modrinth: {json}")
+                failed.update(chunk)
+        return results, failed
+
+    @staticmethod
+    def _to_json_list(values: List[Any]) -> str:
+        return dumps(values, separators=(",", ":"))
+
+    @staticmethod
+    def _json_to_mod_id(json: Any) -> Optional[str]:
+        if json and "project_id" in json:
+            return str(json["project_id"])
         return ""
 
     @staticmethod
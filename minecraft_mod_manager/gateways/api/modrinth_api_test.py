@@ -1,16 +1,23 @@
+import asyncio
 import json
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import pytest
-from mockito import mock, unstub, verifyStubbedInvocationsAreUsed, when
+from mockito import mock, unstub, verify, verifyStubbedInvocationsAreUsed, when
 
+from ...config import config
 from ...core.entities.mod import Mod
 from ...core.entities.mod_loaders import ModLoaders
 from ...core.entities.sites import Site, Sites
 from ...core.entities.version_info import Stabilities, VersionInfo
 from ...core.errors.mod_not_found_exception import ModNotFoundException
+from ..async_http import AsyncHttp
 from ..http import Http
+from ..project_cache import ProjectCache
+from ..project_index import ProjectIndex
+from .api import Api
 from .modrinth_api import ModrinthApi, _base_url
 
 testdata_dir = Path(__file__).parent.joinpath("testdata").joinpath("modrinth_api")
@@ -54,13 +61,33 @@ def mod_info():
 @pytest.fixture
 def http():
     mocked = mock(Http)
+    mocked.project_cache = ProjectCache()  # type: ignore
     yield mocked
     unstub()
 
 
 @pytest.fixture
-def api(http):
-    return ModrinthApi(http)
+def async_http():
+    return mock(AsyncHttp)
+
+
+@pytest.fixture
+def api(http, async_http):
+    return ModrinthApi(http, async_http)
+
+
+@pytest.fixture
+def indexed_api(http, async_http, tmp_path: Path):
+    index = ProjectIndex(tmp_path)
+    yield ModrinthApi(http, async_http, index)
+    index.close()
+
+
+def returns(value: Any):
+    async def get(*args):
+        return value
+
+    return get
 
 
 site_id = "P7dR8mSH"
@@ -72,7 +99,7 @@ def mod(id="fabric-api", name="Fabric API", site_slug="fabric-api", site_id=site
 
 def test_search_mod(api: ModrinthApi, search_result, mod_info):
     when(api.http).get(ModrinthApi._make_search_url("search-slug")).thenReturn(search_result)
-    when(api.http).get(_base_url + "/mod/search-slug").thenReturn(mod_info)
+    when(api.http).get(_base_url + "/project/search-slug").thenReturn(mod_info)
     expected = [
         Site(Sites.modrinth, "P7dR8mSH", "fabric-api"),
         Site(Sites.modrinth, "720sJXM2", "bineclaims"),
@@ -97,7 +124,7 @@ def test_search_mod(api: ModrinthApi, search_result, mod_info):
 
 def test_search_mod_with_get_mod_info_for_slug(api: ModrinthApi, search_result):
     when(api.http).get(ModrinthApi._make_search_url("search-slug")).thenReturn(search_result)
-    when(api.http).get(_base_url + "/mod/search-slug").thenReturn("")
+    when(api.http).get(_base_url + "/project/search-slug").thenReturn("")
     expected = [
         Site(Sites.modrinth, "P7dR8mSH", "fabric-api"),
         Site(Sites.modrinth, "720sJXM2", "bineclaims"),
@@ -145,20 +172,148 @@ def test_get_mod_info_not_found(api: ModrinthApi):
     unstub()
 
 
-def test_get_all_versions_directly_when_we_have_mod_id(api: ModrinthApi, versions_result, version_result):
-    when(api.http).get(f"https://api.modrinth.com/api/v1/mod/{site_id}/version").thenReturn(versions_result)
-    when(api.http).get("https://api.modrinth.com/api/v1/version/UWMXoG0K").thenReturn(version_result)
+def test_get_mod_info_only_looks_up_project_once(api: ModrinthApi, mod_info):
+    when(api.http).get(f"{_base_url}/project/mouse-tweaks").thenReturn(mod_info)
+    when(api.http).get(f"{_base_url}/project/missing").thenReturn({"error": "not found"})
+
+    by_slug = api.get_mod_info("mouse-tweaks")
+    by_id = api.get_mod_info("aC3cM3Vq")
+    by_bulk = api.get_mods_info(["aC3cM3Vq", "mouse-tweaks"])
+    for _ in range(2):
+        with pytest.raises(ModNotFoundException):
+            api.get_mod_info("missing")
+
+    verify(api.http, times=1).get(f"{_base_url}/project/mouse-tweaks")
+    verify(api.http, times=1).get(f"{_base_url}/project/missing")
+    verify(api.http, times=2).get(...)
+    unstub()
+
+    assert by_slug == by_id
+    assert by_bulk == {"aC3cM3Vq": by_id, "mouse-tweaks": by_id}
+
+
+def test_search_results_are_not_looked_up_again(api: ModrinthApi, search_result):
+    when(api.http).get(ModrinthApi._make_search_url("fabric-api")).thenReturn(search_result)
+
+    api.search_mod("fabric-api")
+
+    verify(api.http, times=0).get(f"{_base_url}/project/fabric-api")
+    unstub()
+
+
+def test_search_results_are_added_to_index(indexed_api: ModrinthApi, search_result):
+    when(indexed_api.http).get(ModrinthApi._make_search_url("fabric-api")).thenReturn(search_result)
+    when(indexed_api.http).get(f"{_base_url}/project/fabric-api").thenReturn("")
+    indexed_api.search_mod("fabric-api")
+    unstub()
+
+    actual = indexed_api.search_index("fabric-api")
+
+    assert actual[0] == Site(Sites.modrinth, "P7dR8mSH", "fabric-api")
+    assert indexed_api.search_index("gravestones") == [Site(Sites.modrinth, "ssUbhMkL", "gravestones")]
+
+
+def test_search_index_uses_filters(indexed_api: ModrinthApi, search_result):
+    when(indexed_api.http).get(ModrinthApi._make_search_url("fabric-api")).thenReturn(search_result)
+    when(indexed_api.http).get(f"{_base_url}/project/fabric-api").thenReturn("")
+    indexed_api.search_mod("fabric-api")
+    unstub()
+
+    config.filter.loader = ModLoaders.forge
+    by_loader = indexed_api.search_index("fabric-api")
+    config.filter.loader = ModLoaders.unknown
+    config.filter.version = "1.16.5"
+    by_version = indexed_api.search_index("fabric-api")
+    config.filter.version = None
+
+    assert by_loader == []
+    assert by_version == [Site(Sites.modrinth, "P7dR8mSH", "fabric-api")]
+
+
+def test_search_index_without_index(api: ModrinthApi):
+    assert api.search_index("fabric-api") == []
+
+
+def index_hits(start: int, count: int, date_modified: str = "2022-01-01T00:00:00Z") -> Any:
+    return {
+        "hits": [
+            {"project_id": f"id{i}", "slug": f"mod{i}", "title": f"Mod {i}", "date_modified": date_modified}
+            for i in range(start, start + count)
+        ]
+    }
+
+
+def test_refresh_index_builds_from_most_downloaded(indexed_api: ModrinthApi):
+    config.project_index_size = 150
+    when(indexed_api.http).get(f"{_base_url}/search?index=downloads&offset=0&limit=100").thenReturn(index_hits(0, 100))
+    when(indexed_api.http).get(f"{_base_url}/search?index=downloads&offset=100&limit=50").thenReturn(
+        index_hits(100, 50)
+    )
+
+    indexed_api.refresh_index()
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+    config.project_index_size = 5000
+    assert indexed_api.index and indexed_api.index.count() == 150
+    assert indexed_api.index.last_refresh
+    assert indexed_api.search_index("mod149") == [Site(Sites.modrinth, "id149", "mod149")]
+
+
+def test_refresh_index_stops_at_last_page(indexed_api: ModrinthApi):
+    when(indexed_api.http).get(f"{_base_url}/search?index=downloads&offset=0&limit=100").thenReturn(index_hits(0, 20))
+
+    indexed_api.refresh_index()
+
+    verify(indexed_api.http, times=1).get(...)
+    unstub()
+    assert indexed_api.index and indexed_api.index.count() == 20
+
+
+def test_refresh_index_only_gets_projects_updated_since_last_refresh(indexed_api: ModrinthApi):
+    assert indexed_api.index
+    indexed_api.index.last_refresh = Api._to_epoch_time("2022-01-01T00:00:00Z")
+    page = index_hits(0, 100, "2022-01-02T00:00:00Z")
+    page["hits"][-1]["date_modified"] = "2021-12-31T00:00:00Z"
+    when(indexed_api.http).get(f"{_base_url}/search?index=updated&offset=0&limit=100").thenReturn(page)
+
+    indexed_api.refresh_index()
+
+    verify(indexed_api.http, times=1).get(...)
+    unstub()
+    assert indexed_api.index.count() == 100
+
+
+def test_refresh_index_is_skipped_when_recently_refreshed(indexed_api: ModrinthApi):
+    assert indexed_api.index
+    indexed_api.index.last_refresh = time.time() - 60
+
+    indexed_api.refresh_index()
+
+    verify(indexed_api.http, times=0).get(...)
+    unstub()
+
+
+def test_get_all_versions_directly_when_we_have_mod_id(api: ModrinthApi, versions_result):
+    when(api.http).get(f"https://api.modrinth.com/v2/project/{site_id}/version").thenReturn(versions_result)
     expected = [
         VersionInfo(
             stability=Stabilities.beta,
             mod_loaders=set([ModLoaders.fabric]),
             site=Sites.modrinth,
             mod_name="Fabric API",
+            site_id="P7dR8mSH",
             upload_time=1618769767,
             minecraft_versions=["21w16a"],
             download_url="https://cdn.modrinth.com/data/P7dR8mSH/versions/0.33.0+1.17/fabric-api-0.33.0+1.17.jar",
             filename="fabric-api-0.33.0+1.17.jar",
-            dependencies={Sites.modrinth: ["1338", "1337"]},
+            hashes={
+                "sha1": "78eddaaaa4c6375db8cdfd8c586dac90c70acb99",
+                "sha512": "1f279b8b3355b2bb43db30bcf265e08826584e14b2af7abb3af64364059e6e1b"
+                + "ef261f529c378474e4536eccd41c30aaea98bb39cfa02ec7b0ab421ebfa0f724",
+            },
+            dependencies={Sites.modrinth: ["1338"]},
+            dependency_versions={Sites.modrinth: ["UWMXoG0K"]},
             number="0.33.0+1.17",
         ),
         VersionInfo(
@@ -166,10 +321,16 @@ def test_get_all_versions_directly_when_we_have_mod_id(api: ModrinthApi, version
             mod_loaders=set([]),
             site=Sites.modrinth,
             mod_name="Fabric API",
+            site_id="P7dR8mSH",
             upload_time=1618768763,
             minecraft_versions=["1.16.5"],
             download_url="https://cdn.modrinth.com/data/P7dR8mSH/versions/0.33.0+1.16/fabric-api-0.33.0+1.16.jar",
             filename="fabric-api-0.33.0+1.16.jar",
+            hashes={
+                "sha1": "7f20e318d9f244cbb7d0189b1c0103cb3f033969",
+                "sha512": "7b00747ddb3b5cadb48386fc2969ba295474c0d53a84cad227366fe56d2d3878"
+                + "590e5379462465cffe3447066b1fe32c35e2694686b22ec1615e513ed67875e6",
+            },
             number="0.33.0+1.16",
         ),
         VersionInfo(
@@ -177,10 +338,16 @@ def test_get_all_versions_directly_when_we_have_mod_id(api: ModrinthApi, version
             mod_loaders=set([ModLoaders.forge]),
             site=Sites.modrinth,
             mod_name="Fabric API",
+            site_id="P7dR8mSH",
             upload_time=1618429021,
             minecraft_versions=["21w15a"],
             download_url="https://cdn.modrinth.com/data/P7dR8mSH/versions/0.32.9+1.17/fabric-api-0.32.9+1.17.jar",
             filename="fabric-api-0.32.9+1.17.jar",
+            hashes={
+                "sha1": "c94cd5f1d58a9415c64857d1e3760695bf8e948f",
+                "sha512": "15b54ce72943e1b51e901c641d5887aa836e3d7ea07cdb03af722e2360d32e97"
+                + "d4fa51267ad811d1f86b1ef05bd63d2eca5b08f6dc2ffd9724e3199284c918d2",
+            },
             number="0.32.9+1.17",
         ),
         VersionInfo(
@@ -188,10 +355,16 @@ def test_get_all_versions_directly_when_we_have_mod_id(api: ModrinthApi, version
             mod_loaders=set([ModLoaders.fabric, ModLoaders.forge]),
             site=Sites.modrinth,
             mod_name="Fabric API",
+            site_id="P7dR8mSH",
             upload_time=1618427403,
             minecraft_versions=["1.16.5"],
             download_url="https://cdn.modrinth.com/data/P7dR8mSH/versions/0.32.9+1.16/fabric-api-0.32.9+1.16.jar",
             filename="fabric-api-0.32.9+1.16.jar",
+            hashes={
+                "sha1": "230936e18384bfb5ba7f229f2b9776a6b56c5add",
+                "sha512": "1ade2606a13c2ec4fa67d7eafbcbf5e6a6a6f48ca9d29831334ed10f4b5cbbcb"
+                + "7e9de157ac5bd73cf36fc1f3431787d34d57eaa74bff34c11265648687b805f9",
+            },
             number="0.32.9+1.16",
         ),
     ]
@@ -212,10 +385,16 @@ def test_get_versions_without_files(api: ModrinthApi, versions_without_files):
             mod_loaders=set([ModLoaders.fabric]),
             site=Sites.modrinth,
             mod_name="Fabric API",
+            site_id="Nz0RSWrF",
             upload_time=1638379386,
             minecraft_versions=["1.18"],
             download_url="https://cdn.modrinth.com/data/Nz0RSWrF/versions/0.2.5/lazy-language-loader-0.2.5.jar",
             filename="lazy-language-loader-0.2.5.jar",
+            hashes={
+                "sha1": "feb136c022099b73a7f28adc996ac83add7929e7",
+                "sha512": "7b2ea0b7865fcd05168195ce22a207353ae4db11376a63e20038130196789cd5"
+                + "4958d863e4ee3065f0164ffac6e4878f3bd0f2b079719db8ba9cf5cda3682c85",
+            },
             number="0.2.5",
         ),
         VersionInfo(
@@ -223,10 +402,16 @@ def test_get_versions_without_files(api: ModrinthApi, versions_without_files):
             mod_loaders=set([ModLoaders.fabric]),
             site=Sites.modrinth,
             mod_name="Fabric API",
+            site_id="Nz0RSWrF",
             upload_time=1638297554,
             minecraft_versions=["1.18"],
             download_url="https://cdn.modrinth.com/data/Nz0RSWrF/versions/0.2.3/lazy-language-loader-0.2.3.jar",
             filename="lazy-language-loader-0.2.3.jar",
+            hashes={
+                "sha1": "4b903d6004a2b54a83df23529843fb378d603f23",
+                "sha512": "c0a698232c552e479e8640a41b1d0c464c3e3420be53f146c0723cfcb1e1e56c"
+                + "0c5efd2673008844702a715ee9618b85264b294cdee72c6daa2086bb69e469af",
+            },
             number="0.2.3",
         ),
     ]
@@ -237,3 +422,261 @@ def test_get_versions_without_files(api: ModrinthApi, versions_without_files):
     unstub()
 
     assert expected == actual
+
+
+def test_iter_versions_only_creates_iterated_versions(api: ModrinthApi, versions_result):
+    # Creating a version from the second element fails, so it can't have been created
+    when(api.http).get(f"https://api.modrinth.com/v2/project/{site_id}/version").thenReturn(
+        [versions_result[0], {"invalid": "version"}]
+    )
+
+    versions = api.iter_versions(mod())
+    actual = next(versions)
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual.number == "0.33.0+1.17"
+    assert actual.name == "Fabric API"
+
+
+def test_get_all_versions_async_same_as_sync(api: ModrinthApi, versions_result):
+    when(api.http).get(f"https://api.modrinth.com/v2/project/{site_id}/version").thenReturn(versions_result)
+    when(api.async_http).get(f"https://api.modrinth.com/v2/project/{site_id}/version").thenAnswer(
+        returns(versions_result)
+    )
+
+    expected = api.get_all_versions(mod())
+    actual = asyncio.run(api.get_all_versions_async(mod()))
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert expected == actual
+    assert actual[0].dependencies == {Sites.modrinth: ["1338"]}
+
+
+def test_search_mod_async(api: ModrinthApi, search_result, mod_info):
+    when(api.async_http).get(ModrinthApi._make_search_url("search-slug")).thenAnswer(returns(search_result))
+    when(api.async_http).get(_base_url + "/project/search-slug").thenAnswer(returns(mod_info))
+
+    actual = asyncio.run(api.search_mod_async("search-slug"))
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert len(actual) == 11
+    assert actual[0] == Site(Sites.modrinth, "P7dR8mSH", "fabric-api")
+    assert actual[-1] == Site(Sites.modrinth, "aC3cM3Vq", "mouse-tweaks")
+
+
+def test_search_mod_async_when_slug_not_found(api: ModrinthApi, search_result):
+    when(api.async_http).get(ModrinthApi._make_search_url("search-slug")).thenAnswer(returns(search_result))
+    when(api.async_http).get(_base_url + "/project/search-slug").thenAnswer(returns(""))
+
+    actual = asyncio.run(api.search_mod_async("search-slug"))
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert len(actual) == 10
+
+
+def test_get_mod_info_async_not_found(api: ModrinthApi):
+    when(api.async_http).get(...).thenAnswer(returns({"error": "not found"}))
+
+    with pytest.raises(ModNotFoundException):
+        asyncio.run(api.get_mod_info_async("123"))
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+
+def test_get_dependencies_looks_up_all_versions_in_one_request(api: ModrinthApi, version_result):
+    version = VersionInfo(
+        stability=Stabilities.release,
+        mod_loaders=set([ModLoaders.fabric]),
+        site=Sites.modrinth,
+        upload_time=0,
+        minecraft_versions=[],
+        download_url="",
+        number="1.0.0",
+        dependencies={Sites.modrinth: ["1338"]},
+        dependency_versions={Sites.modrinth: ["UWMXoG0K", "other"]},
+    )
+    other_version = {**version_result, "id": "other", "project_id": "1339"}
+    when(api.http).get(f'{_base_url}/versions?ids=["UWMXoG0K","other"]').thenReturn([version_result, other_version])
+
+    actual = api.get_dependencies(version)
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {Sites.modrinth: ["1338", "1337", "1339"]}
+
+
+def test_get_dependencies_without_version_ids_sends_no_requests(api: ModrinthApi):
+    version = VersionInfo(
+        stability=Stabilities.release,
+        mod_loaders=set([ModLoaders.fabric]),
+        site=Sites.modrinth,
+        upload_time=0,
+        minecraft_versions=[],
+        download_url="",
+        number="1.0.0",
+        dependencies={Sites.modrinth: ["1338"]},
+    )
+
+    assert api.get_dependencies(version) == {Sites.modrinth: ["1338"]}
+
+
+def test_get_mods_info_by_id_and_slug_in_one_request(api: ModrinthApi, mod_info):
+    when(api.http).get(f'{_base_url}/projects?ids=["aC3cM3Vq","fabric-api","missing"]').thenReturn(
+        [mod_info, {**mod_info, "id": "P7dR8mSH", "slug": "fabric-api", "title": "Fabric API"}]
+    )
+
+    actual = api.get_mods_info(["aC3cM3Vq", "fabric-api", "missing"])
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {
+        "aC3cM3Vq": Mod("", "Mouse Tweaks", {Sites.modrinth: Site(Sites.modrinth, "aC3cM3Vq", "mouse-tweaks")}),
+        "fabric-api": Mod("", "Fabric API", {Sites.modrinth: Site(Sites.modrinth, "P7dR8mSH", "fabric-api")}),
+    }
+
+
+def test_get_mods_info_only_remembers_missing_projects_of_successful_requests(api: ModrinthApi):
+    ModrinthApi.bulk_size = 2
+    when(api.http).get(f'{_base_url}/projects?ids=["a","b"]').thenReturn({"error": "invalid_input"})
+    when(api.http).get(f'{_base_url}/projects?ids=["c"]').thenReturn([])
+
+    actual = api.get_mods_info(["a", "b", "c"])
+
+    ModrinthApi.bulk_size = 100
+    unstub()
+    assert actual == {}
+    assert api.http.project_cache.get(Sites.modrinth, "a") is None
+    assert api.http.project_cache.get(Sites.modrinth, "b") is None
+    cached = api.http.project_cache.get(Sites.modrinth, "c")
+    assert cached and not cached.found
+
+
+def test_get_mods_info_splits_many_ids_into_several_requests(api: ModrinthApi):
+    ModrinthApi.bulk_size = 2
+    when(api.http).get(...).thenReturn([])
+
+    api.get_mods_info(["a", "b", "c"])
+
+    verify(api.http).get(f'{_base_url}/projects?ids=["a","b"]')
+    verify(api.http).get(f'{_base_url}/projects?ids=["c"]')
+    ModrinthApi.bulk_size = 100
+    unstub()
+
+
+@pytest.mark.parametrize(
+    "name,mod_loader,filter_loader,version,filter,expected",
+    [
+        ("No filters", ModLoaders.unknown, ModLoaders.unknown, None, True, f"{_base_url}/project/{site_id}/version"),
+        (
+            "Loader of the installed version",
+            ModLoaders.fabric,
+            ModLoaders.unknown,
+            None,
+            True,
+            f'{_base_url}/project/{site_id}/version?loaders=["fabric"]',
+        ),
+        (
+            "Loader and minecraft version filters",
+            ModLoaders.fabric,
+            ModLoaders.forge,
+            "1.19",
+            True,
+            f'{_base_url}/project/{site_id}/version?loaders=["forge"]&game_versions=["1.19"]',
+        ),
+        (
+            "All versions when not filtering",
+            ModLoaders.fabric,
+            ModLoaders.forge,
+            "1.19",
+            False,
+            f"{_base_url}/project/{site_id}/version",
+        ),
+    ],
+)
+def test_make_versions_url(name, mod_loader, filter_loader, version, filter, expected):
+    print(name)
+    config.filter.loader = filter_loader
+    config.filter.version = version
+    input = mod()
+    input.mod_loader = mod_loader
+
+    actual = ModrinthApi._make_versions_url(input, filter)
+
+    config.filter.loader = ModLoaders.unknown
+    config.filter.version = None
+    assert expected == actual
+
+
+@pytest.mark.parametrize(
+    "loader,version,expected",
+    [
+        (ModLoaders.unknown, None, f"{_base_url}/search?query=carpet"),
+        (ModLoaders.fabric, None, f'{_base_url}/search?query=carpet&facets=[["categories:fabric"]]'),
+        (
+            ModLoaders.forge,
+            "1.19",
+            f'{_base_url}/search?query=carpet&facets=[["categories:forge"],["versions:1.19"]]',
+        ),
+    ],
+)
+def test_make_search_url(loader, version, expected):
+    config.filter.loader = loader
+    config.filter.version = version
+
+    actual = ModrinthApi._make_search_url("carpet")
+
+    config.filter.loader = ModLoaders.unknown
+    config.filter.version = None
+    assert expected == actual
+
+
+def test_get_latest_versions_by_hash(api: ModrinthApi, version_result):
+    config.filter.version = "1.19"
+    config.filter.stability = Stabilities.release
+    when(api.http).post(
+        f"{_base_url}/version_files/update",
+        {
+            "hashes": ["aaa", "bbb"],
+            "algorithm": "sha1",
+            "loaders": ["fabric"],
+            "game_versions": ["1.19"],
+            "version_types": ["release"],
+        },
+    ).thenReturn({"aaa": version_result})
+
+    actual = api.get_latest_versions_by_hash(["aaa", "bbb"], ModLoaders.fabric, config.filter.version)
+
+    config.filter.version = None
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert list(actual.keys()) == ["aaa"]
+    assert actual["aaa"].number == "0.51.2+1.19"
+    assert actual["aaa"].site_id == "1337"
+
+
+def test_find_mods_by_hash(api: ModrinthApi, version_result):
+    when(api.http).post(f"{_base_url}/version_files", {"hashes": ["aaa", "bbb"], "algorithm": "sha1"}).thenReturn(
+        {"aaa": version_result}
+    )
+    when(api.http).get(f'{_base_url}/projects?ids=["1337"]').thenReturn(
+        [{"id": "1337", "slug": "carpet", "title": "Carpet"}]
+    )
+
+    actual = api.find_mods_by_hash(["aaa", "bbb"])
+
+    verifyStubbedInvocationsAreUsed()
+    unstub()
+
+    assert actual == {"aaa": Site(Sites.modrinth, "1337", "carpet")}
@@ -1,11 +1,18 @@
+from typing import Optional
+
+from ..async_http import AsyncHttp
 from ..http import Http
 
 _base_url = "https://word-splitter-5p3pi6z2ma-ew.a.run.app"
 
 
 class WordSplitterApi:
-    def __init__(self, http: Http) -> None:
+    def __init__(self, http: Http, async_http: Optional[AsyncHttp] = None) -> None:
         self.http = http
+        self.async_http = async_http or AsyncHttp(http)
 
     def split_words(self, text: str) -> str:
         return self.http.get(f"{_base_url}/{text}")
+
+    async def split_words_async(self, text: str) -> str:
+        return await self.async_http.get(f"{_base_url}/{text}")
@@ -12,7 +12,9 @@ from ..utils.log_colors import LogColors
 
 
 def parse_args():
-    parser = argparse.ArgumentParser(description="Install or update Minecraft mods from Modrinth and CurseForge")
+    parser = argparse.ArgumentParser(
+        description="Install or update Minecraft mods from Modrinth and CurseForge", add_help=False
+    )
 
     parser.add_argument(
         "action",
@@ -30,62 +32,141 @@ def parse_args():
         + "To reset configuration, type 'mod_name='. To specify multiple sites add a comma between site names. "
         + "E.g. 'dynmap=curse,modrinth' or 'dynmap=curse:dynmapforge,modrinth' if you want to have different slugs",
     )
-    parser.add_argument(
+    minecraft = parser.add_argument_group("minecraft")
+    minecraft.add_argument(
         "-d",
         "--dir",
         type=_is_dir,
         help="Location of the mods folder. By default it's the current directory",
     )
-    parser.add_argument(
+    minecraft.add_argument(
         "-v",
         "--minecraft-version",
         help="Only update mods to this Minecraft version",
     )
-    parser.add_argument(
+    minecraft.add_argument(
         "--beta",
         action="store_true",
         help="Allow beta releases of mods",
     )
-    parser.add_argument(
+    minecraft.add_argument(
         "--alpha",
         action="store_true",
         help="Allow alpha and beta releases of mods",
     )
-    parser.add_argument(
+    minecraft.add_argument(
         "--mod-loader",
         choices=["fabric", "forge"],
         help="Only install mods that use this mod loader. "
         + "You rarely need to be this specific. "
         + "The application figures out for itself which type you'll likely want to install.",
     )
-    parser.add_argument(
+    network = parser.add_argument_group("network & performance")
+    network.add_argument(
+        "-j",
+        "--jobs",
+        type=_is_positive_int,
+        default=1,
+        help="How many mods to find and download at the same time. Default is 1",
+    )
+    network.add_argument(
+        "--pool-size",
+        type=_is_positive_int,
+        help="Max number of open connections per host. Defaults to --jobs, but at least 10",
+    )
+    network.add_argument(
+        "--connect-timeout",
+        type=_is_positive_float,
+        help="Seconds to wait for a connection to a site before retrying. Default is 10",
+    )
+    network.add_argument(
+        "--read-timeout",
+        type=_is_positive_float,
+        help="Seconds to wait for data from a site before retrying. Default is 60",
+    )
+    network.add_argument(
+        "--deadline",
+        type=_is_duration,
+        help="Max time for the whole run, e.g. 300, 90s, 10m, or 1h. "
+        + "Mods that haven't been updated by then are skipped, and listed at the end",
+    )
+    network.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't use or update the cached API responses. Every request is sent in full",
+    )
+    network.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached API responses before running",
+    )
+    network.add_argument(
+        "--jar-store",
+        help="Directory for storing downloaded jars, which can be shared between several mods directories. "
+        + "Identical jars are then only downloaded once and hardlinked into the mods directories",
+    )
+    network.add_argument(
+        "--curse-api-key",
+        help="Your CurseForge API key, which is needed for installing and updating mods from CurseForge. "
+        + "Can also be set with the CURSEFORGE_API_KEY environment variable",
+    )
+    network.add_argument(
+        "--project-index",
+        nargs="?",
+        const="",
+        metavar="DIR",
+        help="Find mods in a local index of the most popular Modrinth projects before searching online. "
+        + "The index is built the first time, which takes a minute, and is then refreshed once a day. "
+        + "It's shared between all mods directories, and stored in DIR or ~/.cache/minecraft-mod-manager",
+    )
+    network.add_argument(
+        "--offline",
+        action="store_true",
+        help="Don't connect to the internet, only use cached API responses and the jar store. "
+        + "Mods that aren't cached fail immediately",
+    )
+    logging = parser.add_argument_group("logging & help")
+    logging.add_argument(
+        "-h",
+        "--help",
+        action="help",
+        help="show this help message and exit",
+    )
+    logging.add_argument(
+        "--stats-json",
+        help="Write statistics of all requests to this file, e.g. latency per host and the slowest mods. "
+        + "A summary is printed with --verbose",
+    )
+    logging.add_argument(
         "--verbose",
         action="store_true",
         help="Print more messages",
     )
-    parser.add_argument(
+    logging.add_argument(
         "--debug",
         action="store_true",
         help="Turn on debug messages. This automatically turns on --verbose as well",
     )
-    parser.add_argument(
+    logging.add_argument(
         "--pretend",
         action="store_true",
         help="Only pretend to install/update/configure. Does not change anything",
     )
-    parser.add_argument(
+    logging.add_argument(
         "--version",
         action="version",
         version=f"{config.app_name}: {config.app_version}",
         help="Show application version",
     )
-    parser.add_argument(
+    logging.add_argument(
         "--no-color",
         action="store_true",
         help="Disable color output",
     )
 
     args = parser.parse_args()
+    if args.offline and (args.no_cache or args.clear_cache):
+        parser.error("--offline only uses the cache, it can't be used with --no-cache or --clear-cache")
     args.action = Actions.from_name(args.action)
     args.mods = _parse_mods(args.mods)
     return args
@@ -161,3 +242,28 @@ def _is_dir(dir: str) -> str:
         return dir
     else:
         raise NotADirectoryError(dir)
+
+
+def _is_positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
+
+
+def _is_duration(value: str) -> float:
+    """Seconds of a duration like 300, 90s, 10m, or 1h"""
+    units = {"s": 1, "m": 60, "h": 60 * 60}
+    unit = units.get(value[-1:])
+    number = value[:-1] if unit else value
+    try:
+        return _is_positive_float(number) * (unit or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not a duration, e.g. 300, 90s, 10m, or 1h")
+
+
+def _is_positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
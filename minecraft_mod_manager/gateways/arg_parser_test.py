@@ -1,8 +1,10 @@
+import argparse
+
 import pytest
 
 from ..core.entities.mod import ModArg
 from ..core.entities.sites import Site, Sites
-from .arg_parser import _parse_mods
+from .arg_parser import _is_duration, _parse_mods
 
 
 @pytest.mark.parametrize(
@@ -94,3 +96,22 @@ def test_parse_mods(name, input, expected):
         with pytest.raises(SystemExit) as e:
             _parse_mods(input)
         assert expected == e.type
+
+
+@pytest.mark.parametrize(
+    "input,expected",
+    [
+        ("300", 300),
+        ("90s", 90),
+        ("1.5m", 90),
+        ("2h", 7200),
+    ],
+)
+def test_is_duration(input, expected):
+    assert _is_duration(input) == expected
+
+
+@pytest.mark.parametrize("input", ["", "m", "10x", "0", "-5m"])
+def test_is_duration_invalid(input):
+    with pytest.raises(argparse.ArgumentTypeError):
+        _is_duration(input)
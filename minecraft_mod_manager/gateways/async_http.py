@@ -0,0 +1,188 @@
+import asyncio
+import os
+from typing import TYPE_CHECKING, Any, Awaitable, BinaryIO, Callable, Dict, Mapping, Optional
+
+from ..config import config
+from ..core.errors.download_failed import DownloadFailed
+from .file_hasher import FileHasher
+from .http import Http, NotCached
+from .http_stats import RequestRecord, http_stats
+from .partial_download import PartialDownload
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class AsyncHttp:
+    """asyncio version of Http, for sending a lot of requests at the same time from a single thread.
+    Only the transport differs, the caches, rate limits, retries, and jar store are handled by the public
+    helpers of the Http it's created from.
+    Requires aiohttp, install it with `pip install minecraft-mod-manager[async]`.
+    """
+
+    def __init__(self, http: Http) -> None:
+        self.http = http
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._downloads_in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        """Downloads by url. Only one task may write to the partial file of a url"""
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """The session is bound to an event loop, so create it lazily in the running loop"""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit_per_host=config.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, headers=Http.headers)
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def get(self, url: str) -> Any:
+        """Get the url. Callers that request the same url while it's being fetched wait for that request
+        instead of sending their own"""
+        url = Http.override_url(url)
+        with http_stats.request(url, "get") as request:
+            return await AsyncHttp._share(self._in_flight, url, lambda: self._get(request))
+
+    @staticmethod
+    async def _share(
+        in_flight: Dict[str, "asyncio.Future[Any]"], url: str, start: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Start the request, or wait for the one that's already in flight for the url"""
+        future = in_flight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(start())
+            in_flight[url] = future
+            future.add_done_callback(lambda _: in_flight.pop(url, None))
+
+        # Cancelling one of the callers shouldn't cancel the request for the others
+        return await asyncio.shield(future)
+
+    async def _get(self, request: RequestRecord) -> Any:
+        lookup = self.http.lookup(request)
+        if lookup.found:
+            return lookup.value
+
+        async with await self._get_with_retries(request, lookup.headers) as response:
+            if lookup.cached and response.status == 304:
+                return self.http.use_not_modified(request, lookup.cached)
+            body = await response.text()
+            return self.http.use_response(request, response.status, response.headers, body)
+
+    async def download(self, url: str, filename: str, hashes: Mapping[str, str] = {}) -> str:
+        """Download the specified mod. Callers that download the same url while it's being downloaded
+        wait for that download instead of writing to the same partial file
+        Args:
+            hashes: Expected hashes of the file by algorithm, used for looking up the file in the jar store
+        Returns:
+            Filename of the downloaded and saved file
+        Exception:
+            DownloadFailed if the download failed
+        """
+        if config.pretend:
+            return filename
+
+        url = Http.override_url(url)
+        with http_stats.request(url, "download") as request:
+            return await AsyncHttp._share(
+                self._downloads_in_flight, url, lambda: self._download(request, filename, hashes)
+            )
+
+    async def _download(self, request: RequestRecord, filename: str, hashes: Mapping[str, str]) -> str:
+        loop = asyncio.get_running_loop()
+        stored = await loop.run_in_executor(None, self.http.link_from_jar_store, request, filename, hashes)
+        if stored:
+            return stored
+
+        partial = PartialDownload(request.url)
+        async with await self._get_with_retries(request, Http.download_headers(partial)) as response:
+            if response.status != 200 and response.status != 206:
+                partial.remove()
+                raise DownloadFailed(response.status, str(response.reason), await response.text())
+
+            filename = Http.download_path(filename, response.headers)
+            digests = await AsyncHttp._save(response, partial, filename, hashes, request)
+
+        await loop.run_in_executor(None, self.http.add_to_jar_store, filename, digests)
+        return filename
+
+    @staticmethod
+    async def _save(
+        response: "aiohttp.ClientResponse",
+        partial: PartialDownload,
+        filename: str,
+        hashes: Mapping[str, str],
+        request: RequestRecord,
+    ) -> Dict[str, str]:
+        """Stream the response to a partial file and move it into place once it's complete, see Http._save().
+        Writing, hashing, and syncing the file runs in the default executor to not block the event loop
+        """
+        loop = asyncio.get_running_loop()
+        hasher = FileHasher(hashes.keys())
+        file = await loop.run_in_executor(None, partial.open, response.status, response.headers)
+        with file:
+            # Resumed, include the already downloaded part
+            if response.status == 206:
+                await loop.run_in_executor(None, hasher.update_from_file, partial.file)
+
+            try:
+                async for chunk in response.content.iter_chunked(Http.download_chunk_size):
+                    Http.check_deadline(request.url)
+                    await loop.run_in_executor(None, AsyncHttp._write, file, hasher, chunk)
+                    request.bytes += len(chunk)
+            except asyncio.TimeoutError as e:
+                # The partial file is resumed the next time
+                raise DownloadFailed(0, "Connection lost while downloading", str(e))
+            await loop.run_in_executor(None, AsyncHttp._sync, file)
+
+        return await loop.run_in_executor(None, Http.complete, partial, filename, hasher, hashes)
+
+    @staticmethod
+    def _write(file: BinaryIO, hasher: FileHasher, chunk: bytes) -> None:
+        file.write(chunk)
+        hasher.update(chunk)
+
+    @staticmethod
+    def _sync(file: BinaryIO) -> None:
+        file.flush()
+        os.fsync(file.fileno())
+
+    async def _get_with_retries(
+        self, request: RequestRecord, headers: Dict[str, str] = {}
+    ) -> "aiohttp.ClientResponse":
+        url = request.url
+        if config.offline:
+            raise NotCached(url)
+
+        import aiohttp
+
+        session = self._get_session()
+        response: Optional["aiohttp.ClientResponse"] = None
+        for retry in range(Http.retries_max):
+            request.retries = retry
+            await asyncio.sleep(self.http.reserve_request(url))
+            Http.check_deadline(url)
+
+            connect, read = Http.timeout()
+            timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            try:
+                response = await session.get(url, headers=headers, timeout=timeout)
+            except asyncio.TimeoutError:
+                await asyncio.sleep(Http.retry_delay_after_timeout(url, retry))
+                continue
+
+            delay = self.http.retry_delay(request, retry, response.status, response.headers)
+            if delay is None:
+                return response
+            response.release()
+            await asyncio.sleep(delay)
+        if response is None:
+            raise Http.max_retries_exceeded(url, 0, "Timed out", "")
+        raise Http.max_retries_exceeded(url, response.status, str(response.reason), "")
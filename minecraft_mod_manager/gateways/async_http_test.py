@@ -0,0 +1,258 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List
+
+import pytest
+
+from ..config import config
+from .async_http import AsyncHttp
+from .http import DeadlineExceeded, Http, MaxRetriesExceeded
+from .http_stats import HttpStats, http_stats
+
+web = pytest.importorskip("aiohttp.web")
+
+
+@pytest.fixture(autouse=True)
+def stats():
+    """Don't leak the recorded requests to the other tests"""
+    http_stats.clear()
+    yield http_stats
+    http_stats.clear()
+
+
+@pytest.fixture
+def mods_dir(tmp_path: Path):
+    config.dir = tmp_path
+    yield tmp_path
+    config.dir = Path(".")
+
+
+def serve(routes: List[Any], test: Callable[[str], Awaitable[Any]]) -> Any:
+    """Start a local server with the routes and run the test against it"""
+
+    async def run() -> Any:
+        app = web.Application()
+        app.add_routes(routes)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            return await test(f"http://127.0.0.1:{port}")
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_get_json():
+    async def handler(request):
+        return web.json_response({"slug": "carpet"})
+
+    http = Http()
+    async_http = AsyncHttp(http)
+
+    async def test(url: str):
+        try:
+            return await async_http.get(f"{url}/mod")
+        finally:
+            await async_http.close()
+
+    assert serve([web.get("/mod", handler)], test) == {"slug": "carpet"}
+
+
+def test_get_shares_memory_cache_with_http():
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        return web.json_response({"slug": "carpet"})
+
+    http = Http()
+    async_http = AsyncHttp(http)
+
+    async def test(url: str):
+        try:
+            await async_http.get(f"{url}/mod")
+            return http.get(f"{url}/mod")
+        finally:
+            await async_http.close()
+
+    assert serve([web.get("/mod", handler)], test) == {"slug": "carpet"}
+    assert len(requests) == 1
+
+
+def test_get_retries_server_errors():
+    Http.retry_backoff_factor = 0.001
+    statuses = [500, 200]
+
+    async def handler(request):
+        return web.Response(text="ok", status=statuses.pop(0))
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            return await async_http.get(f"{url}/mod")
+        finally:
+            await async_http.close()
+
+    assert serve([web.get("/mod", handler)], test) == "ok"
+    Http.retry_backoff_factor = 1.5
+
+
+def test_get_raises_when_max_retries_exceeded():
+    Http.retry_backoff_factor = 0.001
+
+    async def handler(request):
+        return web.Response(status=503)
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            await async_http.get(f"{url}/mod")
+        finally:
+            await async_http.close()
+
+    with pytest.raises(MaxRetriesExceeded):
+        serve([web.get("/mod", handler)], test)
+    Http.retry_backoff_factor = 1.5
+
+
+def test_download(mods_dir: Path):
+    content = b"jar content" * 1000
+
+    async def handler(request):
+        return web.Response(body=content)
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            return await async_http.download(f"{url}/mod.jar", "mod.jar")
+        finally:
+            await async_http.close()
+
+    filename = serve([web.get("/mod.jar", handler)], test)
+
+    assert Path(filename) == mods_dir.joinpath("mod.jar")
+    assert Path(filename).read_bytes() == content
+    assert list(mods_dir.glob(".*.part*")) == []
+
+
+def test_download_only_downloads_once_when_called_concurrently(mods_dir: Path):
+    content = b"jar content" * 1000
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return web.Response(body=content)
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            return await asyncio.gather(*[async_http.download(f"{url}/mod.jar", "mod.jar") for _ in range(5)])
+        finally:
+            await async_http.close()
+
+    filenames = serve([web.get("/mod.jar", handler)], test)
+
+    assert filenames == [str(mods_dir.joinpath("mod.jar"))] * 5
+    assert mods_dir.joinpath("mod.jar").read_bytes() == content
+    assert len(requests) == 1
+
+
+def test_get_only_requests_once_when_called_concurrently():
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return web.json_response({"slug": "carpet"})
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            return await asyncio.gather(*[async_http.get(f"{url}/mod") for _ in range(5)])
+        finally:
+            await async_http.close()
+
+    assert serve([web.get("/mod", handler)], test) == [{"slug": "carpet"}] * 5
+    assert len(requests) == 1
+
+
+def test_get_records_compressed_transfer(stats: HttpStats):
+    body = [{"version_number": f"1.0.{i}"} for i in range(1000)]
+
+    async def handler(request):
+        response = web.json_response(body)
+        response.enable_compression()
+        return response
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            return await async_http.get(f"{url}/versions")
+        finally:
+            await async_http.close()
+
+    assert serve([web.get("/versions", handler)], test) == body
+    record = stats.records[0]
+    assert record.encoding in ["gzip", "deflate", "br"]
+
+
+def test_get_raises_when_server_stalls():
+    Http.retry_backoff_factor = 0.001
+    config.read_timeout = 0.05
+
+    async def handler(request):
+        await asyncio.sleep(1)
+        return web.Response(text="ok")
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        try:
+            await async_http.get(f"{url}/mod")
+        finally:
+            await async_http.close()
+
+    with pytest.raises(MaxRetriesExceeded) as e:
+        serve([web.get("/mod", handler)], test)
+    assert e.value.reason == "Timed out"
+    config.read_timeout = 60
+    Http.retry_backoff_factor = 1.5
+
+
+def test_get_does_not_wait_for_rate_limit_past_deadline():
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        return web.Response(text="ok")
+
+    async_http = AsyncHttp(Http())
+
+    async def test(url: str):
+        async_http.http.rate_limiter.update(url, 429, {"Retry-After": "3"})
+        try:
+            await async_http.get(f"{url}/mod")
+        finally:
+            await async_http.close()
+
+    config.deadline = time.monotonic() + 0.5
+    start = time.monotonic()
+    try:
+        with pytest.raises(DeadlineExceeded):
+            serve([web.get("/mod", handler)], test)
+    finally:
+        config.deadline = None
+    assert time.monotonic() - start < 0.5
+    assert requests == []
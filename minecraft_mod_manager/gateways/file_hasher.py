@@ -0,0 +1,34 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+
+class FileHasher:
+    """Calculates several hashes of a file at the same time, chunk by chunk while it's being written"""
+
+    algorithms = ["sha512", "sha1"]
+    """Supported hash algorithms, strongest first"""
+
+    def __init__(self, algorithms: Iterable[str]) -> None:
+        self._hashers = {
+            algorithm: hashlib.new(algorithm) for algorithm in FileHasher.algorithms if algorithm in algorithms
+        }
+
+    def update(self, chunk: bytes) -> None:
+        for hasher in self._hashers.values():
+            hasher.update(chunk)
+
+    def update_from_file(self, file: Path, chunk_size: int = 64 * 1024) -> None:
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                self.update(chunk)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {algorithm: hasher.hexdigest() for algorithm, hasher in self._hashers.items()}
+
+    def find_mismatch(self, expected: Mapping[str, str]) -> Optional[str]:
+        """Returns the first algorithm whose hash doesn't match the expected hash, None if all match"""
+        for algorithm, digest in self.hexdigests().items():
+            if algorithm in expected and expected[algorithm].lower() != digest:
+                return algorithm
+        return None
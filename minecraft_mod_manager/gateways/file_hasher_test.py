@@ -0,0 +1,43 @@
+import hashlib
+from pathlib import Path
+
+from .file_hasher import FileHasher
+
+content = b"jar content"
+
+
+def test_hash_chunks():
+    hasher = FileHasher(["sha1", "sha512", "md5"])
+
+    hasher.update(content[:4])
+    hasher.update(content[4:])
+
+    assert hasher.hexdigests() == {
+        "sha512": hashlib.sha512(content).hexdigest(),
+        "sha1": hashlib.sha1(content).hexdigest(),
+    }
+
+
+def test_update_from_file(tmp_path: Path):
+    file = tmp_path.joinpath("mod.jar")
+    file.write_bytes(content[:4])
+    hasher = FileHasher(["sha1"])
+
+    hasher.update_from_file(file, chunk_size=3)
+    hasher.update(content[4:])
+
+    assert hasher.find_mismatch({"sha1": hashlib.sha1(content).hexdigest()}) is None
+
+
+def test_find_mismatch():
+    hasher = FileHasher(["sha1", "sha512"])
+    hasher.update(content)
+
+    actual = hasher.find_mismatch(
+        {
+            "sha1": hashlib.sha1(content).hexdigest().upper(),
+            "sha512": hashlib.sha512(b"other content").hexdigest(),
+        }
+    )
+
+    assert actual == "sha512"
@@ -1,17 +1,30 @@
+import json
+import os
 import re
+import sys
 import time
 from os import path
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 
 import latest_user_agents
 import requests
+from requests.adapters import HTTPAdapter
 from requests.models import Response
 from tealprint import TealPrint
+from urllib3.util.request import ACCEPT_ENCODING
 
 from ..config import config
 from ..core.errors.download_failed import DownloadFailed
-
-_headers = {"User-Agent": latest_user_agents.get_random_user_agent()}
+from .file_hasher import FileHasher
+from .http_stats import RequestRecord, http_stats
+from .jar_store import JarStore
+from .memory_cache import MemoryCache
+from .partial_download import PartialDownload
+from .project_cache import ProjectCache
+from .rate_limiter import RateLimiter
+from .response_cache import CachedResponse, ResponseCache
+from .single_flight import SingleFlight
 
 
 class MaxRetriesExceeded(Exception):
@@ -26,28 +39,194 @@ class MaxRetriesExceeded(Exception):
         return f"{self.status_code}: {self.reason}"
 
 
+class NotCached(Exception):
+    """The response or file isn't cached and we're offline"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def __str__(self) -> str:
+        return f"{self.url} isn't cached and can't be fetched when offline"
+
+
+class DeadlineExceeded(Exception):
+    """The --deadline of the run has passed, so no more requests are sent"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def __str__(self) -> str:
+        return f"Deadline passed before {self.url} could be fetched"
+
+
+class Unauthorized(Exception):
+    """The server refused the request, e.g. because an API key is missing or invalid"""
+
+    def __init__(self, url: str, status_code: int):
+        self.url = url
+        self.status_code = status_code
+
+    def __str__(self) -> str:
+        return f"{self.status_code}: Not allowed to request {self.url}"
+
+
+class CacheLookup:
+    """Result of looking up a url in the caches before requesting it"""
+
+    def __init__(
+        self, value: Any = None, cached: Optional[CachedResponse] = None, headers: Dict[str, str] = {}
+    ) -> None:
+        self.value = value
+        """Value of the url if it was found and doesn't have to be requested"""
+        self.cached = cached
+        """Cached response to revalidate with the request"""
+        self.headers = headers
+        """Headers to request the url with"""
+
+    @property
+    def found(self) -> bool:
+        return self.value is not None
+
+
 class Http:
     retries_max = 5
     retry_backoff_factor = 1.5
+    download_chunk_size = 64 * 1024
+    uncompressed_warning_size = 16 * 1024
+    headers = {"User-Agent": latest_user_agents.get_random_user_agent()}
+    """Headers sent with every request, by both Http and AsyncHttp"""
 
-    def __init__(self) -> None:
-        self.cache: Dict[str, Any] = {}
+    def __init__(self, response_cache: Optional[ResponseCache] = None, jar_store: Optional[JarStore] = None) -> None:
+        self.cache = MemoryCache(config.memory_cache_size, config.memory_cache_ttl)
+        self.response_cache = response_cache
+        self.project_cache = ProjectCache(response_cache)
+        self.jar_store = jar_store
+        self.session = Http._create_session()
+        self.rate_limiter = RateLimiter(config.rate_limits)
+        self.in_flight = SingleFlight()
+        self.downloads_in_flight = SingleFlight()
+        """Downloads by url. Only one worker may write to the partial file of a url"""
 
-    def get(self, url: str) -> Any:
-        if url in self.cache:
-            return self.cache[url]
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Session that keeps connections alive between requests.
+        Every host gets its own pool of config.pool_size connections, shared between all threads."""
+        session = requests.Session()
+        session.headers.update(Http.headers)
+        # All encodings that urllib3 can decode, i.e. gzip and deflate, and br if brotli is installed
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_maxsize=config.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
-        with Http._get_with_retries(url) as response:
-            content_type = response.headers.get("Content-Type", "plain/text")
-            # Check if headers is json
-            if content_type.startswith("application/json"):
-                self.cache[url] = response.json(strict=False)
-            else:
-                self.cache[url] = response.text
-            return self.cache[url]
+    def get(self, url: str, headers: Mapping[str, str] = {}) -> Any:
+        """Get the url. Callers that request the same url while it's being fetched wait for that request
+        instead of sending their own
 
-    def download(self, url: str, filename: str) -> str:
-        """Download the specified mod
+        Args:
+            headers: Additional headers of the request, e.g. an API key. They can't change the response,
+                responses are cached by the url only
+        """
+        url = Http.override_url(url)
+        with http_stats.request(url, "get") as request:
+            return self.in_flight.do(url, lambda: self._get(request, headers))
+
+    def _get(self, request: RequestRecord, extra_headers: Mapping[str, str] = {}) -> Any:
+        lookup = self.lookup(request, extra_headers)
+        if lookup.found:
+            return lookup.value
+
+        with self._get_with_retries(request, lookup.headers) as response:
+            if lookup.cached and response.status_code == 304:
+                return self.use_not_modified(request, lookup.cached)
+            return self.use_response(request, response.status_code, response.headers, response.text)
+
+    def lookup(self, request: RequestRecord, extra_headers: Mapping[str, str] = {}) -> "CacheLookup":
+        """Look up the url in the memory cache, then the response cache, before requesting it.
+        Used by both Http and AsyncHttp"""
+        url = request.url
+        value = self.cache.get(url)
+        if value is not None:
+            request.cache = "memory"
+            return CacheLookup(value=value)
+
+        cached = self.response_cache.get(url) if self.response_cache else None
+        headers: Dict[str, str] = dict(extra_headers)
+        if cached:
+            if config.offline:
+                request.cache = "offline"
+                return CacheLookup(value=self._to_value(cached))
+            headers.update(cached.validator_headers())
+        return CacheLookup(cached=cached, headers=headers)
+
+    def use_not_modified(self, request: RequestRecord, cached: CachedResponse) -> Any:
+        """The cached response is still valid, use it"""
+        TealPrint.debug(f"Not modified, using cached response for {request.url}")
+        request.cache = "not_modified"
+        if self.response_cache:
+            self.response_cache.touch(request.url)
+        return self._to_value(cached)
+
+    def use_response(self, request: RequestRecord, status_code: int, headers: Mapping[str, str], body: str) -> Any:
+        """Store the response in the caches and parse it
+
+        Exception:
+            Unauthorized if the server refused the request, these responses aren't cached
+        """
+        request.cache = "miss"
+        Http.check_authorized(request.url, status_code)
+        Http.record_transfer(request, headers, len(body.encode("utf-8")))
+        return self._to_value(self._store_response(request.url, status_code, headers, body))
+
+    def post(self, url: str, body: Any, headers: Mapping[str, str] = {}) -> Any:
+        """Post the JSON body to the url. The response is parsed like get(), but isn't cached"""
+        url = Http.override_url(url)
+        with http_stats.request(url, "post") as request:
+            request.cache = "miss"
+            with self._send_with_retries(
+                request, lambda: self.session.post(url, json=body, headers=headers, timeout=Http.timeout())
+            ) as response:
+                Http.record_transfer(request, response.headers, len(response.content))
+                Http.check_authorized(url, response.status_code)
+                return Http._parse(response.headers.get("Content-Type", "plain/text"), response.text)
+
+    @staticmethod
+    def check_authorized(url: str, status_code: int) -> None:
+        if status_code == 401 or status_code == 403:
+            raise Unauthorized(url, status_code)
+
+    def _store_response(self, url: str, status_code: int, headers: Mapping[str, str], body: str) -> CachedResponse:
+        cached = CachedResponse(
+            url,
+            content_type=headers.get("Content-Type", "plain/text"),
+            body=body,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+        )
+        if self.response_cache and status_code == 200:
+            self.response_cache.put(cached)
+        return cached
+
+    def _to_value(self, cached: CachedResponse) -> Any:
+        value = Http._parse(cached.content_type, cached.body)
+
+        # Size of the body is a good enough approximation of the parsed value
+        self.cache.put(cached.url, value, sys.getsizeof(cached.body))
+        return value
+
+    @staticmethod
+    def _parse(content_type: str, body: str) -> Any:
+        # Check if headers is json
+        if content_type.startswith("application/json"):
+            return json.loads(body, strict=False)
+        return body
+
+    def download(self, url: str, filename: str, hashes: Mapping[str, str] = {}) -> str:
+        """Download the specified mod. Callers that download the same url while it's being downloaded
+        wait for that download instead of writing to the same partial file
+        Args:
+            hashes: Expected hashes of the file by algorithm, used for looking up the file in the jar store
         Returns:
             Filename of the downloaded and saved file
         Exception:
@@ -57,43 +236,248 @@ class Http:
         if config.pretend:
             return filename
 
-        with Http._get_with_retries(url) as response:
-            if response.status_code != 200:
+        url = Http.override_url(url)
+        with http_stats.request(url, "download") as request:
+            return self.downloads_in_flight.do(url, lambda: self._download(request, filename, hashes))
+
+    def _download(self, request: RequestRecord, filename: str, hashes: Mapping[str, str]) -> str:
+        stored = self.link_from_jar_store(request, filename, hashes)
+        if stored:
+            return stored
+
+        partial = PartialDownload(request.url)
+        with self._get_with_retries(request, Http.download_headers(partial), stream=True) as response:
+            if response.status_code != 200 and response.status_code != 206:
+                partial.remove()
                 raise DownloadFailed(response.status_code, response.reason, str(response.content))
 
-            if len(filename) == 0:
-                filename = Http._get_filename(response)
+            filename = Http.download_path(filename, response.headers)
+            digests = Http._save(response, partial, filename, hashes, request)
 
-            if not filename.endswith(".jar"):
-                filename += ".jar"
+        self.add_to_jar_store(filename, digests)
+        return filename
 
-            filename = path.join(config.dir, filename)
+    @staticmethod
+    def download_headers(partial: PartialDownload) -> Dict[str, str]:
+        # Don't let the server compress the file, sizes and ranges are of the file on disk
+        return {"Accept-Encoding": "identity", **partial.resume_headers()}
 
-            # Save file
-            with open(filename, "wb") as file:
-                file.write(response.content)
+    @staticmethod
+    def download_path(filename: str, headers: Mapping[str, str]) -> str:
+        """Path of the file in the mods directory, the filename is taken from the response if it's empty"""
+        if len(filename) == 0:
+            filename = Http._get_filename(headers)
+        return Http._to_mod_path(filename)
 
-        return filename
+    def link_from_jar_store(self, request: RequestRecord, filename: str, hashes: Mapping[str, str]) -> Optional[str]:
+        """Link the file from the jar store into the mods directory, if it exists in the store.
+
+        Returns:
+            Filename of the linked file, None if it isn't in the store
+        """
+        request.cache = "miss"
+        if self.jar_store and hashes and filename:
+            stored = self.jar_store.find(hashes)
+            if stored:
+                filename = Http._to_mod_path(filename)
+                TealPrint.verbose(f"Found {stored.name} in the jar store")
+                JarStore.link(stored, Path(filename))
+                request.cache = "jar_store"
+                return filename
+        return None
+
+    def add_to_jar_store(self, filename: str, digests: Mapping[str, str]) -> None:
+        if self.jar_store and digests:
+            self.jar_store.add(Path(filename), digests)
+
+    @staticmethod
+    def _to_mod_path(filename: str) -> str:
+        if not filename.endswith(".jar"):
+            filename += ".jar"
+
+        return path.join(config.dir, filename)
+
+    @staticmethod
+    def _save(
+        response: Response, partial: PartialDownload, filename: str, hashes: Mapping[str, str], request: RequestRecord
+    ) -> Dict[str, str]:
+        """Stream the response to a partial file and move it into place once it's complete.
+        This way an aborted download never leaves a truncated jar in the mods directory,
+        and it can be resumed the next time.
+        The file is hashed while it's written, and isn't moved into place if it doesn't match the hashes.
+
+        Returns:
+            Verified hashes of the file by algorithm
+        """
+        hasher = FileHasher(hashes.keys())
+        with partial.open(response.status_code, response.headers) as file:
+            # Resumed, include the already downloaded part
+            if response.status_code == 206:
+                hasher.update_from_file(partial.file)
+
+            try:
+                for chunk in response.iter_content(chunk_size=Http.download_chunk_size):
+                    Http.check_deadline(request.url)
+                    file.write(chunk)
+                    hasher.update(chunk)
+                    request.bytes += len(chunk)
+            except requests.exceptions.ConnectionError as e:
+                # Raised when the read timeout expires while streaming, the partial file is resumed the next time
+                raise DownloadFailed(0, "Connection lost while downloading", str(e))
+            file.flush()
+            os.fsync(file.fileno())
+
+        return Http.complete(partial, filename, hasher, hashes)
 
     @staticmethod
-    def _get_with_retries(url: str) -> Response:
+    def complete(
+        partial: PartialDownload, filename: str, hasher: FileHasher, hashes: Mapping[str, str]
+    ) -> Dict[str, str]:
+        """Verify the downloaded file and move it into place"""
+        mismatch = hasher.find_mismatch(hashes)
+        if mismatch:
+            partial.remove()
+            raise DownloadFailed(200, f"Downloaded file doesn't match its {mismatch} hash", "")
+
+        partial.complete(filename)
+        return hasher.hexdigests()
+
+    def _get_with_retries(
+        self, request: RequestRecord, headers: Dict[str, str] = {}, stream: bool = False
+    ) -> Response:
+        return self._send_with_retries(
+            request,
+            lambda: self.session.get(request.url, headers=headers, stream=stream, timeout=Http.timeout()),
+        )
+
+    def _send_with_retries(self, request: RequestRecord, send: Callable[[], Response]) -> Response:
+        url = request.url
+        if config.offline:
+            raise NotCached(url)
+
+        # Stays the response if every request times out
         response: Response = Response()
+        response.status_code = 0
+        response.reason = "Timed out"
         for retry in range(Http.retries_max):
-            response = requests.get(url, headers=_headers)
-            if response.status_code < 500 or response.status_code >= 600:
+            request.retries = retry
+            time.sleep(self.reserve_request(url))
+            Http.check_deadline(url)
+            try:
+                response = send()
+            except requests.exceptions.Timeout:
+                time.sleep(Http.retry_delay_after_timeout(url, retry))
+                continue
+
+            delay = self.retry_delay(request, retry, response.status_code, response.headers)
+            if delay is None:
                 return response
-            elif retry < Http.retries_max:
-                response.close()
-                delay = Http.retry_backoff_factor**retry
-                TealPrint.warning(f"{(retry+1)}: Failed to connect to {url}. Retrying in {delay} seconds...")
-                time.sleep(delay)
+            response.close()
+            time.sleep(delay)
+        raise Http.max_retries_exceeded(url, response.status_code, response.reason, str(response.content))
+
+    def reserve_request(self, url: str) -> float:
+        """Reserve a request to the url with the rate limiter, used by both Http and AsyncHttp.
+
+        Returns:
+            Seconds to wait before sending the request
+        Exception:
+            DeadlineExceeded if the deadline has passed, or would pass while waiting for the rate limit
+        """
+        Http.check_deadline(url)
+        wait = self.rate_limiter.reserve(url, Http.time_left())
+        if wait is None:
+            raise DeadlineExceeded(url)
+        return wait
+
+    def retry_delay(
+        self, request: RequestRecord, retry: int, status_code: int, headers: Mapping[str, str]
+    ) -> Optional[float]:
+        """Record the status and rate limits of the response, and decide whether to retry the request.
+
+        Returns:
+            None if the response should be used, otherwise seconds to wait before retrying
+        """
+        url = request.url
+        request.status = status_code
+        self.rate_limiter.update(url, status_code, headers)
+
+        # Rate limiter waits until we're allowed to send requests again
+        if status_code == 429:
+            TealPrint.warning(f"{(retry+1)}: Too many requests to {url}. Retrying...")
+            return 0
+        if 500 <= status_code < 600:
+            delay = Http.retry_backoff_factor**retry
+            TealPrint.warning(f"{(retry+1)}: Failed to connect to {url}. Retrying in {delay} seconds...")
+            return Http._until_deadline(delay)
+        return None
+
+    @staticmethod
+    def retry_delay_after_timeout(url: str, retry: int) -> float:
+        delay = Http.retry_backoff_factor**retry
+        TealPrint.warning(f"{(retry+1)}: Timed out waiting for {url}. Retrying in {delay} seconds...")
+        return Http._until_deadline(delay)
+
+    @staticmethod
+    def max_retries_exceeded(url: str, status_code: int, reason: str, content: str) -> MaxRetriesExceeded:
         TealPrint.error(f"{Http.retries_max}: Failed to connect to {url}. Giving up.")
-        TealPrint.error(f"{response.status_code}: {response.reason}")
-        raise MaxRetriesExceeded(url, Http.retries_max, response.status_code, response.reason, str(response.content))
+        TealPrint.error(f"{status_code}: {reason}")
+        return MaxRetriesExceeded(url, Http.retries_max, status_code, reason, content)
+
+    @staticmethod
+    def time_left() -> Optional[float]:
+        """Seconds until the --deadline, None if there's no deadline"""
+        if config.deadline is None:
+            return None
+        return config.deadline - time.monotonic()
+
+    @staticmethod
+    def is_past_deadline() -> bool:
+        time_left = Http.time_left()
+        return time_left is not None and time_left <= 0
+
+    @staticmethod
+    def check_deadline(url: str) -> None:
+        if Http.is_past_deadline():
+            raise DeadlineExceeded(url)
+
+    @staticmethod
+    def timeout() -> Tuple[float, float]:
+        """Connect and read timeouts of a request, shortened so that no request waits past the deadline"""
+        connect, read = config.connect_timeout, config.read_timeout
+        time_left = Http.time_left()
+        if time_left is not None:
+            time_left = max(time_left, 0.01)
+            connect, read = min(connect, time_left), min(read, time_left)
+        return connect, read
+
+    @staticmethod
+    def _until_deadline(delay: float) -> float:
+        """Shorten the delay before retrying so that it doesn't wait past the deadline"""
+        time_left = Http.time_left()
+        if time_left is not None:
+            delay = min(delay, max(time_left, 0))
+        return delay
+
+    @staticmethod
+    def record_transfer(request: RequestRecord, headers: Mapping[str, str], decoded_size: int) -> None:
+        """Record the size of the response body over the wire, which is smaller than decoded when it's compressed"""
+        request.encoding = headers.get("Content-Encoding")
+        request.bytes = int(headers.get("Content-Length", decoded_size))
+        if not request.encoding and decoded_size > Http.uncompressed_warning_size:
+            TealPrint.debug(f"Uncompressed response of {decoded_size} bytes from {request.url}")
+
+    @staticmethod
+    def override_url(url: str) -> str:
+        """Replace the base of the url if it's overridden in config.url_overrides"""
+        for base, override in config.url_overrides.items():
+            if url.startswith(base):
+                return override + url[len(base) :]
+        return url
 
     @staticmethod
-    def _get_filename(response: Response) -> str:
-        content_disposition = response.headers.get("content-disposition")
+    def _get_filename(headers: Mapping[str, str]) -> str:
+        content_disposition = headers.get("content-disposition")
         if not content_disposition:
             return ""
 
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Union
+from urllib.parse import parse_qsl, urlparse
+
+from tealprint import TealPrint
+
+_current_mod: ContextVar[Optional[str]] = ContextVar("current_mod", default=None)
+
+
+class RequestRecord:
+    """Measurements of a single Http.get() or Http.download() call"""
+
+    def __init__(self, url: str, kind: str) -> None:
+        self.url = url
+        self.kind = kind
+        """get or download"""
+        self.template = HttpStats.to_template(url)
+        self.host = urlparse(url).hostname or ""
+        self.mod = _current_mod.get()
+        self.status: Union[int, None] = None
+        self.latency = 0.0
+        """Seconds from the call until it returned"""
+        self.bytes = 0
+        """Bytes of the body that were transferred, i.e. compressed if the body was compressed"""
+        self.encoding: Union[str, None] = None
+        """Content-Encoding of the response"""
+        self.retries = 0
+        self.cache = "shared"
+        """memory, not_modified, offline, jar_store, miss. Or shared if it got the result of another call"""
+        self.error: Union[str, None] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "kind": self.kind,
+            "template": self.template,
+            "host": self.host,
+            "mod": self.mod,
+            "status": self.status,
+            "latency": round(self.latency, 4),
+            "bytes": self.bytes,
+            "encoding": self.encoding,
+            "retries": self.retries,
+            "cache": self.cache,
+            "error": self.error,
+        }
+
+
+class HttpStats:
+    """Records every request, and how long each mod took, to summarize where a run spends its time"""
+
+    slowest_mods_max = 10
+    _id_after = {"mod", "mods", "project", "projects", "version", "versions", "version_file", "data", "addon"}
+    """Path segments that are followed by an id or slug"""
+
+    def __init__(self) -> None:
+        self.records: List[RequestRecord] = []
+        self.mods: Dict[str, float] = {}
+        """Total seconds spent on each mod"""
+        self._lock = Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records = []
+            self.mods = {}
+
+    @contextmanager
+    def request(self, url: str, kind: str) -> Iterator[RequestRecord]:
+        record = RequestRecord(url, kind)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            with self._lock:
+                self.records.append(record)
+
+    @contextmanager
+    def mod(self, mod_id: str) -> Iterator[None]:
+        """Measure the time spent on the mod, and attribute all requests inside the block to it"""
+        token = _current_mod.set(mod_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_mod.reset(token)
+            with self._lock:
+                self.mods[mod_id] = self.mods.get(mod_id, 0.0) + elapsed
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+            mods = dict(self.mods)
+
+        hosts: Dict[str, List[RequestRecord]] = {}
+        templates: Dict[str, List[RequestRecord]] = {}
+        cache: Dict[str, int] = {}
+        encodings: Dict[str, int] = {}
+        for record in records:
+            hosts.setdefault(record.host, []).append(record)
+            templates.setdefault(record.template, []).append(record)
+            cache[record.cache] = cache.get(record.cache, 0) + 1
+            if record.cache == "miss" and record.kind == "get":
+                encoding = record.encoding or "identity"
+                encodings[encoding] = encodings.get(encoding, 0) + 1
+
+        slowest = sorted(mods.items(), key=lambda item: item[1], reverse=True)[: HttpStats.slowest_mods_max]
+        return {
+            "requests": len(records),
+            "bytes": sum(record.bytes for record in records),
+            "cache": cache,
+            "encodings": encodings,
+            "hosts": {host: HttpStats._aggregate(host_records) for host, host_records in hosts.items()},
+            "templates": {
+                template: HttpStats._aggregate(template_records) for template, template_records in templates.items()
+            },
+            "slowest_mods": [
+                {
+                    "mod": mod,
+                    "seconds": round(seconds, 3),
+                    "requests": sum(1 for record in records if record.mod == mod),
+                }
+                for mod, seconds in slowest
+            ],
+        }
+
+    def print_summary(self) -> None:
+        summary = self.summary()
+        if summary["requests"] == 0:
+            return
+
+        TealPrint.verbose("Request summary", push_indent=True)
+        TealPrint.verbose(f"{summary['requests']} requests, {summary['bytes']} bytes")
+        TealPrint.verbose(", ".join(f"{count} {cache}" for cache, count in summary["cache"].items()))
+        if summary["encodings"]:
+            TealPrint.verbose(
+                "Content encoding: " + ", ".join(f"{count} {name}" for name, count in summary["encodings"].items())
+            )
+        for host, host_summary in summary["hosts"].items():
+            TealPrint.verbose(
+                f"{host}: {host_summary['requests']} requests, {host_summary['retries']} retries, "
+                + f"p50 {host_summary['p50']:.3f}s, p95 {host_summary['p95']:.3f}s, {host_summary['bytes']} bytes"
+            )
+        if summary["slowest_mods"]:
+            TealPrint.verbose("Slowest mods", push_indent=True)
+            for mod in summary["slowest_mods"]:
+                TealPrint.verbose(f"{mod['mod']}: {mod['seconds']:.2f}s, {mod['requests']} requests")
+            TealPrint.pop_indent()
+        TealPrint.pop_indent()
+
+    def write_json(self, file: Path) -> None:
+        with self._lock:
+            records = [record.to_json() for record in self.records]
+        with open(file, "w") as out:
+            json.dump({**self.summary(), "records": records}, out, indent=2)
+
+    @staticmethod
+    def to_template(url: str) -> str:
+        """Replace the ids, slugs, and query values in the url, so requests to the same endpoint are grouped together.
+        E.g. https://api.modrinth.com/v2/project/fabric-api/version -> api.modrinth.com/v2/project/{id}/version
+        """
+        parsed = urlparse(url)
+        segments = parsed.path.split("/")
+        for i in range(1, len(segments)):
+            if segments[i - 1] in HttpStats._id_after:
+                segments[i] = "{id}"
+        if segments[-1].endswith(".jar"):
+            segments[-1] = "{file}"
+
+        template = f"{parsed.hostname or ''}{'/'.join(segments)}"
+        if parsed.query:
+            template += "?" + "&".join(f"{key}={{}}" for key, _ in parse_qsl(parsed.query))
+        return template
+
+    @staticmethod
+    def _aggregate(records: List[RequestRecord]) -> Dict[str, Any]:
+        latencies = sorted(record.latency for record in records)
+        return {
+            "requests": len(records),
+            "retries": sum(record.retries for record in records),
+            "errors": sum(1 for record in records if record.error),
+            "bytes": sum(record.bytes for record in records),
+            "p50": round(HttpStats.percentile(latencies, 50), 4),
+            "p95": round(HttpStats.percentile(latencies, 95), 4),
+        }
+
+    @staticmethod
+    def percentile(sorted_values: List[float], percent: float) -> float:
+        """Nearest-rank percentile of already sorted values"""
+        if not sorted_values:
+            return 0.0
+        rank = max(1, math.ceil(len(sorted_values) * percent / 100))
+        return sorted_values[rank - 1]
+
+
+http_stats = HttpStats()
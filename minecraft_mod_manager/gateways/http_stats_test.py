@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from .http_stats import HttpStats
+
+
+@pytest.mark.parametrize(
+    "name,url,expected",
+    [
+        (
+            "Replaces id after resource",
+            "https://api.modrinth.com/api/v1/mod/fabric-api/version",
+            "api.modrinth.com/api/v1/mod/{id}/version",
+        ),
+        (
+            "Replaces query values",
+            "https://api.modrinth.com/api/v1/mod?query=carpet&version=1.18",
+            "api.modrinth.com/api/v1/mod?query={}&version={}",
+        ),
+        (
+            "Replaces jar filename",
+            "https://cdn.modrinth.com/data/P7dR8mSH/versions/0.33.0/fabric-api-0.33.0.jar",
+            "cdn.modrinth.com/data/{id}/versions/{id}/{file}",
+        ),
+        (
+            "Keeps other paths",
+            "https://word-splitter.app/carpet",
+            "word-splitter.app/carpet",
+        ),
+    ],
+)
+def test_to_template(name: str, url: str, expected: str):
+    print(name)
+
+    assert expected == HttpStats.to_template(url)
+
+
+@pytest.mark.parametrize(
+    "values,percent,expected",
+    [
+        ([], 50, 0.0),
+        ([1.0], 95, 1.0),
+        ([1.0, 2.0, 3.0, 4.0], 50, 2.0),
+        ([float(i) for i in range(1, 101)], 95, 95.0),
+    ],
+)
+def test_percentile(values, percent, expected):
+    assert expected == HttpStats.percentile(values, percent)
+
+
+def test_summary_groups_requests_by_host_and_mod():
+    stats = HttpStats()
+    with stats.mod("carpet"):
+        with stats.request("https://api.modrinth.com/api/v1/mod/carpet", "get") as request:
+            request.status = 200
+            request.bytes = 100
+            request.cache = "miss"
+        with stats.request("https://cdn.modrinth.com/data/abc/versions/1/carpet.jar", "download") as request:
+            request.retries = 2
+            request.bytes = 1000
+    with stats.request("https://api.modrinth.com/api/v1/mod/sodium", "get") as request:
+        request.cache = "memory"
+
+    summary = stats.summary()
+
+    assert summary["requests"] == 3
+    assert summary["bytes"] == 1100
+    assert summary["cache"] == {"miss": 1, "shared": 1, "memory": 1}
+    assert summary["hosts"]["api.modrinth.com"]["requests"] == 2
+    assert summary["hosts"]["cdn.modrinth.com"]["retries"] == 2
+    assert summary["templates"]["api.modrinth.com/api/v1/mod/{id}"]["requests"] == 2
+    assert [mod["mod"] for mod in summary["slowest_mods"]] == ["carpet"]
+    assert summary["slowest_mods"][0]["requests"] == 2
+
+
+def test_request_records_error():
+    stats = HttpStats()
+
+    with pytest.raises(ValueError):
+        with stats.request("https://test.com", "get"):
+            raise ValueError()
+
+    assert stats.records[0].error == "ValueError"
+
+
+def test_write_json(tmp_path: Path):
+    stats = HttpStats()
+    with stats.request("https://test.com", "get"):
+        pass
+    file = tmp_path.joinpath("stats.json")
+
+    stats.write_json(file)
+
+    with open(file) as json_file:
+        actual = json.load(json_file)
+    assert actual["requests"] == 1
+    assert actual["records"][0]["url"] == "https://test.com"
@@ -1,15 +1,25 @@
 import builtins
-from io import FileIO
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from os import path
+from pathlib import Path
+from threading import Event
 
 import pytest
 import requests
-from mockito import mock, unstub, when
+from mockito import mock, unstub, verify, when
 from requests.models import Response
 
 from ..config import config
 from ..core.errors.download_failed import DownloadFailed
-from .http import Http, MaxRetriesExceeded
+from .http import DeadlineExceeded, Http, MaxRetriesExceeded, NotCached, Unauthorized
+from .http_stats import http_stats
+from .jar_store import JarStore
+from .partial_download import PartialDownload
+from .response_cache import CachedResponse, ResponseCache
+from .single_flight import SingleFlight
 
 
 @pytest.fixture
@@ -18,6 +28,7 @@ def response():
     response.status_code = 200
     response.encoding = "UTF-8"
     response._content = b""  # type:ignore
+    response.raw = BytesIO(b"")
     return response
 
 
@@ -26,18 +37,25 @@ def mock_response():
     response = mock(Response)
     response.status_code = 200  # type:ignore
     response.content = ""  # type:ignore
+    response.headers = {}  # type:ignore
     when(response).__enter__(...).thenReturn(response)
     when(response).__exit__(...)
     return response
 
 
 @pytest.fixture
-def mock_file():
-    mock_file = mock(FileIO)
-    when(mock_file).write(...).thenReturn(0)
-    when(mock_file).__enter__(...).thenReturn(mock_file)
-    when(mock_file).__exit__(...)
-    return mock_file
+def mods_dir(tmp_path):
+    config.dir = tmp_path
+    yield tmp_path
+    config.dir = Path(".")
+
+
+@pytest.fixture(autouse=True)
+def stats():
+    """Don't leak the recorded requests to the other tests"""
+    http_stats.clear()
+    yield http_stats
+    http_stats.clear()
 
 
 @pytest.fixture
@@ -45,12 +63,19 @@ def http():
     return Http()
 
 
-def test_use_filename_when_it_exists(http, response, mock_file):
+def wait_for_shared(single_flight: SingleFlight, count: int, timeout: float = 5) -> None:
+    """Wait until count calls wait for the first one. Fails instead of hanging if they never do"""
+    deadline = time.monotonic() + timeout
+    while single_flight.shared < count:
+        assert time.monotonic() < deadline, f"Only {single_flight.shared} of {count} calls were shared"
+        time.sleep(0.001)
+
+
+def test_use_filename_when_it_exists(http, response, mods_dir):
     filename = "some-file.jar"
     expected = path.join(config.dir, filename)
 
-    when(requests).get(...).thenReturn(response)
-    when(builtins).open(...).thenReturn(mock_file)
+    when(http.session).get(...).thenReturn(response)
 
     actual = http.download("", filename)
 
@@ -58,12 +83,11 @@ def test_use_filename_when_it_exists(http, response, mock_file):
     assert expected == actual
 
 
-def test_use_downloaded_filename_when_no_filename_specified(http, response, mock_file):
+def test_use_downloaded_filename_when_no_filename_specified(http, response, mods_dir):
     filename = "downloaded.jar"
     expected = path.join(config.dir, filename)
     response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    when(requests).get(...).thenReturn(response)
-    when(builtins).open(...).thenReturn(mock_file)
+    when(http.session).get(...).thenReturn(response)
 
     actual = http.download("", "")
 
@@ -71,12 +95,11 @@ def test_use_downloaded_filename_when_no_filename_specified(http, response, mock
     assert expected == actual
 
 
-def test_use_downloaded_filename_add_jar_when_no_filename_specified(http, response, mock_file):
+def test_use_downloaded_filename_add_jar_when_no_filename_specified(http, response, mods_dir):
     filename = "downloaded.jar"
     expected = path.join(config.dir, filename)
     response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    when(requests).get(...).thenReturn(response)
-    when(builtins).open(...).thenReturn(mock_file)
+    when(http.session).get(...).thenReturn(response)
 
     actual = http.download("", "")
 
@@ -84,11 +107,86 @@ def test_use_downloaded_filename_add_jar_when_no_filename_specified(http, respon
     assert expected == actual
 
 
+def test_download_streams_content_to_file(http, response, mods_dir):
+    response.raw = BytesIO(b"jar content" * Http.download_chunk_size)
+    when(http.session).get(...).thenReturn(response)
+
+    actual = http.download("", "mod.jar")
+
+    unstub()
+    assert Path(actual).read_bytes() == b"jar content" * Http.download_chunk_size
+    assert [file.name for file in mods_dir.iterdir()] == ["mod.jar"]
+
+
+def test_download_keeps_old_file_when_download_is_aborted(http, response, mods_dir):
+    mods_dir.joinpath("mod.jar").write_bytes(b"old jar")
+    when(http.session).get(...).thenReturn(response)
+    when(response).iter_content(...).thenRaise(requests.exceptions.ChunkedEncodingError())
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        http.download("", "mod.jar")
+
+    unstub()
+    assert mods_dir.joinpath("mod.jar").read_bytes() == b"old jar"
+    assert PartialDownload("").file.exists()
+
+
+def test_download_resumes_partial_file(http, response, mods_dir):
+    partial = PartialDownload("https://cdn.com/mod.jar")
+    partial.file.write_bytes(b"jar ")
+    partial.size = 11
+    partial.etag = '"123"'
+    partial._save_info()
+    response.status_code = 206
+    response.headers["Content-Range"] = "bytes 4-10/11"
+    response.raw = BytesIO(b"content")
+    when(http.session).get(
+        "https://cdn.com/mod.jar",
+        headers={"Accept-Encoding": "identity", "Range": "bytes=4-", "If-Range": '"123"'},
+        stream=True,
+        timeout=(10, 60),
+    ).thenReturn(response)
+
+    actual = http.download("https://cdn.com/mod.jar", "mod.jar", {"sha1": hashlib.sha1(b"jar content").hexdigest()})
+
+    unstub()
+    assert Path(actual).read_bytes() == b"jar content"
+    assert [file.name for file in mods_dir.iterdir()] == ["mod.jar"]
+
+
+def test_download_starts_over_when_server_sends_whole_file(http, response, mods_dir):
+    partial = PartialDownload("https://cdn.com/mod.jar")
+    partial.file.write_bytes(b"old ")
+    partial.size = 11
+    partial.etag = '"123"'
+    partial._save_info()
+    response.headers["Content-Length"] = "11"
+    response.raw = BytesIO(b"jar content")
+    when(http.session).get(...).thenReturn(response)
+
+    actual = http.download("https://cdn.com/mod.jar", "mod.jar")
+
+    unstub()
+    assert Path(actual).read_bytes() == b"jar content"
+
+
+def test_download_failed_when_incomplete(http, response, mods_dir):
+    response.headers["Content-Length"] = "100"
+    response.raw = BytesIO(b"jar content")
+    when(http.session).get(...).thenReturn(response)
+
+    with pytest.raises(DownloadFailed):
+        http.download("https://cdn.com/mod.jar", "mod.jar")
+
+    unstub()
+    assert list(mods_dir.iterdir()) == []
+
+
 def test_no_mock_interactions_when_pretending(http):
     filename = "file.jar"
     expected = filename
     config.pretend = True
-    when(requests).get(...).thenRaise(NotImplementedError())
+    when(http.session).get(...).thenRaise(NotImplementedError())
     when(builtins).open(...).thenRaise(NotImplementedError())
 
     try:
@@ -105,7 +203,7 @@ def test_get_when_non_strict_json(http, response):
     response.headers["Content-Type"] = "application/json"
     response._content = '\n{"text":"This is\nmy text"}'.encode("UTF-8")
     expected = {"text": "This is\nmy text"}
-    when(requests).get(...).thenReturn(response)
+    when(http.session).get(...).thenReturn(response)
 
     actual = http.get("https://test.com")
 
@@ -118,7 +216,7 @@ def test_get_when_response_is_string(http, response):
     response.headers["Content-Type"] = "text/plain"
     expected = "This is my text"
     response._content = b"This is my text"  # type:ignore
-    when(requests).get(...).thenReturn(response)
+    when(http.session).get(...).thenReturn(response)
 
     actual = http.get("https://test.com")
 
@@ -128,7 +226,7 @@ def test_get_when_response_is_string(http, response):
 def test_get_when_content_type_is_missing(http, response):
     expected = "This is my text"
     response._content = b"This is my text"  # type:ignore
-    when(requests).get(...).thenReturn(response)
+    when(http.session).get(...).thenReturn(response)
 
     actual = http.get("https://test.com")
 
@@ -139,7 +237,7 @@ def test_download_failed(http, response):
     response.status_code = 404  # type:ignore
     response.reason = "Not found"  # type:ignore
     response._content = "404 not found"  # type:ignore
-    when(requests).get(...).thenReturn(response)
+    when(http.session).get(...).thenReturn(response)
 
     with pytest.raises(DownloadFailed):
         http.download("", "")
@@ -152,9 +250,378 @@ def test_download_retry(http, mock_response):
     mock_response.reason = "Timed out"  # type:ignore
     mock_response._content = "524 Timed out"  # type:ignore
     when(mock_response).close(...)
-    when(requests).get(...).thenReturn(mock_response)
+    when(http.session).get(...).thenReturn(mock_response)
 
     with pytest.raises(MaxRetriesExceeded):
         http.download("", "")
 
     unstub()
+
+
+def test_get_stores_response_in_response_cache(response):
+    response_cache = mock(ResponseCache)
+    http = Http(response_cache)
+    response.headers["Content-Type"] = "text/plain"
+    response.headers["ETag"] = '"123"'
+    response._content = b"This is my text"  # type:ignore
+    when(response_cache).get("https://test.com").thenReturn(None)
+    when(response_cache).put(...)
+    when(http.session).get("https://test.com", headers={}, stream=False, timeout=(10, 60)).thenReturn(response)
+
+    actual = http.get("https://test.com")
+
+    assert "This is my text" == actual
+    verify(response_cache).put(...)
+    unstub()
+
+
+def test_get_uses_response_cache_when_not_modified(response):
+    response_cache = mock(ResponseCache)
+    http = Http(response_cache)
+    response.status_code = 304
+    response._content_consumed = True  # type:ignore
+    cached = CachedResponse("https://test.com", "application/json", '{"text":"cached"}', etag='"123"')
+    when(response_cache).get("https://test.com").thenReturn(cached)
+    when(response_cache).touch("https://test.com")
+    when(http.session).get(
+        "https://test.com", headers={"If-None-Match": '"123"'}, stream=False, timeout=(10, 60)
+    ).thenReturn(response)
+
+    actual = http.get("https://test.com")
+
+    assert {"text": "cached"} == actual
+    verify(response_cache, times=0).put(...)
+    verify(response_cache).touch("https://test.com")
+    unstub()
+
+
+def test_get_sends_headers_with_validators(response):
+    response_cache = mock(ResponseCache)
+    http = Http(response_cache)
+    response.status_code = 304
+    response._content_consumed = True  # type:ignore
+    cached = CachedResponse("https://test.com", "application/json", '{"text":"cached"}', etag='"123"')
+    when(response_cache).get("https://test.com").thenReturn(cached)
+    when(response_cache).touch("https://test.com")
+    when(http.session).get(
+        "https://test.com", headers={"x-api-key": "key", "If-None-Match": '"123"'}, stream=False, timeout=(10, 60)
+    ).thenReturn(response)
+
+    actual = http.get("https://test.com", headers={"x-api-key": "key"})
+
+    assert {"text": "cached"} == actual
+    unstub()
+
+
+@pytest.fixture
+def offline():
+    config.offline = True
+    yield
+    config.offline = False
+
+
+def test_get_uses_response_cache_without_request_when_offline(offline):
+    response_cache = mock(ResponseCache)
+    http = Http(response_cache)
+    cached = CachedResponse("https://test.com", "application/json", '{"text":"cached"}', etag='"123"')
+    when(response_cache).get("https://test.com").thenReturn(cached)
+    when(http.session).get(...)
+
+    actual = http.get("https://test.com")
+
+    assert {"text": "cached"} == actual
+    verify(http.session, times=0).get(...)
+    unstub()
+
+
+def test_get_not_cached_when_offline(offline):
+    response_cache = mock(ResponseCache)
+    http = Http(response_cache)
+    when(response_cache).get("https://test.com").thenReturn(None)
+    when(http.session).get(...)
+
+    with pytest.raises(NotCached):
+        http.get("https://test.com")
+
+    verify(http.session, times=0).get(...)
+    unstub()
+
+
+def test_download_not_cached_when_offline(offline, mods_dir):
+    jar_store = JarStore(mods_dir.joinpath("store"))
+    http = Http(jar_store=jar_store)
+    when(http.session).get(...)
+
+    with pytest.raises(NotCached):
+        http.download("https://cdn.com/mod.jar", "mod.jar", {"sha1": hashlib.sha1(b"jar content").hexdigest()})
+
+    verify(http.session, times=0).get(...)
+    unstub()
+
+
+def test_session_uses_configured_pool_size():
+    config.pool_size = 3
+    http = Http()
+    config.pool_size = 10
+
+    adapter = http.session.get_adapter("https://api.modrinth.com")
+
+    assert adapter._pool_maxsize == 3  # type:ignore
+
+
+def test_get_only_requests_once_when_cached_in_memory(http, response):
+    response.headers["Content-Type"] = "text/plain"
+    response._content = b"This is my text"  # type:ignore
+    when(http.session).get(...).thenReturn(response)
+
+    http.get("https://test.com")
+    actual = http.get("https://test.com")
+
+    assert "This is my text" == actual
+    assert http.cache.hits == 1
+    verify(http.session, times=1).get(...)
+    unstub()
+
+
+def test_get_only_requests_once_when_called_concurrently(http, response):
+    response.headers["Content-Type"] = "text/plain"
+    response._content = b"This is my text"  # type:ignore
+    waiting = Event()
+
+    def get(*args, **kwargs):
+        waiting.wait(timeout=5)
+        return response
+
+    when(http.session).get(...).thenAnswer(get)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(http.get, "https://test.com") for _ in range(4)]
+        wait_for_shared(http.in_flight, 3)
+        waiting.set()
+        actual = [future.result() for future in futures]
+
+    assert ["This is my text"] * 4 == actual
+    verify(http.session, times=1).get(...)
+    unstub()
+
+
+def test_download_only_downloads_once_when_called_concurrently(http, response, mods_dir):
+    response.raw = BytesIO(b"jar content" * Http.download_chunk_size)
+    waiting = Event()
+
+    def get(*args, **kwargs):
+        waiting.wait(timeout=5)
+        return response
+
+    when(http.session).get(...).thenAnswer(get)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(http.download, "https://test.com/mod.jar", "mod.jar") for _ in range(4)]
+        wait_for_shared(http.downloads_in_flight, 3)
+        waiting.set()
+        actual = [future.result() for future in futures]
+
+    assert [path.join(mods_dir, "mod.jar")] * 4 == actual
+    assert Path(actual[0]).read_bytes() == b"jar content" * Http.download_chunk_size
+    assert [file.name for file in mods_dir.iterdir()] == ["mod.jar"]
+    verify(http.session, times=1).get(...)
+    unstub()
+
+
+def test_get_raises_when_unauthorized_without_caching(http, response):
+    response.status_code = 403
+    response._content = b"Forbidden"  # type:ignore
+    when(http.session).get(...).thenReturn(response)
+
+    with pytest.raises(Unauthorized):
+        http.get("https://test.com")
+    with pytest.raises(Unauthorized):
+        http.get("https://test.com")
+
+    verify(http.session, times=2).get(...)
+    unstub()
+
+
+def test_get_retries_when_rate_limited(http, response):
+    limited = Response()
+    limited.status_code = 429
+    limited._content = b""  # type:ignore
+    limited._content_consumed = True  # type:ignore
+    response._content = b"This is my text"  # type:ignore
+    when(http.rate_limiter).reserve(...).thenReturn(0)
+    when(http.session).get(...).thenReturn(limited).thenReturn(response)
+
+    actual = http.get("https://test.com")
+
+    assert "This is my text" == actual
+    verify(http.session, times=2).get(...)
+    unstub()
+
+
+def test_get_records_request_stats(http, response, stats):
+    response.headers["Content-Type"] = "text/plain"
+    response._content = b"This is my text"  # type:ignore
+    when(http.session).get(...).thenReturn(response)
+
+    http.get("https://test.com/mod/carpet")
+    http.get("https://test.com/mod/carpet")
+
+    first, second = stats.records
+    assert first.template == "test.com/mod/{id}"
+    assert first.status == 200
+    assert first.cache == "miss"
+    assert first.bytes == len(b"This is my text")
+    assert second.cache == "memory"
+    unstub()
+
+
+def test_download_links_jar_from_jar_store(response, mods_dir):
+    jar_store = JarStore(mods_dir.joinpath("store"))
+    http = Http(jar_store=jar_store)
+    hashes = {"sha1": hashlib.sha1(b"jar content").hexdigest()}
+    response.raw = BytesIO(b"jar content")
+    when(http.session).get(...).thenReturn(response)
+
+    http.download("https://cdn.com/mod.jar", "mod.jar", hashes)
+    mods_dir.joinpath("mod.jar").unlink()
+    actual = http.download("https://cdn.com/mod.jar", "mod.jar", hashes)
+
+    assert Path(actual).read_bytes() == b"jar content"
+    verify(http.session, times=1).get(...)
+    unstub()
+
+
+def test_download_failed_when_hash_mismatch(http, response, mods_dir):
+    mods_dir.joinpath("mod.jar").write_bytes(b"old jar")
+    response.raw = BytesIO(b"corrupt content")
+    when(http.session).get(...).thenReturn(response)
+
+    with pytest.raises(DownloadFailed):
+        http.download("https://cdn.com/mod.jar", "mod.jar", {"sha1": hashlib.sha1(b"jar content").hexdigest()})
+
+    unstub()
+    assert [file.name for file in mods_dir.iterdir()] == ["mod.jar"]
+    assert mods_dir.joinpath("mod.jar").read_bytes() == b"old jar"
+
+
+@pytest.mark.parametrize(
+    "name,overrides,url,expected",
+    [
+        (
+            "Not overridden",
+            {},
+            "https://api.modrinth.com/v2/project/carpet",
+            "https://api.modrinth.com/v2/project/carpet",
+        ),
+        (
+            "Replaces base url",
+            {"https://api.modrinth.com": "http://localhost:8080"},
+            "https://api.modrinth.com/v2/project/carpet",
+            "http://localhost:8080/v2/project/carpet",
+        ),
+        (
+            "Other host",
+            {"https://api.modrinth.com": "http://localhost:8080"},
+            "https://cdn.modrinth.com/data/carpet.jar",
+            "https://cdn.modrinth.com/data/carpet.jar",
+        ),
+    ],
+)
+def test_override_url(name, overrides, url, expected):
+    print(name)
+    config.url_overrides = overrides
+
+    actual = Http.override_url(url)
+
+    config.url_overrides = {}
+    assert expected == actual
+
+
+def test_get_retries_when_timed_out(http, response):
+    Http.retry_backoff_factor = 0.001
+    response._content = b"This is my text"  # type:ignore
+    when(http.session).get(...).thenRaise(requests.exceptions.ReadTimeout()).thenReturn(response)
+
+    actual = http.get("https://test.com")
+
+    assert "This is my text" == actual
+    verify(http.session, times=2).get(...)
+    Http.retry_backoff_factor = 1.5
+    unstub()
+
+
+def test_get_raises_max_retries_when_always_timed_out(http):
+    Http.retry_backoff_factor = 0.001
+    when(http.session).get(...).thenRaise(requests.exceptions.ConnectTimeout())
+
+    with pytest.raises(MaxRetriesExceeded) as e:
+        http.get("https://test.com")
+
+    assert e.value.reason == "Timed out"
+    verify(http.session, times=Http.retries_max).get(...)
+    Http.retry_backoff_factor = 1.5
+    unstub()
+
+
+@pytest.fixture
+def deadline():
+    yield
+    config.deadline = None
+
+
+def test_get_raises_without_request_when_past_deadline(http, deadline):
+    config.deadline = time.monotonic() - 1
+    when(http.session).get(...)
+
+    with pytest.raises(DeadlineExceeded):
+        http.get("https://test.com")
+
+    verify(http.session, times=0).get(...)
+    unstub()
+
+
+def test_get_does_not_wait_for_rate_limit_past_deadline(http, deadline):
+    config.deadline = time.monotonic() + 0.5
+    http.rate_limiter.update("https://test.com", 429, {"Retry-After": "3"})
+    when(http.session).get(...)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        http.get("https://test.com")
+
+    assert time.monotonic() - start < 0.5
+    verify(http.session, times=0).get(...)
+    unstub()
+
+
+def test_timeout_is_shortened_by_deadline(deadline):
+    assert Http.timeout() == (10, 60)
+
+    config.deadline = time.monotonic() + 30
+    connect, read = Http.timeout()
+
+    assert connect == 10
+    assert 29 < read <= 30
+
+
+def test_post_json(http, response):
+    response.headers["Content-Type"] = "application/json"
+    response._content = b'{"abc": {"id": "123"}}'  # type:ignore
+    when(http.session).post("https://test.com", json={"hashes": ["abc"]}, headers={}, timeout=(10, 60)).thenReturn(
+        response
+    )
+
+    actual = http.post("https://test.com", {"hashes": ["abc"]})
+
+    assert {"abc": {"id": "123"}} == actual
+    unstub()
+
+
+def test_post_not_sent_when_offline(http, offline):
+    when(http.session).post(...)
+
+    with pytest.raises(NotCached):
+        http.post("https://test.com", {"hashes": ["abc"]})
+
+    verify(http.session, times=0).post(...)
+    unstub()
@@ -0,0 +1,58 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Mapping, Optional
+from uuid import uuid4
+
+from .file_hasher import FileHasher
+
+
+class JarStore:
+    """Content-addressed store of downloaded jars that can be shared between several mods directories.
+    Jars are stored by their hashes and linked into the mods directories, so every unique jar
+    only has to be downloaded and stored once.
+    """
+
+    def __init__(self, dir: Path) -> None:
+        self.dir = Path(dir)
+
+    def path(self, algorithm: str, digest: str) -> Path:
+        digest = digest.lower()
+        return self.dir.joinpath(algorithm, digest[:2], f"{digest}.jar")
+
+    def find(self, hashes: Mapping[str, str]) -> Optional[Path]:
+        """Find a stored jar matching any of the hashes"""
+        for algorithm in FileHasher.algorithms:
+            if algorithm in hashes:
+                path = self.path(algorithm, hashes[algorithm])
+                if path.exists():
+                    return path
+        return None
+
+    def add(self, file: Path, hashes: Mapping[str, str]) -> None:
+        """Add a downloaded jar to the store.
+
+        Args:
+            hashes (Mapping[str, str]): Hashes of the jar by algorithm, these should already have been verified
+        """
+        for algorithm in FileHasher.algorithms:
+            if algorithm in hashes:
+                path = self.path(algorithm, hashes[algorithm])
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    JarStore.link(file, path)
+
+    @staticmethod
+    def link(source: Path, target: Path) -> None:
+        """Atomically hardlink source to target. Copies the file if it can't be linked,
+        e.g. when the store is on another file system."""
+        temp = target.parent.joinpath(f".{uuid4().hex}.part")
+        try:
+            try:
+                os.link(source, temp)
+            except OSError:
+                shutil.copyfile(source, temp)
+            os.replace(temp, target)
+        except BaseException:
+            temp.unlink(missing_ok=True)
+            raise
@@ -0,0 +1,50 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from .jar_store import JarStore
+
+content = b"jar content"
+hashes = {
+    "sha1": hashlib.sha1(content).hexdigest(),
+    "sha512": hashlib.sha512(content).hexdigest(),
+}
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> JarStore:
+    return JarStore(tmp_path.joinpath("store"))
+
+
+@pytest.fixture
+def jar(tmp_path: Path) -> Path:
+    jar = tmp_path.joinpath("mod.jar")
+    jar.write_bytes(content)
+    return jar
+
+
+def test_add_stores_jar_by_all_hashes(store: JarStore, jar: Path):
+    store.add(jar, hashes)
+
+    assert store.path("sha1", hashes["sha1"]).read_bytes() == content
+    assert store.path("sha512", hashes["sha512"]).read_bytes() == content
+
+
+def test_find_by_any_hash(store: JarStore, jar: Path):
+    store.add(jar, {"sha1": hashes["sha1"]})
+
+    actual = store.find(hashes)
+
+    assert actual == store.path("sha1", hashes["sha1"])
+
+
+def test_link_replaces_existing_file(store: JarStore, jar: Path, tmp_path: Path):
+    store.add(jar, hashes)
+    target = tmp_path.joinpath("other.jar")
+    target.write_bytes(b"old content")
+
+    JarStore.link(store.path("sha1", hashes["sha1"]), target)
+
+    assert target.read_bytes() == content
+    assert target.stat().st_ino == jar.stat().st_ino
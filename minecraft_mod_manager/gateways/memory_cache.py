@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Tuple, Union
+
+
+class MemoryCache:
+    """In-memory LRU cache that is bounded by the approximate size of the stored values.
+    Entries expire after their TTL; the least recently used entries are evicted when the cache is full.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """
+        Args:
+            max_size (int): Max approximate size in bytes of all entries
+            ttl (float): Default time in seconds before an entry expires
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value or None if it's missing or has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                value, _, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any, size: int, ttl: Union[float, None] = None) -> None:
+        """Add a value to the cache. Values larger than the whole cache aren't stored.
+
+        Args:
+            size (int): Approximate size in bytes of the value
+            ttl (float): Time in seconds before the entry expires, uses the default ttl if not set
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_size:
+                return
+
+            while self.size + size > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.size += size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self)} entries, {self.size} bytes, "
+            + f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+        )
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
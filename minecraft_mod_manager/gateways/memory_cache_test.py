@@ -0,0 +1,68 @@
+import pytest
+from mockito import unstub, when
+
+from . import memory_cache
+from .memory_cache import MemoryCache
+
+
+@pytest.fixture
+def cache():
+    return MemoryCache(max_size=100, ttl=10)
+
+
+def test_get_counts_hits_and_misses(cache: MemoryCache):
+    cache.put("a", "value", 10)
+
+    assert cache.get("a") == "value"
+    assert cache.get("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_evict_least_recently_used_when_full(cache: MemoryCache):
+    cache.put("a", "a", 40)
+    cache.put("b", "b", 40)
+    cache.get("a")
+
+    cache.put("c", "c", 40)
+
+    assert cache.get("a") == "a"
+    assert cache.get("b") is None
+    assert cache.get("c") == "c"
+    assert cache.size == 80
+    assert cache.evictions == 1
+
+
+def test_skip_values_larger_than_cache(cache: MemoryCache):
+    cache.put("a", "a", 40)
+
+    cache.put("b", "b", 101)
+
+    assert cache.get("a") == "a"
+    assert cache.get("b") is None
+    assert cache.size == 40
+
+
+def test_replace_existing_value(cache: MemoryCache):
+    cache.put("a", "old", 60)
+
+    cache.put("a", "new", 50)
+
+    assert cache.get("a") == "new"
+    assert cache.size == 50
+    assert cache.evictions == 0
+
+
+def test_expired_values_are_removed(cache: MemoryCache):
+    when(memory_cache.time).monotonic().thenReturn(0)
+    cache.put("a", "a", 10)
+    cache.put("b", "b", 10, ttl=30)
+
+    when(memory_cache.time).monotonic().thenReturn(20)
+    actual_a = cache.get("a")
+    actual_b = cache.get("b")
+    unstub()
+
+    assert actual_a is None
+    assert actual_b == "b"
+    assert cache.size == 10
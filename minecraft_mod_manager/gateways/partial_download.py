@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, Mapping, Union
+
+from tealprint import TealPrint
+
+from ..config import config
+from ..core.errors.download_failed import DownloadFailed
+
+
+class PartialDownload:
+    """A file that is being downloaded to the mods directory but isn't complete yet.
+    The expected size and validators of the file are kept next to it, so that an aborted
+    download can be resumed with a Range request the next time.
+    """
+
+    _content_range_regex = re.compile(r"bytes (\d+)-\d+/(\d+|\*)")
+
+    def __init__(self, url: str) -> None:
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        self.file = Path(config.dir).joinpath(f".{name}.part")
+        self.info_file = Path(config.dir).joinpath(f".{name}.part.json")
+        self.url = url
+        self.size = 0
+        """Expected size of the complete file, 0 if unknown"""
+        self.etag: Union[str, None] = None
+        self.last_modified: Union[str, None] = None
+        self._load_info()
+
+    @property
+    def downloaded(self) -> int:
+        if self.file.exists():
+            return self.file.stat().st_size
+        return 0
+
+    def resume_headers(self) -> Dict[str, str]:
+        """Headers for requesting the rest of the file. Empty if the download can't be resumed"""
+        # Weak ETags can't be used for range requests
+        validator = self.last_modified
+        if self.etag and not self.etag.startswith("W/"):
+            validator = self.etag
+
+        if not validator or not 0 < self.downloaded < self.size:
+            return {}
+
+        TealPrint.verbose(f"Resuming download at {self.downloaded}/{self.size} bytes")
+        return {"Range": f"bytes={self.downloaded}-", "If-Range": validator}
+
+    def open(self, status_code: int, headers: Mapping[str, str]) -> BinaryIO:
+        """Open the file for writing the response body to.
+        Appends to the file if the server sent the rest of it, otherwise starts from the beginning.
+        """
+        if status_code == 206:
+            start = self._get_range_start(headers)
+            if start != self.downloaded:
+                self.remove()
+                raise DownloadFailed(status_code, f"Unexpected range from byte {start}", "")
+            return open(self.file, "ab")
+
+        self.size = int(headers.get("Content-Length", 0))
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self._save_info()
+        return open(self.file, "wb")
+
+    def complete(self, filename: str) -> None:
+        """Move the complete file into place"""
+        downloaded = self.downloaded
+        if self.size and downloaded != self.size:
+            self.remove()
+            raise DownloadFailed(200, f"Incomplete download, got {downloaded} of {self.size} bytes", "")
+
+        os.replace(self.file, filename)
+        self.info_file.unlink(missing_ok=True)
+
+    def remove(self) -> None:
+        self.file.unlink(missing_ok=True)
+        self.info_file.unlink(missing_ok=True)
+
+    def _get_range_start(self, headers: Mapping[str, str]) -> int:
+        match = PartialDownload._content_range_regex.match(headers.get("Content-Range", ""))
+        if match:
+            return int(match.group(1))
+        return -1
+
+    def _load_info(self) -> None:
+        if not self.info_file.exists():
+            return
+
+        try:
+            with open(self.info_file) as file:
+                info = json.load(file)
+            if info["url"] == self.url:
+                self.size = int(info["size"])
+                self.etag = info["etag"]
+                self.last_modified = info["last_modified"]
+        except (ValueError, KeyError):
+            TealPrint.debug(f"Invalid partial download info in {self.info_file}, starting over")
+
+    def _save_info(self) -> None:
+        with open(self.info_file, "w") as file:
+            json.dump(
+                {
+                    "url": self.url,
+                    "size": self.size,
+                    "etag": self.etag,
+                    "last_modified": self.last_modified,
+                },
+                file,
+            )
@@ -0,0 +1,55 @@
+import time
+from json import dumps
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from ..config import config
+from ..core.entities.sites import Sites
+from .response_cache import CachedProject, ResponseCache
+
+
+class ProjectCache:
+    """Projects by both their id and slug, including projects that weren't found.
+    A project is never looked up twice during a run, and only once per config.project_cache_ttl between runs
+    when there's a response cache.
+    """
+
+    def __init__(self, response_cache: Optional[ResponseCache] = None) -> None:
+        self.response_cache = response_cache
+        self._projects: Dict[str, CachedProject] = {}
+        self._lock = Lock()
+
+    def get(self, site: Sites, key: str) -> Optional[CachedProject]:
+        """Returns the cached project, or None if it has to be looked up"""
+        with self._lock:
+            project = self._projects.get(ProjectCache._key(site, key))
+        if project:
+            return project
+
+        if self.response_cache:
+            project = self.response_cache.get_project(site.value, key)
+            # Expired projects are still better than nothing when offline
+            if project and (config.offline or time.time() - project.stored < config.project_cache_ttl):
+                with self._lock:
+                    self._projects[ProjectCache._key(site, key)] = project
+                return project
+        return None
+
+    def put(self, site: Sites, keys: List[str], project_json: Any) -> None:
+        """Store the project by all keys, e.g. both id and slug
+
+        Args:
+            project_json: JSON of the project, None if the project wasn't found
+        """
+        body = dumps(project_json, separators=(",", ":")) if project_json is not None else None
+        project = CachedProject(body, time.time())
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for key in keys:
+                self._projects[ProjectCache._key(site, key)] = project
+        if self.response_cache:
+            self.response_cache.put_project(site.value, keys, project)
+
+    @staticmethod
+    def _key(site: Sites, key: str) -> str:
+        return f"{site.value}:{key}"
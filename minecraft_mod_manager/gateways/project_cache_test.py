@@ -0,0 +1,67 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from ..config import config
+from ..core.entities.sites import Sites
+from .project_cache import ProjectCache
+from .response_cache import CachedProject, ResponseCache
+
+
+@pytest.fixture
+def response_cache(tmp_path: Path):
+    config.dir = tmp_path
+    cache = ResponseCache()
+    yield cache
+    cache.close()
+    config.dir = Path(".")
+
+
+def test_get_project_by_all_keys():
+    cache = ProjectCache()
+    cache.put(Sites.modrinth, ["P7dR8mSH", "fabric-api"], {"id": "P7dR8mSH", "slug": "fabric-api"})
+
+    by_id = cache.get(Sites.modrinth, "P7dR8mSH")
+    by_slug = cache.get(Sites.modrinth, "fabric-api")
+
+    assert by_id and by_id.json == {"id": "P7dR8mSH", "slug": "fabric-api"}
+    assert by_slug and by_slug.json == by_id.json
+    assert cache.get(Sites.curse, "fabric-api") is None
+
+
+def test_remember_missing_project():
+    cache = ProjectCache()
+    cache.put(Sites.modrinth, ["missing"], None)
+
+    actual = cache.get(Sites.modrinth, "missing")
+
+    assert actual and not actual.found
+
+
+def test_project_is_kept_between_runs(response_cache: ResponseCache):
+    ProjectCache(response_cache).put(Sites.modrinth, ["fabric-api"], {"slug": "fabric-api"})
+
+    actual = ProjectCache(response_cache).get(Sites.modrinth, "fabric-api")
+
+    assert actual and actual.json == {"slug": "fabric-api"}
+
+
+@pytest.mark.parametrize(
+    "name,offline,expected_found",
+    [
+        ("Look up expired project again", False, False),
+        ("Use expired project when offline", True, True),
+    ],
+)
+def test_expired_project(name, offline, expected_found, response_cache: ResponseCache):
+    print(name)
+    response_cache.put_project("modrinth", ["fabric-api"], CachedProject('{"slug":"fabric-api"}', time.time() - 120))
+    config.offline = offline
+    config.project_cache_ttl = 60
+
+    actual = ProjectCache(response_cache).get(Sites.modrinth, "fabric-api")
+
+    config.offline = False
+    config.project_cache_ttl = 24 * 60 * 60
+    assert (actual is not None) == expected_found
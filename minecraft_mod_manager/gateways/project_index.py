@@ -0,0 +1,180 @@
+import re
+import sqlite3
+from pathlib import Path
+from threading import RLock
+from typing import List, Optional
+
+from tealprint import TealPrint
+
+from ..config import config
+
+
+class IndexedProject:
+    """The parts of a project that are needed for finding it locally"""
+
+    def __init__(
+        self,
+        id: str,
+        slug: str,
+        title: str,
+        categories: List[str] = [],
+        game_versions: List[str] = [],
+        downloads: int = 0,
+    ) -> None:
+        self.id = id
+        self.slug = slug
+        self.title = title
+        self.categories = categories
+        """Categories of the project, including the mod loaders it supports"""
+        self.game_versions = game_versions
+        """Minecraft versions the project supports"""
+        self.downloads = downloads
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IndexedProject):
+            return (
+                self.id == other.id
+                and self.slug == other.slug
+                and self.title == other.title
+                and self.categories == other.categories
+                and self.game_versions == other.game_versions
+                and self.downloads == other.downloads
+            )
+        return False
+
+    def __repr__(self) -> str:
+        return f"IndexedProject({self.id}, {self.slug}, {self.title})"
+
+
+class ProjectIndex:
+    """Local full-text index of projects, so popular mods can be found without searching online.
+    Lives in its own DB that's shared between all mods directories, since the projects are the same for all of them.
+    Requires SQLite with FTS5, which most Python builds have.
+    Raises sqlite3.OperationalError when FTS5 isn't available.
+    """
+
+    version = 1
+    """Version of the index's tables. The index is rebuilt when it changes"""
+    search_limit = 10
+    """Max number of results of each search, same as the sites return by default"""
+
+    def __init__(self, dir: Path) -> None:
+        dir.mkdir(parents=True, exist_ok=True)
+        file_path = dir.joinpath(f"{config.app_name}.index.db")
+        TealPrint.debug(f"Project index location: {file_path}")
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._lock = RLock()
+
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != ProjectIndex.version:
+            TealPrint.debug(f"Recreating project index, version {version} -> {ProjectIndex.version}")
+            self._connection.execute("DROP TABLE IF EXISTS project")
+            self._connection.execute("DROP TABLE IF EXISTS project_search")
+            self._connection.execute("DROP TABLE IF EXISTS meta")
+            self._connection.execute(f"PRAGMA user_version={ProjectIndex.version}")
+
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS project ("
+            + "id TEXT PRIMARY KEY, "
+            + "slug TEXT, "
+            + "title TEXT, "
+            + "categories TEXT, "
+            + "game_versions TEXT, "
+            + "downloads INTEGER)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS project_slug ON project (slug)")
+        # Words of the slug and title, the rowid is the same as in the project table
+        self._connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS project_search USING fts5(slug, title)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+        self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def count(self) -> int:
+        """Number of projects in the index"""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM project").fetchone()[0]
+
+    @property
+    def last_refresh(self) -> Optional[float]:
+        """time.time() when the index was last built or refreshed, None if it has never been built"""
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key='last_refresh'").fetchone()
+        if row:
+            return row[0]
+        return None
+
+    @last_refresh.setter
+    def last_refresh(self, value: float) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_refresh', ?)", [value])
+            self._connection.commit()
+
+    def add(self, projects: List[IndexedProject]) -> None:
+        """Add the projects, or update them if they're already in the index"""
+        with self._lock:
+            for project in projects:
+                self._connection.execute(
+                    "INSERT INTO project (id, slug, title, categories, game_versions, downloads) "
+                    + "VALUES (?, ?, ?, ?, ?, ?) "
+                    + "ON CONFLICT (id) DO UPDATE SET slug=excluded.slug, title=excluded.title, "
+                    + "categories=excluded.categories, game_versions=excluded.game_versions, "
+                    + "downloads=excluded.downloads",
+                    [
+                        project.id,
+                        project.slug,
+                        project.title,
+                        " ".join(project.categories),
+                        " ".join(project.game_versions),
+                        project.downloads,
+                    ],
+                )
+                rowid = self._connection.execute("SELECT rowid FROM project WHERE id=?", [project.id]).fetchone()[0]
+                self._connection.execute("DELETE FROM project_search WHERE rowid=?", [rowid])
+                self._connection.execute(
+                    "INSERT INTO project_search (rowid, slug, title) VALUES (?, ?, ?)",
+                    [rowid, project.slug, project.title],
+                )
+            self._connection.commit()
+
+    def search(
+        self, text: str, category: Optional[str] = None, game_version: Optional[str] = None
+    ) -> List[IndexedProject]:
+        """Projects that contain all words of the text in their slug or title.
+        An exact slug match comes first, then the best matches, then the most downloaded.
+
+        Args:
+            category: Only projects in this category, e.g. a mod loader
+            game_version: Only projects that support this minecraft version
+        """
+        # Quote each word so the text can't contain FTS5 syntax, e.g. 'fabric-api' -> "fabric" "api"
+        words = re.findall(r"\w+", text.lower())
+        if len(words) == 0:
+            return []
+
+        query = (
+            "SELECT p.id, p.slug, p.title, p.categories, p.game_versions, p.downloads "
+            + "FROM project_search JOIN project p ON p.rowid = project_search.rowid "
+            + "WHERE project_search MATCH ?"
+        )
+        parameters: List[str] = [" ".join(f'"{word}"' for word in words)]
+        if category:
+            query += " AND ' ' || p.categories || ' ' LIKE ?"
+            parameters.append(f"% {category} %")
+        if game_version:
+            query += " AND ' ' || p.game_versions || ' ' LIKE ?"
+            parameters.append(f"% {game_version} %")
+        query += " ORDER BY lower(p.slug) = ? DESC, project_search.rank, p.downloads DESC"
+        query += f" LIMIT {ProjectIndex.search_limit}"
+        parameters.append(text.lower())
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+
+        return [
+            IndexedProject(id, slug, title, categories.split(), game_versions.split(), downloads)
+            for id, slug, title, categories, game_versions, downloads in rows
+        ]
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from ..config import config
+from .project_index import IndexedProject, ProjectIndex
+
+fabric_api = IndexedProject("P7dR8mSH", "fabric-api", "Fabric API", ["fabric", "library"], ["1.18.2", "1.19"], 900)
+fabric_language_kotlin = IndexedProject(
+    "Ha28R6CL", "fabric-language-kotlin", "Fabric Language Kotlin", ["fabric", "library"], ["1.19"], 500
+)
+forgified_fabric_api = IndexedProject("Aqlf1Shp", "forgified-fabric-api", "Forgified Fabric API", ["forge"], [], 100)
+api = IndexedProject("api00000", "api", "Api", ["forge"], ["1.19"], 10)
+
+
+@pytest.fixture
+def index(tmp_path: Path):
+    index = ProjectIndex(tmp_path)
+    index.add([fabric_api, fabric_language_kotlin, forgified_fabric_api, api])
+    yield index
+    index.close()
+
+
+def test_search_by_words_in_slug_and_title(index: ProjectIndex):
+    assert index.search("kotlin") == [fabric_language_kotlin]
+    assert index.search("Fabric Language") == [fabric_language_kotlin]
+    assert index.search("sodium") == []
+
+
+def test_search_exact_slug_first(index: ProjectIndex):
+    actual = index.search("api")
+
+    assert [project.slug for project in actual] == ["api", "fabric-api", "forgified-fabric-api"]
+
+
+def test_search_text_is_not_query_syntax(index: ProjectIndex):
+    assert index.search('fabric-api" OR "api') == []
+    assert index.search("-*") == []
+
+
+@pytest.mark.parametrize(
+    "name,category,game_version,expected",
+    [
+        ("No filter", None, None, ["fabric-api", "forgified-fabric-api"]),
+        ("By loader", "forge", None, ["forgified-fabric-api"]),
+        ("By minecraft version", None, "1.18.2", ["fabric-api"]),
+        ("Whole minecraft version only", None, "1.18", []),
+        ("By both", "fabric", "1.19", ["fabric-api"]),
+    ],
+)
+def test_search_filters(name, category, game_version, expected, index: ProjectIndex):
+    print(name)
+
+    actual = index.search("fabric-api", category, game_version)
+
+    assert [project.slug for project in actual] == expected
+
+
+def test_add_updates_existing_projects(index: ProjectIndex):
+    renamed = IndexedProject("P7dR8mSH", "fabric", "Fabric", ["fabric"], ["1.20"], 1000)
+
+    index.add([renamed])
+
+    assert index.count() == 4
+    assert index.search("fabric-api") == [forgified_fabric_api]
+    assert index.search("fabric", "fabric", "1.20") == [renamed]
+
+
+def test_index_is_kept_between_runs_in_different_mods_dirs(tmp_path: Path):
+    index_dir = tmp_path.joinpath("cache", "minecraft-mod-manager")
+    config.dir = tmp_path.joinpath("server-1")
+    index = ProjectIndex(index_dir)
+    assert index.last_refresh is None
+    index.add([fabric_language_kotlin])
+    index.last_refresh = 1234.5
+    index.close()
+
+    config.dir = tmp_path.joinpath("server-2")
+    index = ProjectIndex(index_dir)
+
+    assert index.last_refresh == 1234.5
+    assert index.search("kotlin") == [fabric_language_kotlin]
+    index.close()
+    config.dir = Path(".")
@@ -0,0 +1,147 @@
+import time
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Dict, Mapping, Optional, Union
+from urllib.parse import urlparse
+
+from tealprint import TealPrint
+
+
+class _Bucket:
+    def __init__(self, requests_per_minute: Optional[int]) -> None:
+        self.rate: Optional[float] = None
+        self.capacity = 0.0
+        if requests_per_minute:
+            self.rate = requests_per_minute / 60
+            self.capacity = float(requests_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token from the bucket.
+
+        Returns:
+            Seconds to wait before the request can be sent.
+            None if that's longer than max_wait, no token is taken then
+        """
+        wait = max(0.0, self.blocked_until - now)
+        tokens = self.tokens
+        if self.rate:
+            tokens = min(self.capacity, tokens + (now - self.updated) * self.rate) - 1
+            if tokens < 0:
+                wait = max(wait, -tokens / self.rate)
+
+        if max_wait is not None and wait > max_wait:
+            return None
+
+        if self.rate:
+            self.tokens = tokens
+            self.updated = now
+        return wait
+
+
+class RateLimiter:
+    """Token bucket rate limiter for each host. Also keeps track of the rate limit headers
+    that the host responds with, and waits until the limit has been reset when the host tells us to.
+    """
+
+    default_block = 60.0
+    """Seconds to wait when we're rate limited but the host doesn't say for how long"""
+
+    def __init__(self, requests_per_minute: Mapping[str, int] = {}) -> None:
+        """
+        Args:
+            requests_per_minute (Mapping[str, int]): Max requests per minute for each host.
+                Hosts not in here are only limited by the headers they respond with
+        """
+        self._requests_per_minute = requests_per_minute
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = Lock()
+
+    def acquire(self, url: str, max_wait: Optional[float] = None) -> bool:
+        """Blocks until a request to the url's host is allowed.
+
+        Args:
+            max_wait (float): Don't wait longer than this, e.g. the time left until the deadline
+
+        Returns:
+            False without waiting if the request isn't allowed within max_wait seconds
+        """
+        wait = self.reserve(url, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def reserve(self, url: str, max_wait: Optional[float] = None) -> Optional[float]:
+        """Reserve a request to the url's host without waiting for it.
+
+        Args:
+            max_wait (float): Don't reserve the request if it has to wait longer than this
+
+        Returns:
+            Seconds to wait before the request can be sent. None if that's longer than max_wait
+        """
+        host = RateLimiter._host(url)
+        with self._lock:
+            wait = self._bucket(host).reserve(time.monotonic(), max_wait)
+
+        if wait is None:
+            TealPrint.debug(f"Rate limiting {host} for longer than {max_wait:.2f} seconds")
+        elif wait > 0:
+            TealPrint.debug(f"Rate limiting {host}, waiting {wait:.2f} seconds")
+        return wait
+
+    def update(self, url: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update the limits from the rate limit headers of a response"""
+        remaining = RateLimiter._to_float(headers.get("X-Ratelimit-Remaining"))
+        reset = RateLimiter._to_float(headers.get("X-Ratelimit-Reset"))
+        retry_after = RateLimiter._parse_retry_after(headers.get("Retry-After"))
+
+        host = RateLimiter._host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+
+            if status_code == 429 or remaining == 0:
+                block = RateLimiter.default_block
+                if retry_after is not None:
+                    block = retry_after
+                elif reset is not None:
+                    block = reset
+                bucket.blocked_until = max(bucket.blocked_until, now + block)
+                TealPrint.verbose(f"Rate limit reached for {host}, pausing requests for {block:.0f} seconds")
+            elif remaining is not None and bucket.rate:
+                bucket.tokens = min(bucket.tokens, remaining)
+
+    def _bucket(self, host: str) -> _Bucket:
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(self._requests_per_minute.get(host))
+        return self._buckets[host]
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).hostname or ""
+
+    @staticmethod
+    def _to_float(value: Union[str, None]) -> Optional[float]:
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_retry_after(value: Union[str, None]) -> Optional[float]:
+        """Retry-After is either in seconds or an HTTP date"""
+        seconds = RateLimiter._to_float(value)
+        if seconds is not None or value is None:
+            return seconds
+
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,97 @@
+import pytest
+from mockito import unstub, verify, when
+
+from . import rate_limiter
+from .rate_limiter import RateLimiter
+
+url = "https://api.modrinth.com/v2/project/fabric-api"
+
+
+@pytest.fixture
+def limiter():
+    when(rate_limiter.time).monotonic().thenReturn(100)
+    when(rate_limiter.time).sleep(...)
+    yield RateLimiter({"api.modrinth.com": 60})
+    unstub()
+
+
+def test_no_wait_when_within_limit(limiter: RateLimiter):
+    for _ in range(60):
+        limiter.acquire(url)
+
+    verify(rate_limiter.time, times=0).sleep(...)
+
+
+def test_wait_for_token_when_limit_is_reached(limiter: RateLimiter):
+    for _ in range(60):
+        limiter.acquire(url)
+
+    limiter.acquire(url)
+
+    verify(rate_limiter.time).sleep(1.0)
+
+
+def test_other_hosts_are_not_limited(limiter: RateLimiter):
+    for _ in range(100):
+        limiter.acquire("https://cdn.modrinth.com/data/file.jar")
+
+    verify(rate_limiter.time, times=0).sleep(...)
+
+
+def test_wait_for_retry_after_when_too_many_requests(limiter: RateLimiter):
+    limiter.update(url, 429, {"Retry-After": "5"})
+
+    limiter.acquire(url)
+
+    verify(rate_limiter.time).sleep(5.0)
+
+
+def test_no_wait_when_retry_after_is_zero(limiter: RateLimiter):
+    limiter.update(url, 429, {"Retry-After": "0"})
+
+    limiter.acquire(url)
+
+    verify(rate_limiter.time, times=0).sleep(...)
+
+
+def test_wait_for_reset_when_no_requests_remaining(limiter: RateLimiter):
+    limiter.update(url, 200, {"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "12"})
+
+    limiter.acquire(url)
+
+    verify(rate_limiter.time).sleep(12.0)
+
+
+def test_use_remaining_from_headers(limiter: RateLimiter):
+    limiter.update(url, 200, {"X-Ratelimit-Remaining": "1", "X-Ratelimit-Reset": "30"})
+
+    limiter.acquire(url)
+    limiter.acquire(url)
+
+    verify(rate_limiter.time).sleep(1.0)
+
+
+def test_no_wait_when_longer_than_max_wait(limiter: RateLimiter):
+    limiter.update(url, 429, {"Retry-After": "3"})
+
+    assert limiter.acquire(url, max_wait=0.5) is False
+    assert limiter.acquire(url, max_wait=3) is True
+
+    verify(rate_limiter.time).sleep(3.0)
+
+
+def test_token_is_kept_when_longer_than_max_wait(limiter: RateLimiter):
+    for _ in range(60):
+        limiter.acquire(url)
+
+    assert limiter.reserve(url, max_wait=0.5) is None
+    assert limiter.reserve(url) == 1.0
+
+
+def test_parse_retry_after_date():
+    when(rate_limiter.time).time().thenReturn(1445412480)
+
+    actual = RateLimiter._parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT")
+    unstub()
+
+    assert actual == 10
@@ -0,0 +1,199 @@
+import sqlite3
+import time
+import zlib
+from json import loads
+from os import path
+from threading import RLock
+from typing import Any, Dict, List, Optional, Union
+
+from tealprint import TealPrint
+
+from ..config import config
+
+
+class CachedResponse:
+    """A response body with its validators. The body can be created from either the text or the compressed text,
+    and the other one is only created when it's needed."""
+
+    compress_level = 6
+
+    def __init__(
+        self,
+        url: str,
+        content_type: str,
+        body: Union[str, None] = None,
+        etag: Union[str, None] = None,
+        last_modified: Union[str, None] = None,
+        compressed: Union[bytes, None] = None,
+    ) -> None:
+        self.url = url
+        self.content_type = content_type
+        self._body = body
+        self._compressed = compressed
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def body(self) -> str:
+        if self._body is None:
+            self._body = zlib.decompress(self._compressed or b"").decode("utf-8")
+        return self._body
+
+    @property
+    def compressed(self) -> bytes:
+        """zlib compressed body"""
+        if self._compressed is None:
+            self._compressed = zlib.compress(self.body.encode("utf-8"), CachedResponse.compress_level)
+        return self._compressed
+
+    def validator_headers(self) -> Dict[str, str]:
+        """Headers to send for checking whether the cached response is still valid"""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CachedProject:
+    """Info of a project on a site, or that the project doesn't exist"""
+
+    def __init__(self, body: Union[str, None], stored: float) -> None:
+        self.body = body
+        """JSON of the project, None if the project wasn't found"""
+        self.stored = stored
+        """time.time() when the project was looked up"""
+
+    @property
+    def found(self) -> bool:
+        return self.body is not None
+
+    @property
+    def json(self) -> Any:
+        """Parsed JSON of the project, None if the project wasn't found"""
+        if self.body is None:
+            return None
+        return loads(self.body)
+
+
+class ResponseCache:
+    """Persistent cache of API responses that lives next to the mods DB.
+    Responses are only stored if they can be revalidated, i.e. has an ETag or Last-Modified header.
+    Bodies are stored compressed and only decompressed when they're used.
+    Project lookups are stored by both id and slug, see ProjectCache.
+    Entries that haven't been used in a while are removed with prune().
+    """
+
+    version = 2
+    """Version of the cache's tables. The cache is recreated when it changes"""
+
+    def __init__(self) -> None:
+        file_path = path.join(config.dir, f".{config.app_name}.cache.db")
+        TealPrint.debug(f"Response cache location: {file_path}")
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._lock = RLock()
+
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != ResponseCache.version:
+            TealPrint.debug(f"Recreating response cache, version {version} -> {ResponseCache.version}")
+            self._connection.execute("DROP TABLE IF EXISTS response")
+            self._connection.execute("DROP TABLE IF EXISTS project")
+            self._connection.execute(f"PRAGMA user_version={ResponseCache.version}")
+
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS response ("
+            + "url TEXT PRIMARY KEY, "
+            + "content_type TEXT, "
+            + "body BLOB, "
+            + "etag TEXT, "
+            + "last_modified TEXT, "
+            + "stored INTEGER)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS project ("
+            + "site TEXT, "
+            + "key TEXT, "
+            + "body TEXT, "
+            + "stored INTEGER, "
+            + "PRIMARY KEY (site, key))"
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content_type, body, etag, last_modified FROM response WHERE url=?", [url]
+            ).fetchone()
+
+        if row:
+            content_type, compressed, etag, last_modified = row
+            return CachedResponse(url, content_type, etag=etag, last_modified=last_modified, compressed=compressed)
+        return None
+
+    def put(self, response: CachedResponse) -> None:
+        if not response.etag and not response.last_modified:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response (url, content_type, body, etag, last_modified, stored) "
+                + "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    response.url,
+                    response.content_type,
+                    response.compressed,
+                    response.etag,
+                    response.last_modified,
+                    round(time.time()),
+                ],
+            )
+            self._connection.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark the response as used, e.g. when it was revalidated, so it isn't pruned"""
+        with self._lock:
+            self._connection.execute("UPDATE response SET stored=? WHERE url=?", [round(time.time()), url])
+            self._connection.commit()
+
+    def prune(self, max_age: float) -> None:
+        """Remove responses and projects that haven't been stored or used in max_age seconds,
+        e.g. of mods that are no longer installed"""
+        oldest = round(time.time() - max_age)
+        with self._lock:
+            responses = self._connection.execute("DELETE FROM response WHERE stored < ?", [oldest]).rowcount
+            projects = self._connection.execute("DELETE FROM project WHERE stored < ?", [oldest]).rowcount
+            self._connection.commit()
+        if responses or projects:
+            TealPrint.debug(f"Pruned {responses} responses and {projects} projects from the response cache")
+
+    def get_project(self, site: str, key: str) -> Optional[CachedProject]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, stored FROM project WHERE site=? AND key=?", [site, key]
+            ).fetchone()
+
+        if row:
+            body, stored = row
+            return CachedProject(body, stored)
+        return None
+
+    def put_project(self, site: str, keys: List[str], project: CachedProject) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO project (site, key, body, stored) VALUES (?, ?, ?, ?)",
+                [[site, key, project.body, round(project.stored)] for key in keys],
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        TealPrint.verbose("Clearing response cache")
+        with self._lock:
+            self._connection.execute("DELETE FROM response")
+            self._connection.execute("DELETE FROM project")
+            self._connection.commit()
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from ..config import config
+from .response_cache import CachedProject, CachedResponse, ResponseCache
+
+db_file = f".{config.app_name}.cache.db"
+
+
+@pytest.fixture
+def cache() -> ResponseCache:
+    cache = ResponseCache()
+    yield cache
+    cache.close()
+    os.remove(db_file)
+
+
+def test_get_returns_stored_response(cache: ResponseCache):
+    cache.put(CachedResponse("https://test.com", "application/json", '{"a":1}', etag='"123"'))
+
+    actual = cache.get("https://test.com")
+
+    assert actual
+    assert actual.body == '{"a":1}'
+    assert actual.content_type == "application/json"
+    assert actual.validator_headers() == {"If-None-Match": '"123"'}
+
+
+def test_skip_response_without_validators(cache: ResponseCache):
+    cache.put(CachedResponse("https://test.com", "application/json", '{"a":1}'))
+
+    assert cache.get("https://test.com") is None
+
+
+def test_response_is_kept_between_runs():
+    last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+    cache = ResponseCache()
+    cache.put(CachedResponse("https://test.com", "text/plain", "text", last_modified=last_modified))
+    cache.close()
+
+    reopened = ResponseCache()
+    actual = reopened.get("https://test.com")
+    reopened.close()
+    os.remove(db_file)
+
+    assert actual
+    assert actual.validator_headers() == {"If-Modified-Since": last_modified}
+
+
+def test_clear(cache: ResponseCache):
+    cache.put(CachedResponse("https://test.com", "text/plain", "text", etag='"123"'))
+
+    cache.clear()
+
+    assert cache.get("https://test.com") is None
+
+
+def test_body_is_stored_compressed(cache: ResponseCache):
+    body = '{"version": "1.0.0"}' * 1000
+    cache.put(CachedResponse("https://test.com", "application/json", body, etag='"123"'))
+
+    stored = cache._connection.execute("SELECT body FROM response").fetchone()[0]
+    actual = cache.get("https://test.com")
+
+    assert len(stored) < len(body) / 10
+    assert actual
+    assert actual.body == body
+
+
+def test_recreate_cache_from_older_version():
+    connection = sqlite3.connect(db_file)
+    connection.execute("CREATE TABLE response (url TEXT PRIMARY KEY, body TEXT)")
+    connection.execute("INSERT INTO response (url, body) VALUES ('https://test.com', 'text')")
+    connection.commit()
+    connection.close()
+
+    cache = ResponseCache()
+    actual = cache.get("https://test.com")
+    cache.close()
+    os.remove(db_file)
+
+    assert actual is None
+
+
+def test_project_is_kept_between_runs():
+    cache = ResponseCache()
+    cache.put_project("modrinth", ["P7dR8mSH", "fabric-api"], CachedProject('{"id":"P7dR8mSH"}', 100))
+    cache.put_project("modrinth", ["missing"], CachedProject(None, 200))
+    cache.close()
+
+    reopened = ResponseCache()
+    found = reopened.get_project("modrinth", "fabric-api")
+    missing = reopened.get_project("modrinth", "missing")
+    unknown = reopened.get_project("curse", "fabric-api")
+    reopened.close()
+    os.remove(db_file)
+
+    assert found and found.json == {"id": "P7dR8mSH"} and found.stored == 100
+    assert missing and not missing.found
+    assert unknown is None
+
+
+def test_prune_removes_entries_that_havent_been_used(cache: ResponseCache):
+    cache.put(CachedResponse("https://old.com", "text/plain", "old", etag='"1"'))
+    cache.put(CachedResponse("https://used.com", "text/plain", "used", etag='"2"'))
+    cache._connection.execute("UPDATE response SET stored=?", [round(time.time()) - 100])
+    cache.touch("https://used.com")
+    cache.put_project("modrinth", ["old"], CachedProject(None, time.time() - 100))
+    cache.put_project("modrinth", ["new"], CachedProject(None, time.time()))
+
+    cache.prune(50)
+
+    assert cache.get("https://old.com") is None
+    assert cache.get("https://used.com")
+    assert cache.get_project("modrinth", "old") is None
+    assert cache.get_project("modrinth", "new")
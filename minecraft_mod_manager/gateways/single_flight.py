@@ -0,0 +1,51 @@
+from threading import Event, Lock
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = Event()
+        self.value: Any = None
+        self.error: Any = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls with the same key.
+    The first caller runs the function, and callers that come while it's running
+    wait for it to finish and get the same result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        """Number of calls that got the result of another call"""
+        self._calls: Dict[str, _Call] = {}
+        self._lock = Lock()
+
+    def do(self, key: str, function: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = function()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
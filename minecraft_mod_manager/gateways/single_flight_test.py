@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from .single_flight import SingleFlight
+
+
+def wait_for_shared(single_flight: SingleFlight, count: int, timeout: float = 5) -> None:
+    """Wait until count calls wait for the first one. Fails instead of hanging if they never do"""
+    deadline = time.monotonic() + timeout
+    while single_flight.shared < count:
+        assert time.monotonic() < deadline, f"Only {single_flight.shared} of {count} calls were shared"
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_result():
+    single_flight = SingleFlight()
+    waiting = Event()
+    calls = []
+
+    def function():
+        calls.append(1)
+        waiting.wait(timeout=5)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(single_flight.do, "key", function) for _ in range(3)]
+        wait_for_shared(single_flight, 2)
+        waiting.set()
+        actual = [future.result() for future in futures]
+
+    assert ["value"] * 3 == actual
+    assert len(calls) == 1
+
+
+def test_concurrent_calls_share_exception():
+    single_flight = SingleFlight()
+    waiting = Event()
+
+    def function():
+        waiting.wait(timeout=5)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(single_flight.do, "key", function) for _ in range(2)]
+        wait_for_shared(single_flight, 1)
+        waiting.set()
+
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_calls_after_first_is_done_run_again():
+    single_flight = SingleFlight()
+    calls = []
+
+    def function():
+        calls.append(1)
+        return len(calls)
+
+    assert single_flight.do("key", function) == 1
+    assert single_flight.do("key", function) == 2
+    assert single_flight.shared == 0
+
+
+def test_different_keys_dont_share():
+    single_flight = SingleFlight()
+
+    assert single_flight.do("a", lambda: "a") == "a"
+    assert single_flight.do("b", lambda: "b") == "b"
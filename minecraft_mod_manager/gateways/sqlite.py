@@ -1,5 +1,6 @@
 import sqlite3
 from os import path
+from threading import RLock
 from typing import Any, Dict, List, Union
 
 from tealprint import TealPrint
@@ -86,7 +87,9 @@ class Sqlite:
     def __init__(self) -> None:
         file_path = path.join(config.dir, f".{config.app_name}.db")
         TealPrint.debug(f"DB location: {file_path}")
-        self._connection = sqlite3.connect(file_path)
+        # Mods can be updated from several download threads, all writes go through the lock
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._lock = RLock()
         self._cursor = self._connection.cursor()
 
         upgrader = SqliteUpgrader(self._connection, self._cursor)
@@ -181,36 +184,38 @@ class Sqlite:
         if config.pretend:
             return
 
-        if self.exists(mod.id, filter_active=False):
-            self._cursor.execute(
-                "UPDATE mod SET "
-                + f"{_Column.c_sites}=?, "
-                + f"{_Column.c_upload_time}=? "
-                + "WHERE "
-                + f"{_Column.c_id}=?",
-                [_Column.dict_sites_to_string(mod.sites), mod.upload_time, mod.id],
-            )
-            self._connection.commit()
-        else:
-            self.insert_mod(mod)
+        with self._lock:
+            if self.exists(mod.id, filter_active=False):
+                self._cursor.execute(
+                    "UPDATE mod SET "
+                    + f"{_Column.c_sites}=?, "
+                    + f"{_Column.c_upload_time}=? "
+                    + "WHERE "
+                    + f"{_Column.c_id}=?",
+                    [_Column.dict_sites_to_string(mod.sites), mod.upload_time, mod.id],
+                )
+                self._connection.commit()
+            else:
+                self.insert_mod(mod)
 
     def insert_mod(self, mod: Mod):
         if config.pretend:
             return
 
-        try:
-            self._cursor.execute(
-                "INSERT INTO mod ("
-                + f"{_Column.c_id}, "
-                + f"{_Column.c_sites}, "
-                + f"{_Column.c_upload_time}, "
-                + f"{_Column.c_active}) "
-                + "VALUES (?, ?, ?, 1)",
-                [mod.id, _Column.dict_sites_to_string(mod.sites), mod.upload_time],
-            )
-            self._connection.commit()
-        except sqlite3.IntegrityError:
-            raise ModAlreadyExists(mod)
+        with self._lock:
+            try:
+                self._cursor.execute(
+                    "INSERT INTO mod ("
+                    + f"{_Column.c_id}, "
+                    + f"{_Column.c_sites}, "
+                    + f"{_Column.c_upload_time}, "
+                    + f"{_Column.c_active}) "
+                    + "VALUES (?, ?, ?, 1)",
+                    [mod.id, _Column.dict_sites_to_string(mod.sites), mod.upload_time],
+                )
+                self._connection.commit()
+            except sqlite3.IntegrityError:
+                raise ModAlreadyExists(mod)
 
     def _activate_mod(self, id: str):
         if config.pretend:
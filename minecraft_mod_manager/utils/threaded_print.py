@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+from tealprint import TealPrint, TealPrintBuffer
+
+
+class _ThreadRouter:
+    """Routes TealPrint messages to the calling thread's buffer, or to the original buffer
+    if the thread doesn't have one."""
+
+    def __init__(self, fallback: TealPrintBuffer) -> None:
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def current(self) -> TealPrintBuffer:
+        return getattr(self.local, "buffer", None) or self.fallback
+
+    def flush(self) -> None:
+        # Threads with their own buffer print everything at once when they're done
+        if self.current() is self.fallback:
+            self.fallback.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.current(), name)
+
+
+class ThreadedPrint:
+    """Keeps messages from concurrent workers from being interleaved with each other.
+    All messages printed inside buffer() are held back and printed together when the block exits.
+
+    Usage:
+        with ThreadedPrint():
+            # In each worker thread
+            with ThreadedPrint.buffer():
+                TealPrint.info("Printed when the worker is done")
+                parent = ThreadedPrint.current()
+
+            # In threads started by the worker
+            with ThreadedPrint.buffer(parent):
+                TealPrint.info("Printed together with the worker's messages")
+    """
+
+    def __init__(self) -> None:
+        self._original: Union[TealPrintBuffer, None] = None
+
+    def __enter__(self) -> ThreadedPrint:
+        self._original = TealPrint._buffer
+        TealPrint._buffer = _ThreadRouter(self._original)  # type: ignore
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self._original:
+            TealPrint._buffer = self._original
+
+    @staticmethod
+    def current() -> Union[TealPrintBuffer, None]:
+        """Buffer of the calling thread, if it has one. Pass it to buffer() in the threads it starts"""
+        router = TealPrint._buffer
+        if not isinstance(router, _ThreadRouter):
+            return None
+        return getattr(router.local, "buffer", None)
+
+    @staticmethod
+    @contextmanager
+    def buffer(parent: Union[TealPrintBuffer, None] = None) -> Iterator[None]:
+        """Hold back the messages of the thread until the block exits.
+
+        Args:
+            parent: Buffer of the thread that started this one, see current(). The messages are added to it
+                instead of printed, so they're printed together with the messages of that thread
+        """
+        router = TealPrint._buffer
+        if not isinstance(router, _ThreadRouter):
+            yield
+            return
+
+        buffer = TealPrintBuffer()
+        if parent:
+            buffer.indent_stack = list(parent.indent_stack)
+        router.local.buffer = buffer
+        try:
+            yield
+        finally:
+            del router.local.buffer
+            if parent:
+                parent.buffer.write(buffer.buffer.getvalue())
+            else:
+                buffer.flush()
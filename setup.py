@@ -30,6 +30,10 @@ setup(
         "tealprint>=0.3.0",
         "toml",
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "brotli": ["brotli"],
+    },
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "License :: OSI Approved :: MIT License",
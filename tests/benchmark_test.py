@@ -0,0 +1,75 @@
+"""Benchmarks of the full install/update pipeline against a local stand-in for Modrinth.
+
+Run with: pytest tests/benchmark_test.py --benchmark -s
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from .util.stand_in_runner import StandInRunner
+from .util.stand_in_server import StandInServer
+
+results_file = Path("benchmark-results.json")
+
+
+def _report(name: str, summary: Dict[str, Any]) -> None:
+    print(
+        f"\n{name}: {summary['seconds']:.2f}s, {summary['requests']} requests "
+        + f"({summary['server_requests']} sent to the server), {summary['bytes']} bytes"
+    )
+    for host, host_summary in summary["hosts"].items():
+        print(f"    {host}: p50 {host_summary['p50']:.3f}s, p95 {host_summary['p95']:.3f}s")
+
+    results: Dict[str, Any] = {}
+    if results_file.exists():
+        with open(results_file) as file:
+            results = json.load(file)
+    results[name] = {key: value for key, value in summary.items() if key != "templates"}
+    with open(results_file, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("mods", [10, 100, 1000])
+@pytest.mark.parametrize("jobs", [1, 8])
+def test_install(tmp_path: Path, mods: int, jobs: int):
+    with StandInServer(mods=mods, latency=0.02) as server, StandInRunner(server, tmp_path, jobs) as runner:
+        summary = runner.install([mod.slug for mod in server.mods])
+
+        assert len(runner.installed_jars()) == mods
+        _report(f"install-{mods}-jobs-{jobs}", summary)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("mods", [10, 100, 1000])
+@pytest.mark.parametrize("jobs", [1, 8])
+def test_update(tmp_path: Path, mods: int, jobs: int):
+    with StandInServer(mods=mods, latency=0.02) as server, StandInRunner(server, tmp_path, jobs) as runner:
+        runner.install([mod.slug for mod in server.mods])
+
+        unchanged = runner.update()
+        _report(f"update-unchanged-{mods}-jobs-{jobs}", unchanged)
+
+        server.release_new_version()
+        updated = runner.update()
+        assert len(runner.installed_jars()) == mods
+        _report(f"update-new-versions-{mods}-jobs-{jobs}", updated)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "name,options",
+    [
+        ("slow-bandwidth", {"bandwidth": 256 * 1024, "jar_size": 256 * 1024}),
+        ("server-errors", {"error_rate": 0.05, "error_status": 500}),
+        ("rate-limited", {"error_rate": 0.05, "error_status": 429}),
+    ],
+)
+def test_install_with_injected_faults(tmp_path: Path, name: str, options: Dict[str, Any]):
+    with StandInServer(mods=100, latency=0.02, **options) as server, StandInRunner(server, tmp_path, 8) as runner:
+        summary = runner.install([mod.slug for mod in server.mods])
+
+        _report(f"install-100-{name}", summary)
@@ -0,0 +1,19 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="Run the benchmarks against the stand-in server")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: slow benchmark, only runs with --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+
+    skip = pytest.mark.skip(reason="Only runs with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,188 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from minecraft_mod_manager.config import config
+from minecraft_mod_manager.core.entities.sites import Sites
+from minecraft_mod_manager.gateways.api.curse_api import InvalidApiKey
+
+from .util.stand_in_runner import StandInRunner
+from .util.stand_in_server import StandInServer
+
+
+def test_install_and_update_against_stand_in_server(tmp_path: Path):
+    with StandInServer(mods=3) as server, StandInRunner(server, tmp_path) as runner:
+        runner.install([mod.slug for mod in server.mods])
+        assert len(runner.installed_jars()) == 3
+
+        server.release_new_version()
+        runner.update()
+
+        jars = runner.installed_jars()
+        assert len(jars) == 3
+        assert all(jar.name.endswith("-1.1.0.jar") for jar in jars)
+
+
+def test_retries_injected_errors(tmp_path: Path):
+    with StandInServer(mods=2, error_rate=0.3, error_status=429, seed=1) as server, StandInRunner(
+        server, tmp_path
+    ) as runner:
+        summary = runner.install([mod.slug for mod in server.mods])
+
+        assert len(runner.installed_jars()) == 2
+        assert summary["server_requests"] > summary["requests"]
+
+
+def test_json_responses_are_compressed(tmp_path: Path):
+    with StandInServer(mods=2) as server, StandInRunner(server, tmp_path) as runner:
+        summary = runner.install([mod.slug for mod in server.mods])
+
+        # Searches and version lists, the projects found by searching aren't looked up again
+        assert summary["encodings"] == {"gzip": 4}
+
+
+def test_deadline_stops_run_when_server_stalls(tmp_path: Path):
+    config.read_timeout = 0.2
+    config.deadline = time.monotonic() + 1
+    try:
+        with StandInServer(mods=3, latency=10) as server, StandInRunner(server, tmp_path) as runner:
+            summary = runner.install([mod.slug for mod in server.mods])
+
+            assert runner.installed_jars() == []
+            assert summary["seconds"] < 3
+    finally:
+        config.read_timeout = 60
+        config.deadline = None
+
+
+def test_dependencies_are_looked_up_in_bulk(tmp_path: Path):
+    with StandInServer(mods=4, dependency=0) as server, StandInRunner(server, tmp_path) as runner:
+        runner.install([mod.slug for mod in server.mods[1:]])
+
+        assert len(runner.installed_jars()) == 4
+        assert not any(path.startswith("/v2/version/") for path in server.requests)
+        # All mods have the same dependency, so the lookups are the same URLs and cached in memory
+        assert server.requests.count("/v2/versions") == 1
+        assert server.requests.count("/v2/projects") == 1
+
+
+def test_update_looks_up_installed_files_by_hash(tmp_path: Path):
+    with StandInServer(mods=5) as server, StandInRunner(server, tmp_path) as runner:
+        runner.install([mod.slug for mod in server.mods])
+        # A jar that the server doesn't know about is searched for instead
+        tmp_path.joinpath("unknown.jar").write_bytes(StandInServer._create_jar("unknown", "Unknown", "1.0.0", 1024))
+
+        server.release_new_version()
+        requests_before = len(server.requests)
+        runner.update()
+        requests = server.requests[requests_before:]
+
+        assert requests.count("/v2/version_files") == 1
+        assert requests.count("/v2/version_files/update") == 1
+        assert requests.count("/v2/search") == 1
+        assert not any(path.endswith("/version") for path in requests)
+        jars = [jar.name for jar in runner.installed_jars() if jar.name != "unknown.jar"]
+        assert len(jars) == 5
+        assert all(jar.endswith("-1.1.0.jar") for jar in jars)
+
+
+def test_update_identifies_mods_by_hash_in_fresh_directory(tmp_path: Path):
+    with StandInServer(mods=5) as server, StandInRunner(server, tmp_path) as runner:
+        runner.install([mod.slug for mod in server.mods])
+        # Only the jars are left, e.g. when they've been copied from somewhere else
+        tmp_path.joinpath(f".{config.app_name}.db").unlink()
+        tmp_path.joinpath(f".{config.app_name}.cache.db").unlink()
+
+        server.release_new_version()
+        requests_before = len(server.requests)
+        runner.update()
+        requests = server.requests[requests_before:]
+
+        assert requests.count("/v2/version_files") == 1
+        assert requests.count("/v2/projects") == 1
+        assert not any(path.startswith("/v2/search") or path.startswith("/v2/project/") for path in requests)
+        jars = runner.installed_jars()
+        assert len(jars) == 5
+        assert all(jar.name.endswith("-1.1.0.jar") for jar in jars)
+
+        # The sites were saved, so the next update doesn't need to identify the mods again
+        requests_before = len(server.requests)
+        runner.update()
+        assert "/v2/version_files" not in server.requests[requests_before:]
+
+
+def test_shared_dependency_is_downloaded_once_with_several_jobs(tmp_path: Path):
+    with StandInServer(mods=12, dependency=0, jar_size=256 * 1024) as server, StandInRunner(
+        server, tmp_path, jobs=8
+    ) as runner:
+        runner.install([mod.slug for mod in server.mods[1:]])
+
+        assert len(runner.installed_jars()) == 12
+        assert len([path for path in server.requests if path.startswith(f"/data/{server.mods[0].id}/")]) == 1
+        assert list(tmp_path.glob(".*.part*")) == []
+
+
+def test_missing_projects_are_only_looked_up_once(tmp_path: Path):
+    with StandInServer(mods=3) as server, StandInRunner(server, tmp_path) as runner:
+        runner.install(["missing-mod"])
+        assert server.requests.count("/v2/project/missing-mod") == 1
+
+        # The next run remembers that the project doesn't exist
+        runner.install(["missing-mod"])
+        assert server.requests.count("/v2/project/missing-mod") == 1
+
+
+def test_mods_are_found_in_project_index_without_searching(tmp_path: Path):
+    with StandInServer(mods=30) as server, StandInRunner(server, tmp_path, project_index=True) as runner:
+        requests_before = len(server.requests)
+        runner.install([mod.slug for mod in server.mods[:5]])
+        requests = server.requests[requests_before:]
+
+        # Only the request that built the index, all mods fit on a single page
+        assert requests.count("/v2/search") == 1
+        assert len(runner.installed_jars()) == 5
+
+        # The index was just built, so it's not refreshed again
+        requests_before = len(server.requests)
+        runner.install([mod.slug for mod in server.mods[5:10]])
+        requests = server.requests[requests_before:]
+
+        assert requests.count("/v2/search") == 0
+        assert len(runner.installed_jars()) == 10
+
+
+def test_curse_versions_are_looked_up_in_bulk(tmp_path: Path):
+    config.curse_api_key = StandInServer.curse_api_key
+    try:
+        with StandInServer(mods=3) as server, StandInRunner(server, tmp_path) as runner:
+            runner.install([mod.slug for mod in server.mods], Sites.curse)
+            assert len(runner.installed_jars()) == 3
+
+            server.release_new_version()
+            requests_before = len(server.requests)
+            runner.update()
+            requests = server.requests[requests_before:]
+
+            # The latest versions of all mods, in one request for the mods and one for their files
+            assert requests.count("/v1/mods") == 1
+            assert requests.count("/v1/mods/files") == 1
+            assert not any(path.endswith("/files") and path != "/v1/mods/files" for path in requests)
+            jars = runner.installed_jars()
+            assert len(jars) == 3
+            assert all(jar.name.endswith("-1.1.0.jar") for jar in jars)
+    finally:
+        config.curse_api_key = None
+
+
+def test_invalid_curse_api_key_is_reported_instead_of_mod_not_found(tmp_path: Path):
+    config.curse_api_key = "invalid-key"
+    try:
+        with StandInServer(mods=1) as server, StandInRunner(server, tmp_path) as runner:
+            with pytest.raises(InvalidApiKey) as error:
+                runner.install([server.mods[0].slug], Sites.curse)
+
+            assert error.value.status_code == 403
+            assert runner.installed_jars() == []
+    finally:
+        config.curse_api_key = None
@@ -0,0 +1,84 @@
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from minecraft_mod_manager.adapters.repo_impl import RepoImpl
+from minecraft_mod_manager.app.install.install import Install
+from minecraft_mod_manager.app.update.update import Update
+from minecraft_mod_manager.config import config
+from minecraft_mod_manager.core.entities.mod import ModArg
+from minecraft_mod_manager.core.entities.sites import Site, Sites
+from minecraft_mod_manager.gateways.api.mod_finder import ModFinder
+from minecraft_mod_manager.gateways.http import Http
+from minecraft_mod_manager.gateways.http_stats import http_stats
+from minecraft_mod_manager.gateways.jar_parser import JarParser
+from minecraft_mod_manager.gateways.project_index import ProjectIndex
+from minecraft_mod_manager.gateways.response_cache import ResponseCache
+from minecraft_mod_manager.gateways.sqlite import Sqlite
+
+from .stand_in_server import StandInServer
+
+
+class StandInRunner:
+    """Runs install and update in-process against a stand-in server, the same way as __main__ does"""
+
+    def __init__(self, server: StandInServer, dir: Path, jobs: int = 1, project_index: bool = False) -> None:
+        self.server = server
+        self.dir = dir
+        self.jobs = jobs
+        self.project_index = project_index
+
+    def __enter__(self) -> "StandInRunner":
+        config.dir = self.dir
+        config.jobs = self.jobs
+        config.pool_size = max(10, self.jobs)
+        config.url_overrides = self.server.url_overrides
+        http_stats.clear()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        config.dir = Path(".")
+        config.jobs = 1
+        config.pool_size = 10
+        config.url_overrides = {}
+        http_stats.clear()
+
+    def install(self, mods: List[str], site: Optional[Sites] = None) -> Dict[str, Any]:
+        """Install the mods by their slugs, only from the site if it's specified"""
+        mod_args = [ModArg(mod, {site: Site(site, None, mod)} if site else {}) for mod in mods]
+        return self._run(lambda repo, finder: Install(repo, finder).execute(mod_args))
+
+    def update(self) -> Dict[str, Any]:
+        return self._run(lambda repo, finder: Update(repo, finder).execute([]))
+
+    def _run(self, execute: Any) -> Dict[str, Any]:
+        """Returns the request summary of the run, including how many seconds it took"""
+        http_stats.clear()
+        requests_before = len(self.server.requests)
+        sqlite = Sqlite()
+        response_cache = ResponseCache()
+        http = Http(response_cache)
+        repo = RepoImpl(JarParser(self.dir), sqlite, http)
+        index = ProjectIndex(self.dir) if self.project_index else None
+        finder = ModFinder.create(http, index)
+        try:
+            start = time.perf_counter()
+            if index:
+                finder.refresh_index()
+            execute(repo, finder)
+            seconds = time.perf_counter() - start
+        finally:
+            finder.close()
+            sqlite.close()
+            response_cache.close()
+            if index:
+                index.close()
+
+        return {
+            **http_stats.summary(),
+            "seconds": round(seconds, 3),
+            "server_requests": len(self.server.requests) - requests_before,
+        }
+
+    def installed_jars(self) -> List[Path]:
+        return sorted(self.dir.glob("*.jar"))
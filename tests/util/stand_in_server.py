@@ -0,0 +1,570 @@
+"""Local stand-in for the Modrinth and CurseForge APIs and CDNs (and the word splitter), used for benchmarking
+without touching the real APIs.
+
+Serves generated mods that are built from the recorded responses in minecraft_mod_manager/gateways/api/testdata,
+together with fake jars that the jar parser can read.
+Latency, bandwidth, and errors can be injected to simulate a slow or flaky server.
+
+Usage:
+    with StandInServer(mods=100, latency=0.05) as server:
+        config.url_overrides = server.url_overrides
+        # Run install/update
+"""
+
+import copy
+import gzip
+import hashlib
+import io
+import json
+import random
+import re
+import time
+import zipfile
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+_testdata_dir = Path(__file__).parent.parent.parent.joinpath(
+    "minecraft_mod_manager", "gateways", "api", "testdata", "modrinth_api"
+)
+
+
+def _load_testdata(filename: str) -> Any:
+    with open(_testdata_dir.joinpath(filename)) as file:
+        return json.load(file)
+
+
+class StandInMod:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.id = f"BM{index:06d}"
+        self.slug = f"benchmod{index}"
+        self.title = f"Bench Mod {index}"
+        self.curse_id = 100000 + index
+
+
+class StandInServer:
+    modrinth_api = "https://api.modrinth.com"
+    modrinth_cdn = "https://cdn.modrinth.com"
+    curse_api = "https://api.curseforge.com"
+    curse_cdn = "https://edge.forgecdn.net"
+    curse_api_key = "stand-in-key"
+    """CurseForge requests without this x-api-key header are forbidden"""
+    word_splitter = "https://word-splitter-5p3pi6z2ma-ew.a.run.app"
+
+    def __init__(
+        self,
+        mods: int = 10,
+        latency: float = 0.0,
+        bandwidth: Optional[int] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        jar_size: int = 16 * 1024,
+        compress: bool = True,
+        dependency: Optional[int] = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Args:
+            mods (int): Number of mods to serve, they're named benchmod0, benchmod1, ...
+            latency (float): Seconds to wait before responding to each request
+            bandwidth (int): Max bytes per second of each response body, unlimited if None
+            error_rate (float): Fraction of requests that fail with error_status
+            error_status (int): Status code of the injected errors, e.g. 500 or 429
+            jar_size (int): Approximate size in bytes of each jar
+            compress (bool): gzip JSON responses when the client accepts it
+            dependency (int): Index of a mod that all other mods require, specified only by its version id
+            seed (int): Seed for which requests fail
+        """
+        self.mods = [StandInMod(i) for i in range(mods)]
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.jar_size = jar_size
+        self.compress = compress
+        self.dependency = dependency
+        self.requests: List[str] = []
+        """Paths of all requests that the server has received"""
+        self.new_versions = 0
+        """Number of versions that have been released after the recorded ones"""
+
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._by_id: Dict[str, StandInMod] = {}
+        self._by_curse_id: Dict[int, StandInMod] = {}
+        for mod in self.mods:
+            self._by_id[mod.id] = mod
+            self._by_id[mod.slug] = mod
+            self._by_curse_id[mod.curse_id] = mod
+
+        self._mod_info = _load_testdata("mod_info.json")
+        self._versions_template = _load_testdata("versions_fabric-api.json")
+        self._search_hit = _load_testdata("search_fabric-api.json")["hits"][0]
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), StandInServer._handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url_overrides(self) -> Dict[str, str]:
+        """Use with config.url_overrides to send all Modrinth and CurseForge requests to this server"""
+        return {
+            StandInServer.modrinth_api: self.url,
+            StandInServer.modrinth_cdn: self.url,
+            StandInServer.curse_api: self.url,
+            StandInServer.curse_cdn: self.url,
+            StandInServer.word_splitter: f"{self.url}/word-splitter",
+        }
+
+    def start(self) -> None:
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def release_new_version(self) -> None:
+        """Release a new version of all mods, so that an update downloads them again"""
+        self.new_versions += 1
+
+    # ---------
+    # Responses
+    # ---------
+
+    def respond(
+        self, method: str, path: str, query: Dict[str, List[str]], body: Any = None, headers: Mapping[str, str] = {}
+    ) -> Tuple[int, str, bytes]:
+        """Returns the status code, content type, and body for the request"""
+        if path.startswith("/v1/") and headers.get("x-api-key") != StandInServer.curse_api_key:
+            return 403, "text/plain", b"Forbidden"
+
+        routes = [
+            ("GET", r"/v2/search", lambda: self._search(query)),
+            ("GET", r"/v2/project/([^/]+)", lambda id: self._project(id)),
+            ("GET", r"/v2/project/([^/]+)/version", lambda id: self._project_versions(id, query)),
+            ("GET", r"/v2/projects", lambda: self._projects(StandInServer._ids(query))),
+            ("GET", r"/v2/version/([^/]+)", lambda id: self._version(id)),
+            ("GET", r"/v2/versions", lambda: self._versions(StandInServer._ids(query))),
+            ("POST", r"/v2/version_files", lambda: self._version_files(body)),
+            ("POST", r"/v2/version_files/update", lambda: self._version_files_update(body)),
+            ("GET", r"/v1/mods/search", lambda: self._curse_search(query)),
+            ("GET", r"/v1/mods/(\d+)", lambda id: StandInServer._curse_data(self._curse_mod(int(id)))),
+            ("GET", r"/v1/mods/(\d+)/files", lambda id: self._curse_mod_files(int(id), query)),
+            ("POST", r"/v1/mods", lambda: self._curse_mods(body)),
+            ("POST", r"/v1/mods/files", lambda: self._curse_files(body)),
+            ("GET", r"/files/(\d+)/(\d+)/[^/]+\.jar", lambda high, low: self._curse_jar(int(high) * 1000 + int(low))),
+            ("GET", r"/word-splitter/([^/]+)", lambda text: text),
+            ("GET", r"/data/([^/]+)/versions/([^/]+)/([^/]+\.jar)", lambda id, number, _: self._jar(id, number)),
+        ]
+        for route_method, pattern, route in routes:
+            match = re.fullmatch(pattern, path)
+            if method == route_method and match:
+                response = route(*match.groups())
+                if response is None:
+                    return 404, "application/json", b'{"error":"not_found","description":"not found"}'
+                if isinstance(response, bytes):
+                    return 200, "application/java-archive", response
+                if isinstance(response, str):
+                    return 200, "text/plain", response.encode("utf-8")
+                return 200, "application/json", json.dumps(response).encode("utf-8")
+
+        return 404, "text/plain", b"Not found"
+
+    @staticmethod
+    def _ids(query: Dict[str, List[str]]) -> List[str]:
+        """ids=["a","b"] of the bulk endpoints"""
+        return json.loads(query.get("ids", ["[]"])[0])
+
+    def _search(self, query: Dict[str, List[str]]) -> Any:
+        """Search by query, or page through all mods with an empty query. The mods are always in the same order"""
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["10"])[0])
+        mods = self._find_mods(query.get("query", [""])[0])
+
+        hits: List[Any] = []
+        for mod in mods[offset : offset + limit]:
+            hit = copy.deepcopy(self._search_hit)
+            hit.update({"project_id": mod.id, "slug": mod.slug, "title": mod.title})
+            hits.append(hit)
+        return {"hits": hits, "offset": offset, "limit": limit, "total_hits": len(mods)}
+
+    def _find_mods(self, search: str) -> List[StandInMod]:
+        search = search.lower().replace(" ", "")
+        exact = self._by_id.get(search)
+        mods = [exact] if exact else []
+        mods.extend(mod for mod in self.mods if search in mod.slug and mod is not exact)
+        return mods
+
+    def _project(self, id: str) -> Any:
+        mod = self._by_id.get(id)
+        if not mod:
+            return None
+
+        project = copy.deepcopy(self._mod_info)
+        project.update({"id": mod.id, "slug": mod.slug, "title": mod.title})
+        project["versions"] = [version["id"] for version in self._mod_versions(mod)]
+        return project
+
+    def _projects(self, ids: List[str]) -> Any:
+        projects = [self._project(id) for id in ids]
+        return [project for project in projects if project]
+
+    def _project_versions(self, id: str, query: Dict[str, List[str]]) -> Any:
+        mod = self._by_id.get(id)
+        if not mod:
+            return None
+
+        loaders = json.loads(query["loaders"][0]) if "loaders" in query else None
+        game_versions = json.loads(query["game_versions"][0]) if "game_versions" in query else None
+        return [
+            version
+            for version in self._mod_versions(mod)
+            if StandInServer._matches(version, loaders, game_versions, version_types=None)
+        ]
+
+    def _version(self, id: str) -> Any:
+        match = re.fullmatch(r"(BM\d{6})-(\d+)", id)
+        mod = self._by_id.get(match.group(1)) if match else None
+        if not match or not mod:
+            return None
+
+        for version in self._mod_versions(mod):
+            if version["id"] == id:
+                return version
+        return None
+
+    def _versions(self, ids: List[str]) -> Any:
+        versions = [self._version(id) for id in ids]
+        return [version for version in versions if version]
+
+    def _version_files(self, body: Any) -> Any:
+        """Version of each sha1 hash of an installed file"""
+        hashes = set(body.get("hashes", []))
+        versions: Dict[str, Any] = {}
+        for mod in self.mods:
+            for version in self._mod_versions(mod):
+                hash = version["files"][0]["hashes"]["sha1"]
+                if hash in hashes:
+                    versions[hash] = version
+        return versions
+
+    def _version_files_update(self, body: Any) -> Any:
+        """Latest version matching the filters for each sha1 hash of an installed file"""
+        hashes = set(body.get("hashes", []))
+        loaders = body.get("loaders")
+        game_versions = body.get("game_versions")
+        version_types = body.get("version_types")
+
+        updates: Dict[str, Any] = {}
+        for mod in self.mods:
+            versions = self._mod_versions(mod)
+            installed = [
+                version["files"][0]["hashes"]["sha1"]
+                for version in versions
+                if version["files"][0]["hashes"]["sha1"] in hashes
+            ]
+            if not installed:
+                continue
+
+            matching = [
+                version
+                for version in versions
+                if StandInServer._matches(version, loaders, game_versions, version_types)
+            ]
+            if matching:
+                latest = max(matching, key=lambda version: version["date_published"])
+                for hash in installed:
+                    updates[hash] = latest
+        return updates
+
+    @staticmethod
+    def _matches(
+        version: Any,
+        loaders: Optional[List[str]],
+        game_versions: Optional[List[str]],
+        version_types: Optional[List[str]],
+    ) -> bool:
+        """Whether the version matches all filters that are specified"""
+        # Like the client, versions without loaders match all loaders
+        return bool(
+            (not loaders or not version["loaders"] or set(loaders) & set(version["loaders"]))
+            and (not game_versions or set(game_versions) & set(version["game_versions"]))
+            and (not version_types or version["version_type"] in version_types)
+        )
+
+    # ----------
+    # CurseForge
+    # ----------
+
+    @staticmethod
+    def _curse_data(data: Any, total: Optional[int] = None) -> Any:
+        """All CurseForge responses have their content in data, lists are paginated"""
+        if data is None:
+            return None
+        if total is None:
+            return {"data": data}
+        return {"data": data, "pagination": {"resultCount": len(data), "totalCount": total}}
+
+    def _curse_search(self, query: Dict[str, List[str]]) -> Any:
+        if "slug" in query:
+            mod = self._by_id.get(query["slug"][0])
+            mods = [mod] if mod else []
+        else:
+            mods = self._find_mods(query.get("searchFilter", [""])[0])
+        data = [self._curse_mod(mod.curse_id) for mod in mods[:50]]
+        return StandInServer._curse_data(data, len(mods))
+
+    def _curse_mod(self, curse_id: int) -> Any:
+        """Mod with the index of the latest file of each minecraft version, loader, and release type"""
+        mod = self._by_curse_id.get(curse_id)
+        if not mod:
+            return None
+
+        indexes: List[Any] = []
+        found = set()
+        for file in self._curse_mod_files_all(mod):
+            for game_version in file["gameVersions"]:
+                key = (game_version, file["releaseType"])
+                if game_version[0].isdigit() and key not in found:
+                    found.add(key)
+                    indexes.append(
+                        {
+                            "gameVersion": game_version,
+                            "fileId": file["id"],
+                            "filename": file["fileName"],
+                            "releaseType": file["releaseType"],
+                        }
+                    )
+        return {"id": mod.curse_id, "slug": mod.slug, "name": mod.title, "latestFilesIndexes": indexes}
+
+    def _curse_mods(self, body: Any) -> Any:
+        mods = [self._curse_mod(id) for id in body.get("modIds", [])]
+        return StandInServer._curse_data([mod for mod in mods if mod])
+
+    def _curse_mod_files(self, curse_id: int, query: Dict[str, List[str]]) -> Any:
+        mod = self._by_curse_id.get(curse_id)
+        if not mod:
+            return None
+
+        index = int(query.get("index", ["0"])[0])
+        page_size = int(query.get("pageSize", ["50"])[0])
+        game_version = query.get("gameVersion", [None])[0]
+        files = [
+            file for file in self._curse_mod_files_all(mod) if not game_version or game_version in file["gameVersions"]
+        ]
+        return StandInServer._curse_data(files[index : index + page_size], len(files))
+
+    def _curse_files(self, body: Any) -> Any:
+        files = [self._curse_file(id) for id in body.get("fileIds", [])]
+        return StandInServer._curse_data([file for file in files if file])
+
+    def _curse_file(self, file_id: int) -> Any:
+        mod = self._by_curse_id.get(100000 + file_id // 1000 - 1)
+        if not mod:
+            return None
+
+        for file in self._curse_mod_files_all(mod):
+            if file["id"] == file_id:
+                return file
+        return None
+
+    def _curse_mod_files_all(self, mod: StandInMod) -> List[Any]:
+        """The Modrinth versions of the mod as CurseForge files, newest first.
+        File ids are (mod index + 1) * 1000 + version index, so the CDN url is /files/{mod index + 1}/{version index}
+        """
+        release_types = {"release": 1, "beta": 2, "alpha": 3}
+        files: List[Any] = []
+        for version in self._mod_versions(mod):
+            file_id = (mod.index + 1) * 1000 + int(version["id"].split("-")[1])
+            file = version["files"][0]
+            files.append(
+                {
+                    "id": file_id,
+                    "modId": mod.curse_id,
+                    "fileName": file["filename"],
+                    "releaseType": release_types.get(version["version_type"], 1),
+                    "fileDate": version["date_published"],
+                    "downloadUrl": StandInServer._curse_download_url(file_id, file["filename"]),
+                    "gameVersions": version["game_versions"] + [loader.capitalize() for loader in version["loaders"]],
+                    "dependencies": [],
+                    "hashes": [{"value": file["hashes"]["sha1"], "algo": 1}],
+                }
+            )
+        return files
+
+    def _curse_jar(self, file_id: int) -> Optional[bytes]:
+        file = self._curse_file(file_id)
+        if not file:
+            return None
+        mod = self._by_curse_id[file["modId"]]
+        return self._jar(mod.id, file["fileName"][len(mod.slug) + 1 : -len(".jar")])
+
+    def _mod_versions(self, mod: StandInMod) -> List[Any]:
+        templates = list(self._versions_template)
+        # Newly released versions are copies of the latest release, but published later
+        for i in range(self.new_versions):
+            new = copy.deepcopy(self._versions_template[1])
+            new["version_number"] = f"1.{i + 1}.0"
+            new["date_published"] = f"2022-01-{i % 28 + 1:02d}T00:00:00.000000Z"
+            templates.insert(0, new)
+
+        dependencies: List[Any] = []
+        if self.dependency is not None and mod.index != self.dependency:
+            required = self.mods[self.dependency]
+            dependencies.append(
+                {
+                    "version_id": f"{required.id}-{len(templates) - 1}",
+                    "project_id": None,
+                    "file_name": None,
+                    "dependency_type": "required",
+                }
+            )
+
+        versions: List[Any] = []
+        for i, template in enumerate(reversed(templates)):
+            version = copy.deepcopy(template)
+            number = version["version_number"]
+            filename = f"{mod.slug}-{number}.jar"
+            jar = self._jar(mod.id, number)
+            version.update(
+                {
+                    "id": f"{mod.id}-{i}",
+                    "project_id": mod.id,
+                    "name": f"{mod.title} {number}",
+                    "dependencies": dependencies,
+                }
+            )
+            version["files"] = [
+                {
+                    "hashes": {
+                        "sha1": hashlib.sha1(jar).hexdigest(),
+                        "sha512": hashlib.sha512(jar).hexdigest(),
+                    },
+                    "url": f"{StandInServer.modrinth_cdn}/data/{mod.id}/versions/{number}/{filename}",
+                    "filename": filename,
+                    "primary": True,
+                    "size": len(jar),
+                }
+            ]
+            versions.append(version)
+        versions.reverse()
+        return versions
+
+    def _jar(self, id: str, number: str) -> Optional[bytes]:
+        mod = self._by_id.get(id)
+        if not mod:
+            return None
+        return StandInServer._create_jar(mod.slug, mod.title, number, self.jar_size)
+
+    @staticmethod
+    def _curse_download_url(file_id: int, filename: str) -> str:
+        """Same layout as the CurseForge CDN, /files/{first digits of the id}/{last 3 digits}/{filename}"""
+        return f"{StandInServer.curse_cdn}/files/{file_id // 1000}/{file_id % 1000}/{filename}"
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _create_jar(slug: str, title: str, number: str, size: int) -> bytes:
+        """Fabric jar that's always the same for the same arguments, so that the hashes are stable"""
+        data = io.BytesIO()
+        with zipfile.ZipFile(data, "w", compression=zipfile.ZIP_STORED) as jar:
+            info = zipfile.ZipInfo("fabric.mod.json", date_time=(2022, 1, 1, 0, 0, 0))
+            jar.writestr(info, json.dumps({"schemaVersion": 1, "id": slug, "name": title, "version": number}))
+            padding = zipfile.ZipInfo("padding.bin", date_time=(2022, 1, 1, 0, 0, 0))
+            jar.writestr(padding, hashlib.shake_256(f"{slug}-{number}".encode("utf-8")).digest(max(0, size - 512)))
+        return data.getvalue()
+
+    # ---------
+    # Injection
+    # ---------
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _record(self, path: str) -> None:
+        with self._lock:
+            self.requests.append(path)
+
+    @staticmethod
+    def _handler(server: "StandInServer") -> Any:
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                self._handle("GET")
+
+            def do_POST(self) -> None:
+                self._handle("POST")
+
+            def _handle(self, method: str) -> None:
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                server._record(parsed.path)
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if server._should_fail():
+                    self._send(server.error_status, "text/plain", b"Injected error", {"Retry-After": "0"})
+                    return
+
+                status, content_type, body = server.respond(
+                    method, parsed.path, parse_qs(parsed.query), body, self.headers
+                )
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self._send(304, content_type, b"", {"ETag": etag})
+                    return
+
+                headers = {"ETag": etag}
+                accept_encoding = self.headers.get("Accept-Encoding", "")
+                if server.compress and content_type == "application/json" and "gzip" in accept_encoding:
+                    body = gzip.compress(body)
+                    headers["Content-Encoding"] = "gzip"
+                self._send(status, content_type, body, headers)
+
+            def _send(self, status: int, content_type: str, body: bytes, headers: Dict[str, str]) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self._write(body)
+
+            def _write(self, body: Union[bytes, memoryview]) -> None:
+                if not server.bandwidth:
+                    self.wfile.write(body)
+                    return
+
+                # Send the body in chunks of 1/10 of a second
+                chunk_size = max(1, server.bandwidth // 10)
+                view = memoryview(body)
+                for start in range(0, len(view), chunk_size):
+                    self.wfile.write(view[start : start + chunk_size])
+                    time.sleep(0.1)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                # Don't print every request
+                pass
+
+        return Handler